@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import importlib.util
 from pathlib import Path
 import os
 import dj_database_url
@@ -54,6 +55,11 @@ REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "api.exceptions.drf_exception_handler",
 }
 
+# MessagePack next to JSON (Accept / Content-Type: application/msgpack) when msgpack is installed
+if importlib.util.find_spec("msgpack") is not None:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].insert(1, "veto.renderers.MessagePackRenderer")
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].append("veto.renderers.MessagePackParser")
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "https://nettenz.github.io",  # ✅ Your GitHub Pages frontend
@@ -73,7 +79,10 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-veto-primary',
 ]
+# Read by the frontend to pin itself to the primary after a write (veto/replicas.py)
+CORS_EXPOSE_HEADERS = ['X-Veto-Primary']
 
 
 # Allowed hosts
@@ -117,6 +126,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so a profile covers the whole stack; removed from the chain unless PROFILE_DIR is set
+    "veto.profiling.ProfileMiddleware",
+    "veto.timing.ServerTimingMiddleware",
+    "veto.queryaudit.QueryAuditMiddleware",
+    "veto.replicas.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
 
     # CORS MUST be as high as possible
@@ -169,15 +183,136 @@ def sqlite_default():
         "NAME": BASE_DIR / "db.sqlite3",
     }
 
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+# DB_POOL=true: psycopg3 connection pool shared by a worker's threads (Django >= 5.1, needs psycopg[pool]).
+# Persistent connections (CONN_MAX_AGE) and pooling are mutually exclusive.
+DB_POOL = os.getenv("DB_POOL", "false").lower() == "true"
+
+def postgres_pool_options():
+    return {
+        "min_size": _env_int("DB_POOL_MIN_SIZE", 2),
+        "max_size": _env_int("DB_POOL_MAX_SIZE", 8),
+        "timeout": _env_int("DB_POOL_TIMEOUT", 10),  # seconds to wait for a free connection
+    }
+
 if _db_url:
     try:
-        DATABASES = {"default": dj_database_url.parse(_db_url, conn_max_age=600)}
+        DATABASES = {"default": dj_database_url.parse(
+            _db_url, conn_max_age=_env_int("DB_CONN_MAX_AGE", 600), conn_health_checks=True,
+        )}
     except Exception:
         # Malformed/unsupported URL -> safe fallback
         DATABASES = {"default": sqlite_default()}
 else:
     DATABASES = {"default": sqlite_default()}
 
+# DATABASE_REPLICA_URL: a read replica for safe /api/ requests (veto/replicas.py). Writes, commands and
+# clients that wrote within REPLICA_PIN_SECONDS stay on the primary.
+_replica_url = os.getenv("DATABASE_REPLICA_URL", "").strip()
+if _replica_url:
+    DATABASES["replica"] = dj_database_url.parse(
+        _replica_url, conn_max_age=_env_int("DB_CONN_MAX_AGE", 600), conn_health_checks=True,
+    )
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+DATABASE_READ_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["veto.replicas.ReplicaRouter"]
+REPLICA_PIN_SECONDS = _env_int("REPLICA_PIN_SECONDS", 5)
+
+# SQLITE_TUNED=true (default): production settings for single-box SQLite deployments. WAL lets reads
+# run alongside the writer; BEGIN IMMEDIATE takes the write lock when a transaction starts, so concurrent
+# commands queue on the busy timeout instead of failing with "database is locked" when a read lock
+# can't be upgraded (select_for_update is a no-op on SQLite). Benchmarks: docs/operations.md.
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "true").lower() == "true"
+
+def sqlite_options():
+    return {
+        "init_command": ";".join([
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",         # durable at checkpoints; no fsync per commit in WAL mode
+            "PRAGMA cache_size=-32000",          # 32 MB page cache per connection
+            "PRAGMA mmap_size=268435456",        # 256 MB memory-mapped reads
+            "PRAGMA temp_store=MEMORY",
+        ]),
+        "transaction_mode": "IMMEDIATE",
+        "timeout": _env_int("SQLITE_BUSY_TIMEOUT", 20),  # seconds a writer waits for the lock
+    }
+
+for _db in DATABASES.values():
+    if SQLITE_TUNED and _db["ENGINE"] == "django.db.backends.sqlite3":
+        _db.setdefault("OPTIONS", {}).update(sqlite_options())
+
+    if DB_POOL and _db["ENGINE"] == "django.db.backends.postgresql":
+        _db["CONN_MAX_AGE"] = 0
+        _db["CONN_HEALTH_CHECKS"] = False
+        _db.setdefault("OPTIONS", {})["pool"] = postgres_pool_options()
+
+# Cache: Redis shared by every worker when REDIS_URL is set, per-process LocMem otherwise (see veto/cache.py)
+_redis_url = os.getenv("REDIS_URL", "").strip()
+if _redis_url:
+    CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": _redis_url,
+        "KEY_PREFIX": "veto",
+        "TIMEOUT": 3600,
+        "OPTIONS": {"socket_connect_timeout": 1, "socket_timeout": 1},
+    }}
+else:
+    CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "veto",
+        "TIMEOUT": 3600,
+    }}
+
+# GET /api/series/<id>/?since=<version> answers with a JSON Patch when that version is at most this many
+# versions behind and its snapshot is still cached (veto/delta.py); otherwise with the full body
+SERIES_PATCH_MAX_VERSIONS = _env_int("SERIES_PATCH_MAX_VERSIONS", 20)
+
+# Server-Timing header on /api/ responses (veto/timing.py)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+
+# Per-series command queue for POST /api/series/<id>/command/ (veto/actors.py)
+SERIES_ACTORS = os.getenv("SERIES_ACTORS", "false").lower() == "true"
+SERIES_ACTOR_QUEUE = _env_int("SERIES_ACTOR_QUEUE", 32)  # pending commands per series before 429
+SERIES_ACTOR_THREADS = _env_int("SERIES_ACTOR_THREADS", 4)  # DB threads (and connections) per process
+SERIES_ACTOR_IDLE_SECONDS = _env_float("SERIES_ACTOR_IDLE_SECONDS", 60.0)
+
+# Turn clocks (veto/clocks.py): seconds per ban or pick (0 = off), then "random" legal move or "abort"
+TURN_SECONDS = _env_int("TURN_SECONDS", 0)
+TURN_TIMEOUT_FALLBACK = os.getenv("TURN_TIMEOUT_FALLBACK", "random")
+TURN_CLOCK_UDP = os.getenv("TURN_CLOCK_UDP", "127.0.0.1:8765")  # scheduler wake-ups when not on Postgres
+
+# Background jobs (veto/jobs.py, `manage.py run_jobs`)
+JOB_DIR = os.getenv("JOB_DIR", str(BASE_DIR / "jobs"))  # job output files (exports) and uploads
+JOB_WORKERS = _env_int("JOB_WORKERS", os.cpu_count() or 1)  # worker processes per run_jobs
+JOB_MAX_ATTEMPTS = _env_int("JOB_MAX_ATTEMPTS", 3)
+JOB_RETRY_SECONDS = _env_int("JOB_RETRY_SECONDS", 30)  # first retry delay; doubles per attempt
+JOB_POLL_SECONDS = _env_float("JOB_POLL_SECONDS", 1.0)
+JOB_STALE_SECONDS = _env_int("JOB_STALE_SECONDS", 3600)  # RUNNING without a heartbeat this long: requeued
+JOB_HEARTBEAT_SECONDS = _env_int("JOB_HEARTBEAT_SECONDS", 60)  # heartbeat of a running job, progress or not
+
+# N+1 detector / slow-query log per request (veto/queryaudit.py); on by default in DEBUG
+QUERY_AUDIT = os.getenv("QUERY_AUDIT", str(DEBUG)).lower() == "true"
+QUERY_AUDIT_STRICT = os.getenv("QUERY_AUDIT_STRICT", "false").lower() == "true"  # findings become a 500
+QUERY_AUDIT_REPEAT = _env_int("QUERY_AUDIT_REPEAT", 5)  # flag a SELECT repeated more than this per call site
+QUERY_AUDIT_SLOW_MS = _env_float("QUERY_AUDIT_SLOW_MS", 100.0)
+
+# On-demand request profiling (veto/profiling.py, docs/operations.md). Off unless PROFILE_DIR is set.
+PROFILE_DIR = os.getenv("PROFILE_DIR", "").strip()
+PROFILE_SAMPLE_RATE = _env_float("PROFILE_SAMPLE_RATE", 0.0)  # fraction of requests profiled without a token
+PROFILE_SAMPLE_INTERVAL = _env_float("PROFILE_SAMPLE_INTERVAL", 0.001)  # seconds between stack samples
+PROFILE_TOKEN_MAX_AGE = _env_int("PROFILE_TOKEN_MAX_AGE", 3600)  # seconds a signed header stays valid
+
 # Static (for admin, etc.)
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
@@ -0,0 +1,47 @@
+"""
+API-only settings profile: the JSON API under /api/ and nothing else.
+
+    DJANGO_SETTINGS_MODULE=api.settings_api gunicorn api.wsgi:application ...
+
+Inherits everything from api.settings (database, CORS, DRF, hosts) and strips what only the admin /
+back office needs: jazzmin, dal, import_export, django_extensions, sessions, messages, staticfiles,
+whitenoise and the CSRF/auth middleware. The admin runs as its own process with api.settings; see
+the `admin` entry in the procfile and docs/operations.md.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    # contenttypes + auth stay: veto's migrations and Django's permission checks expect them
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    'corsheaders',
+    'rest_framework',
+    'veto',
+]
+
+MIDDLEWARE = [
+    "veto.profiling.ProfileMiddleware",
+    "veto.timing.ServerTimingMiddleware",
+    "veto.queryaudit.QueryAuditMiddleware",
+    "veto.replicas.ReplicaMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+    "api.middleware.ApiErrorsAsJson",
+    "django.middleware.common.CommonMiddleware",
+]
+
+ROOT_URLCONF = 'api.urls_api'
+
+# No templates are rendered: JSON (and MessagePack) only, even with DEBUG (the browsable API needs the
+# admin's apps)
+TEMPLATES = []
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": [
+        r for r in REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] if r != "rest_framework.renderers.BrowsableAPIRenderer"
+    ],
+    "UNAUTHENTICATED_USER": None,
+}
+
+STATICFILES_STORAGE = "django.contrib.staticfiles.storage.StaticFilesStorage"
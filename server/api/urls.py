@@ -1,10 +1,8 @@
 # server/api/urls.py
 from django.contrib import admin
 from django.urls import path, include
-from django.http import JsonResponse
 
-def healthz(_):
-    return JsonResponse({"ok": True})
+from .urls_api import healthz
 
 
 urlpatterns = [
@@ -0,0 +1,13 @@
+# server/api/urls_api.py
+# URLconf for api.settings_api: the JSON API only (no admin, no autocomplete endpoints)
+from django.urls import path, include
+from django.http import JsonResponse
+
+def healthz(_):
+    return JsonResponse({"ok": True})
+
+
+urlpatterns = [
+    path('api/', include('veto.urls')),   # delegate to the app
+    path('healthz/', healthz),
+]
@@ -1,9 +1,49 @@
 import os
+import warnings
+
 import django
+import pytest
 from django.conf import settings
 
 def pytest_configure(config):
     """Configure Django settings before any tests run."""
     if not settings.configured:
         os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
-        django.setup()
\ No newline at end of file
+        # A second local database standing in for a read replica (veto/replicas.py). It is only read
+        # from by tests that list it in `databases` and set DATABASE_READ_REPLICAS.
+        settings.DATABASES["replica"] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": settings.BASE_DIR / "db-replica.sqlite3",
+        }
+        settings.DATABASE_READ_REPLICAS = []
+        django.setup()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--query-audit", choices=("off", "warn", "strict"), default=os.getenv("QUERY_AUDIT_TESTS", "off"),
+        help="Audit every test-client request for repeated SELECTs and slow queries (veto/queryaudit.py); "
+             "strict fails the test",
+    )
+
+
+@pytest.fixture(autouse=True)
+def _query_audit(request):
+    mode = request.config.getoption("--query-audit")
+    if mode == "off":
+        yield None
+        return
+    from veto.queryaudit import QueryAuditError, QueryAuditWarning, RequestAuditor
+    with RequestAuditor() as auditor:
+        yield auditor
+    if auditor.problems():
+        if mode == "strict":
+            raise QueryAuditError(auditor.report())
+        warnings.warn(auditor.report(), QueryAuditWarning)
+
+
+@pytest.fixture
+def query_audit():
+    """`with query_audit() as audit: ...` audits a block; call audit.assert_clean() to check it."""
+    from veto.queryaudit import QueryAudit
+    return QueryAudit
@@ -0,0 +1,55 @@
+# server/gunicorn.conf.py
+"""
+Production serving profile. Every knob comes from the environment so Railway/Procfile deploys can be
+tuned without a code change; see docs/operations.md.
+
+    gunicorn api.wsgi:application --chdir server --config server/gunicorn.conf.py
+"""
+import multiprocessing
+import os
+
+
+def _int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _bool(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# gthread: a few processes with several threads each. Requests mostly wait on the database, and with
+# DB_POOL=true a worker's threads share one psycopg pool.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = _int("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8))
+threads = _int("GUNICORN_THREADS", 4)
+
+# Import Django once in the master; workers fork with the app already loaded (faster boots, shared pages)
+preload_app = _bool("GUNICORN_PRELOAD", True)
+
+# Recycle workers to bound slow memory growth; jitter keeps them from restarting together
+max_requests = _int("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = _int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+
+timeout = _int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _int("GUNICORN_KEEPALIVE", 5)
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+def post_fork(server, worker):
+    # With preload_app, never share a socket opened in the master: drop any inherited DB connections
+    # (and the pool, if one was created) so each worker opens its own.
+    from django.db import connections
+
+    for conn in connections.all(initialized_only=True):
+        conn.close()
+        if hasattr(conn, "close_pool"):
+            conn.close_pool()
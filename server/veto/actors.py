@@ -0,0 +1,244 @@
+# /veto/actors.py
+"""
+Per-series command queue ("actor") for veto mutations.
+
+With SERIES_ACTORS on, every command sent to `POST /api/series/<id>/command/` goes through the actor of
+its series: an asyncio task that runs that series' commands one at a time, on one event loop per
+process (a daemon thread, so WSGI and ASGI deployments behave the same). The actor keeps a cached
+copy of the series' version, state and turn, and rejects a command before it touches the database
+when:
+
+- the client sent `version` and it is not the current one (double-clicks, retries): 409
+- it is not the sending team's turn, or the wrong kind of move: 400
+
+Because the cache can lag writes made elsewhere (another worker, the admin), a command is only
+rejected after one unlocked read confirms it. Only commands that pass reach TSDMachine and its row
+lock, and commands for one series never queue on that lock inside a process. Database work runs on a
+small thread pool (SERIES_ACTOR_THREADS), which bounds the connections commands hold however large
+the burst. A full queue (SERIES_ACTOR_QUEUE) answers 429.
+
+With SERIES_ACTORS off, the same endpoint runs each command directly, with the same checks.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .machine_tsd import TSDMachine, TSDMachineError, TurnError, team_code
+from .models import Series
+
+log = logging.getLogger(__name__)
+
+
+class StaleCommand(TSDMachineError):
+    def __init__(self, version):
+        super().__init__("Stale version: the series has changed since you loaded it")
+        self.version = version
+
+
+class QueueFull(TSDMachineError):
+    pass
+
+
+# name -> (turn the command must match as (action, kind), or None; how to run it)
+COMMANDS = {
+    "assign_roles": (None, lambda m, team, a: m.assign_roles(str(a["team_a"]).strip(), str(a["team_b"]).strip())),
+    "confirm_tsd": (None, lambda m, team, a: m.confirm_tsd(series_type=str(a["series_type"]).strip())),
+    "ban_objective_combo": (("BAN", "OBJECTIVE_COMBO"),
+                            lambda m, team, a: m.ban_objective_combo(team, int(a["mode_id"]), int(a["map_id"]))),
+    "ban_slayer_map": (("BAN", "SLAYER_MAP"), lambda m, team, a: m.ban_slayer_map(team, int(a["map_id"]))),
+    "pick_objective_combo": (("PICK", "OBJECTIVE_COMBO"),
+                             lambda m, team, a: m.pick_objective_combo(team, int(a["mode_id"]), int(a["map_id"]))),
+    "pick_slayer_map": (("PICK", "SLAYER_MAP"), lambda m, team, a: m.pick_slayer_map(team, int(a["map_id"]))),
+    "undo": (None, lambda m, team, a: m.undo_last()),
+    "reset": (None, lambda m, team, a: m.reset()),
+}
+
+
+@dataclass
+class Command:
+    name: str
+    args: dict = field(default_factory=dict)
+    team: str = ""
+    version: int | None = None
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "Command":
+        """{"command": ..., "team": ..., "version": ..., **args}; raises ValueError when malformed."""
+        if not isinstance(payload, dict) or payload.get("command") not in COMMANDS:
+            raise ValueError(f"command must be one of: {', '.join(COMMANDS)}")
+        version = payload.get("version")
+        if version is not None and (isinstance(version, bool) or not isinstance(version, int)):
+            raise ValueError("version must be an integer")
+        args = {k: v for k, v in payload.items() if k not in ("command", "team", "version")}
+        return cls(payload["command"], args, str(payload.get("team") or ""), version)
+
+
+@dataclass
+class Snapshot:
+    """The part of a series a command is checked against."""
+    id: int
+    version: int
+    state: str
+    turn: dict
+    team_a: str
+    team_b: str
+    turn_deadline: datetime | None = None
+
+    @classmethod
+    def load(cls, series_id) -> "Snapshot":
+        row = Series.objects.values_list(
+            "version", "state", "turn", "team_a", "team_b", "turn_deadline",
+        ).get(pk=series_id)
+        return cls(series_id, *row)
+
+    @classmethod
+    def of(cls, s: Series) -> "Snapshot":
+        return cls(s.pk, s.version, s.state, s.turn or {}, s.team_a, s.team_b, s.turn_deadline)
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id, "version": self.version, "state": self.state, "turn": self.turn,
+            "turn_deadline": self.turn_deadline.isoformat() if self.turn_deadline else None,
+        }
+
+
+def precheck(snapshot: Snapshot, cmd: Command) -> str:
+    """Checks that need no lock; returns the team code the command acts for."""
+    if cmd.version is not None and cmd.version != snapshot.version:
+        raise StaleCommand(snapshot.version)
+    turn, _ = COMMANDS[cmd.name]
+    if turn is None:
+        return ""
+    team = team_code(snapshot, cmd.team)
+    if snapshot.turn.get("team") != team or snapshot.turn.get("action") != turn[0]:
+        raise TurnError("Not your turn")
+    if snapshot.turn.get("kind") != turn[1]:
+        raise TurnError(f"Wrong action kind (expected {snapshot.turn.get('kind')})")
+    return team
+
+
+def _run(machine: TSDMachine, cmd: Command, team: str) -> Snapshot:
+    close_old_connections()
+    try:
+        _, run = COMMANDS[cmd.name]
+        with transaction.atomic():
+            if cmd.version is not None:
+                # Compare-and-set under the row lock: the early checks ran on an unlocked read
+                current = machine._lock().version
+                if current != cmd.version:
+                    raise StaleCommand(current)
+            try:
+                s = run(machine, team, cmd.args)
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Missing or invalid argument for {cmd.name}: {e}") from e
+        return Snapshot.of(s)
+    finally:
+        close_old_connections()
+
+
+def run_direct(series_id: int, cmd: Command) -> Snapshot:
+    """SERIES_ACTORS off: the same checks, then the command, in the calling thread."""
+    team = precheck(Snapshot.load(series_id), cmd)
+    return _run(TSDMachine(series_id), cmd, team)
+
+
+class SeriesActor:
+    def __init__(self, series_id: int, registry: "ActorRegistry"):
+        self.series_id = series_id
+        self.registry = registry
+        self.queue = asyncio.Queue(maxsize=settings.SERIES_ACTOR_QUEUE)
+        self.snapshot = None
+        self.machine = None
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.registry.executor, fn, *args)
+
+    async def run(self):
+        while True:
+            try:
+                cmd, future = await asyncio.wait_for(self.queue.get(), settings.SERIES_ACTOR_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                # Nothing can be enqueued between the timeout and this check: both run on this loop
+                if self.queue.empty():
+                    self.registry.actors.pop(self.series_id, None)
+                    return
+                continue
+            if future.cancelled():
+                continue
+            try:
+                result = await self.handle(cmd)
+            except Exception as e:  # delivered to the waiting request
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+
+    async def handle(self, cmd: Command) -> Snapshot:
+        if self.snapshot is None:
+            self.snapshot = await self.db(Snapshot.load, self.series_id)
+        try:
+            team = precheck(self.snapshot, cmd)
+        except (StaleCommand, TurnError):
+            # Another process may have moved the series on: confirm with one unlocked read
+            self.snapshot = await self.db(Snapshot.load, self.series_id)
+            team = precheck(self.snapshot, cmd)
+        if self.machine is None:
+            self.machine = await self.db(TSDMachine, self.series_id)
+        try:
+            self.snapshot = await self.db(_run, self.machine, cmd, team)
+        except Exception:
+            self.snapshot = None  # reload before the next command
+            raise
+        return self.snapshot
+
+
+class ActorRegistry:
+    """One event loop thread per process hosting the actors, plus the thread pool they share."""
+
+    def __init__(self):
+        self.actors = {}
+        self.loop = None
+        self.executor = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="veto-series-actors", daemon=True).start()
+                self.executor = ThreadPoolExecutor(settings.SERIES_ACTOR_THREADS, thread_name_prefix="veto-actor-db")
+                self.loop = loop
+        return self.loop
+
+    async def _enqueue(self, series_id: int, cmd: Command):
+        actor = self.actors.get(series_id)
+        if actor is None:
+            actor = self.actors[series_id] = SeriesActor(series_id, self)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            actor.queue.put_nowait((cmd, future))
+        except asyncio.QueueFull:
+            raise QueueFull("Too many pending commands for this series") from None
+        return await future
+
+    async def submit(self, series_id: int, cmd: Command) -> Snapshot:
+        loop = self._start()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._enqueue(series_id, cmd), loop))
+
+
+registry = ActorRegistry()
+
+
+async def execute(series_id: int, cmd: Command) -> Snapshot:
+    if settings.SERIES_ACTORS:
+        return await registry.submit(series_id, cmd)
+    return await sync_to_async(run_direct, thread_sensitive=False)(series_id, cmd)
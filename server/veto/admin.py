@@ -1,8 +1,88 @@
 from django.contrib import admin
 from django import forms
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, F, QuerySet
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
 from dal import autocomplete
 from import_export.admin import ImportExportModelAdmin
-from .models import Map, GameMode, Series, Action, SeriesRound, SeriesBan
+from .models import Map, GameMode, Series, Action, SeriesRound, SeriesBan, SeriesArchive, MapPool, Job
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large tables: unfiltered changelists on Postgres use the planner's row estimate
+    (pg_class.reltuples) instead of an exact COUNT(*). Small tables and filtered lists stay exact.
+    """
+    exact_below = 100_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if isinstance(qs, QuerySet) and not qs.query.where and connections[qs.db].vendor == "postgresql":
+            with connections[qs.db].cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [qs.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.exact_below:
+                return row[0]
+        return super().count
+
+
+class LargeTableAdmin(ImportExportModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # skip the second, unfiltered COUNT(*) on filtered pages
+    list_per_page = 50
+
+
+class CappedInlineFormSet(BaseInlineFormSet):
+    """Only renders the first `max_rows` related rows; the full list lives in the model's own changelist."""
+    max_rows = 50
+
+    def get_queryset(self):
+        # Cache the sliced queryset: the formset calls this once per form
+        if not hasattr(self, "_capped_queryset"):
+            self._capped_queryset = super().get_queryset()[:self.max_rows]
+        return self._capped_queryset
+
+
+class TouchesSeriesAdmin:
+    """Admin changes to a series or its timeline (adds included) bump Series.version, which keys cached snapshots."""
+
+    @staticmethod
+    def _series_id(obj):
+        return obj.pk if isinstance(obj, Series) else obj.series_id
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not isinstance(obj, Action):  # Action.save bumps the version itself
+            Series.touch(self._series_id(obj))
+
+    def delete_model(self, request, obj):
+        series_id = self._series_id(obj)
+        super().delete_model(request, obj)
+        Series.touch(series_id)
+
+    def delete_queryset(self, request, queryset):
+        ids = list(queryset.values_list("pk" if queryset.model is Series else "series_id", flat=True))
+        super().delete_queryset(request, queryset)
+        Series.objects.filter(pk__in=ids).update(version=F("version") + 1)
+
+
+class ReadOnlyInline(admin.TabularInline):
+    extra = 0
+    max_num = 0
+    can_delete = False
+    show_change_link = True
+
+    def get_readonly_fields(self, request, obj=None):
+        return self.fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 # Use django-autocomplete-light for Map.modes
@@ -26,9 +106,12 @@ class MapAdmin(ImportExportModelAdmin):
     ordering = ("name",)
     list_per_page = 50
 
-    @admin.display(description="Modes")
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(modes_total=Count("modes"))
+
+    @admin.display(description="Modes", ordering="modes_total")
     def modes_count(self, obj):
-        return obj.modes.count()
+        return obj.modes_total
 
 @admin.register(GameMode)
 class GameModeAdmin(ImportExportModelAdmin):
@@ -38,26 +121,34 @@ class GameModeAdmin(ImportExportModelAdmin):
     ordering = ("name",)
     list_per_page = 50
 
-class ActionInline(admin.TabularInline):
+# Inlines are read-only (edit rows from their own admin pages) and select their FKs up front,
+# so a series page renders in a fixed number of queries.
+class ActionInline(ReadOnlyInline):
     model = Action
-    extra = 0
+    formset = CappedInlineFormSet
+    fields = ('step', 'action_type', 'team', 'map', 'mode', 'created_at')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('map', 'mode')
 
-class SeriesRoundInline(admin.TabularInline):
+class SeriesRoundInline(ReadOnlyInline):
     model = SeriesRound
-    extra = 0
     fields = ('order', 'slot_type', 'mode', 'pick_by', 'pick_map', 'locked')
-    raw_id_fields = ('mode', 'pick_map')
 
-class SeriesBanInline(admin.TabularInline):
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('mode', 'pick_map')
+
+class SeriesBanInline(ReadOnlyInline):
     model = SeriesBan
-    extra = 0
     fields = ('step_index', 'by_team', 'kind', 'objective_mode', 'map')
-    raw_id_fields = ('objective_mode', 'map')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('objective_mode', 'map')
 
 @admin.register(Series)
-class SeriesAdmin(ImportExportModelAdmin):
+class SeriesAdmin(TouchesSeriesAdmin, LargeTableAdmin):
     list_display = ("id", "team_a", "team_b", "state", "series_type", "round_index", "ban_index", "created_at")
-    list_filter = ("state", "series_type")
+    list_filter = ("state", "series_type", "needs_review")
     search_fields = ("team_a", "team_b")
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
@@ -66,8 +157,9 @@ class SeriesAdmin(ImportExportModelAdmin):
     readonly_fields = ("created_at",)  # avoid accidental edits in admin
 
 @admin.register(SeriesRound)
-class SeriesRoundAdmin(ImportExportModelAdmin):
+class SeriesRoundAdmin(TouchesSeriesAdmin, LargeTableAdmin):
     list_display = ("id", "series", "order", "slot_type", "mode", "pick_by", "pick_map", "locked")
+    list_select_related = ("series", "mode", "pick_map")
     list_filter = ("slot_type", "locked", "mode")
     search_fields = ("series__team_a", "series__team_b", "pick_map__name", "mode__name")
     raw_id_fields = ("series", "mode", "pick_map")
@@ -75,20 +167,65 @@ class SeriesRoundAdmin(ImportExportModelAdmin):
     list_per_page = 50
 
 @admin.register(SeriesBan)
-class SeriesBanAdmin(ImportExportModelAdmin):
+class SeriesBanAdmin(TouchesSeriesAdmin, LargeTableAdmin):
     list_display = ("id", "series", "step_index", "by_team", "kind", "objective_mode", "map", "created_at")
-    list_filter = ("kind", "by_team", "objective_mode", "map")
+    list_select_related = ("series", "objective_mode", "map")
+    # map/mode choices come from the small catalog tables; created_at uses fixed date ranges
+    # instead of date_hierarchy, which scans the whole table for distinct dates
+    list_filter = ("kind", "by_team", "objective_mode", "map", "created_at")
     search_fields = ("series__team_a", "series__team_b", "map__name", "objective_mode__name")
     raw_id_fields = ("series", "objective_mode", "map")
     ordering = ("series", "step_index")
-    date_hierarchy = "created_at"
-    list_per_page = 50
 
 @admin.register(Action)
-class ActionAdmin(ImportExportModelAdmin):
+class ActionAdmin(TouchesSeriesAdmin, LargeTableAdmin):
     list_display = ("id", "series", "step", "action_type", "team", "map", "mode", "created_at")
-    list_filter = ("action_type", "team", "map", "mode")
+    list_select_related = ("series", "map", "mode")
+    list_filter = ("action_type", "team", "map", "mode", "created_at")
     search_fields = ("series__team_a", "series__team_b", "map__name", "mode__name")
     raw_id_fields = ("series", "map", "mode")
+    readonly_fields = ("step",)  # allocated per series by Action.save()
+
+@admin.register(SeriesArchive)
+class SeriesArchiveAdmin(admin.ModelAdmin):
+    list_display = ("series_id", "team_a", "team_b", "state", "series_type", "created_at", "archived_at")
+    list_filter = ("state", "series_type")
+    search_fields = ("team_a", "team_b")
     date_hierarchy = "created_at"
-    list_per_page = 50
\ No newline at end of file
+    list_per_page = 50
+
+    # Archive rows are write-once
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MapPool)
+class MapPoolAdmin(admin.ModelAdmin):
+    list_display = ("id", "label", "created_at")
+    search_fields = ("label",)
+    readonly_fields = ("label", "document", "created_at")
+
+    # Published pools are immutable; publish with `manage.py sync_catalog --publish`
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "attempts", "done", "total", "message", "created_at", "finished_at")
+    list_filter = ("status", "kind")
+    readonly_fields = [f.name for f in Job._meta.fields]
+    list_per_page = 50
+
+    # Jobs are queued by the API and commands (veto.jobs.enqueue) and updated only by workers
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class VetoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'veto'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,54 @@
+# /veto/archive.py
+"""
+Retention pipeline: move finished series older than a cutoff into SeriesArchive.
+
+Each batch locks only the rows it archives (SKIP LOCKED where supported), writes the documents with
+bulk_create and deletes the originals (bans, rounds and actions cascade) in one short transaction.
+The MapStat rollup is left untouched, so stats keep covering archived series.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import stats
+from .documents import document_prefetches, series_document
+from .models import Series, SeriesArchive, SeriesState
+
+FINISHED_STATES = (SeriesState.SERIES_COMPLETE, SeriesState.ABORTED)
+
+
+def archive_batch(cutoff, batch_size: int = 500) -> int:
+    with transaction.atomic():
+        ids = list(
+            Series.objects.select_for_update(skip_locked=True)
+            .filter(state__in=FINISHED_STATES, created_at__lt=cutoff)
+            .order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        slayer_id = stats.slayer_mode_id()
+        rows = [
+            SeriesArchive(
+                series_id=s.id, team_a=s.team_a, team_b=s.team_b, state=s.state,
+                series_type=s.series_type, created_at=s.created_at,
+                document=series_document(s, slayer_id),
+            )
+            for s in Series.objects.filter(pk__in=ids).prefetch_related(*document_prefetches())
+        ]
+        SeriesArchive.objects.bulk_create(rows)
+        Series.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_finished(older_than_days: int, batch_size: int = 500, max_batches=None) -> int:
+    """Archive in batches until nothing older than the cutoff is left. Returns series archived."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        n = archive_batch(cutoff, batch_size)
+        total += n
+        batches += 1
+        if n < batch_size:
+            break
+    return total
@@ -0,0 +1,170 @@
+# /veto/cache.py
+"""
+Shared cache tier for read-mostly payloads. It uses the `default` cache: Redis when REDIS_URL is set,
+per-process LocMem otherwise.
+
+Keys embed a version from the database, so a cached entry is never invalidated in place: a new
+version simply uses a new key and old entries age out.
+
+- series snapshots: `series:<id>:v<Series.version>` holds the series detail payload. TSDMachine
+  writes the new snapshot through after each committed command.
+  Older versions stay cached until they age out: `?since=` patches are computed against them
+  (veto/delta.py).
+- catalog payloads: `catalog:v<CatalogVersion id>:<name>:<variant>`. Any catalog change records a new
+  CatalogVersion (sync_catalog, or the signals in veto.signals for admin/API edits).
+
+Cache errors never fail a request; the payload is built from the database instead. Hit, miss and
+error counts are kept per process and flushed into the shared cache every FLUSH_EVERY events, so
+`stats()` (shown on /api/health/) reports the totals across workers.
+"""
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import CatalogVersion
+from .serializers import SeriesSerializer, series_detail_queryset
+
+log = logging.getLogger(__name__)
+
+ALIAS = "default"
+TTL = 60 * 60
+NAMESPACES = ("series", "catalog", "patch")  # patch: ?since= answered with a patch / full body
+OUTCOMES = ("hit", "miss", "error")
+FLUSH_EVERY = 100
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+
+
+def _cache():
+    return caches[ALIAS]
+
+
+def count(ns, outcome):
+    """Record a hit, miss or error for `ns` (one of NAMESPACES)."""
+    with _pending_lock:
+        _pending[f"{ns}:{outcome}"] += 1
+        if sum(_pending.values()) < FLUSH_EVERY:
+            return
+        batch = dict(_pending)
+        _pending.clear()
+    _flush(batch)
+
+
+def _flush(batch):
+    c = _cache()
+    for name, n in batch.items():
+        key = f"stats:{name}"
+        try:
+            if not c.add(key, n, timeout=None):
+                c.incr(key, n)
+        except Exception:
+            log.warning("cache stats flush failed for %s", key, exc_info=True)
+
+
+def stats() -> dict:
+    """Hit/miss/error totals per namespace (all workers sharing the cache)."""
+    with _pending_lock:
+        batch = dict(_pending)
+        _pending.clear()
+    _flush(batch)
+    keys = [f"stats:{ns}:{o}" for ns in NAMESPACES for o in OUTCOMES]
+    try:
+        values = _cache().get_many(keys)
+    except Exception:
+        values = {}
+    out = {"backend": settings.CACHES[ALIAS]["BACKEND"].rsplit(".", 1)[-1]}
+    for ns in NAMESPACES:
+        hits, misses, errors = (int(values.get(f"stats:{ns}:{o}", 0)) for o in OUTCOMES)
+        out[ns] = {
+            "hits": hits, "misses": misses, "errors": errors,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return out
+
+
+def reset_stats():
+    with _pending_lock:
+        _pending.clear()
+    try:
+        _cache().delete_many([f"stats:{ns}:{o}" for ns in NAMESPACES for o in OUTCOMES])
+    except Exception:
+        pass
+
+
+def _store(ns, key, value):
+    try:
+        _cache().set(key, value, TTL)
+    except Exception:
+        count(ns, "error")
+        log.warning("cache set failed for %s", key, exc_info=True)
+
+
+def get_or_build(ns, key, build, key_of=None):
+    """Cached value for `key`; on a miss build it and store it under key_of(value) (default: `key`)."""
+    try:
+        value = _cache().get(key)
+    except Exception:
+        count(ns, "error")
+        log.warning("cache get failed for %s", key, exc_info=True)
+        return build()
+    if value is not None:
+        count(ns, "hit")
+        return value
+    count(ns, "miss")
+    value = build()
+    _store(ns, key_of(value) if key_of else key, value)
+    return value
+
+
+# ---- series snapshots ----
+
+def series_key(series_id, version) -> str:
+    return f"series:{series_id}:v{version}"
+
+
+def build_series_snapshot(series_id) -> dict:
+    return dict(SeriesSerializer(series_detail_queryset().get(pk=series_id)).data)
+
+
+def _snapshot_key(snapshot) -> str:
+    # The build may see a newer commit than the version asked for: file it under what it contains
+    return series_key(snapshot["id"], snapshot["version"])
+
+
+def series_snapshot(series_id, version) -> dict:
+    return get_or_build(
+        "series", series_key(series_id, version), lambda: build_series_snapshot(series_id), _snapshot_key,
+    )
+
+
+def peek_series_snapshot(series_id, version):
+    """The cached snapshot of an older version, or None; never built (the database only has the latest)."""
+    try:
+        return _cache().get(series_key(series_id, version))
+    except Exception:
+        log.warning("cache get failed for series %s v%s", series_id, version, exc_info=True)
+        return None
+
+
+def write_through_series(series_id):
+    """After the current transaction commits, store a snapshot of the series as committed."""
+    def write():
+        try:
+            snapshot = build_series_snapshot(series_id)
+        except Exception:
+            log.warning("snapshot build failed for series %s", series_id, exc_info=True)
+            return
+        _store("series", _snapshot_key(snapshot), snapshot)
+
+    transaction.on_commit(write)
+
+
+# ---- catalog payloads ----
+
+def catalog_payload(name, variant, build):
+    return get_or_build("catalog", f"catalog:v{CatalogVersion.current()}:{name}:{variant}", build)
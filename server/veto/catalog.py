@@ -0,0 +1,181 @@
+# /veto/catalog.py
+"""
+Declarative catalog sync: make Map / GameMode / Map.modes match a versioned data file.
+
+The current state is read in three queries, the diff is computed in memory, and only the changes are
+applied with bulk operations in one transaction, recording a single CatalogVersion row.
+
+Data file (JSON, or YAML when PyYAML is installed):
+
+    {"version": "hcs-2025.1",
+     "modes": {"Slayer": {"objective": false, "maps": ["Aquarius", "Streets"]}, ...}}
+"""
+import json
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import ProtectedError, Q
+
+from . import pools
+from .models import CatalogVersion, GameMode, Map
+
+DEFAULT_CATALOG = Path(__file__).resolve().parent / "data" / "hcs_2025.json"
+
+# True while a plan is applied; mutes the per-row CatalogVersion receivers in veto.signals
+syncing = ContextVar("veto_catalog_syncing", default=False)
+
+
+class CatalogError(Exception): ...
+
+
+@dataclass
+class CatalogPlan:
+    label: str = ""
+    create_modes: list = field(default_factory=list)   # [(name, is_objective)]
+    update_modes: list = field(default_factory=list)   # [(name, is_objective)]
+    delete_modes: list = field(default_factory=list)   # [name]
+    create_maps: list = field(default_factory=list)    # [name]
+    delete_maps: list = field(default_factory=list)    # [name]
+    add_links: list = field(default_factory=list)      # [(map name, mode name)]
+    remove_links: list = field(default_factory=list)   # [(map name, mode name)]
+
+    def is_empty(self) -> bool:
+        return not any((self.create_modes, self.update_modes, self.delete_modes, self.create_maps,
+                        self.delete_maps, self.add_links, self.remove_links))
+
+    def summary(self) -> dict:
+        return {
+            "modes": {"create": len(self.create_modes), "update": len(self.update_modes),
+                      "delete": len(self.delete_modes)},
+            "maps": {"create": len(self.create_maps), "delete": len(self.delete_maps)},
+            "combos": {"add": len(self.add_links), "remove": len(self.remove_links)},
+        }
+
+    def lines(self):
+        for name, obj in self.create_modes:
+            yield f"+ mode {name} ({'objective' if obj else 'slayer'})"
+        for name, obj in self.update_modes:
+            yield f"~ mode {name} is_objective={obj}"
+        for name in self.delete_modes:
+            yield f"- mode {name}"
+        for name in self.create_maps:
+            yield f"+ map {name}"
+        for name in self.delete_maps:
+            yield f"- map {name}"
+        for map_name, mode_name in self.add_links:
+            yield f"+ combo {mode_name} on {map_name}"
+        for map_name, mode_name in self.remove_links:
+            yield f"- combo {mode_name} on {map_name}"
+
+
+def load_file(path) -> dict:
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise CatalogError("PyYAML is required to read YAML catalog files")
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def parse(data: dict):
+    """Returns (label, {mode name: is_objective}, {(map name, mode name)})."""
+    if not isinstance(data, dict) or not isinstance(data.get("modes"), dict):
+        raise CatalogError("Catalog file must have a 'modes' mapping")
+    modes, links = {}, set()
+    for mode_name, spec in data["modes"].items():
+        spec = spec or {}
+        modes[mode_name] = bool(spec.get("objective", mode_name != "Slayer"))
+        for map_name in spec.get("maps", []):
+            links.add((map_name, mode_name))
+    return str(data.get("version", "")), modes, links
+
+
+def plan(data: dict, prune: bool = True) -> CatalogPlan:
+    label, want_modes, want_links = parse(data)
+    want_maps = {m for m, _ in want_links}
+
+    have_modes = dict(GameMode.objects.values_list("name", "is_objective"))
+    have_maps = set(Map.objects.values_list("name", flat=True))
+    have_links = set(Map.modes.through.objects.values_list("map__name", "gamemode__name"))
+
+    p = CatalogPlan(label=label)
+    p.create_modes = sorted((n, o) for n, o in want_modes.items() if n not in have_modes)
+    p.update_modes = sorted((n, o) for n, o in want_modes.items() if n in have_modes and have_modes[n] != o)
+    p.create_maps = sorted(want_maps - have_maps)
+    p.add_links = sorted(want_links - have_links)
+    if prune:
+        p.delete_modes = sorted(set(have_modes) - set(want_modes))
+        p.delete_maps = sorted(have_maps - want_maps)
+        p.remove_links = sorted(
+            (m, md) for m, md in have_links - want_links
+            if m not in p.delete_maps and md not in p.delete_modes  # cascades with the row
+        )
+    return p
+
+
+def apply(p: CatalogPlan):
+    """Apply a plan in one transaction; returns the new CatalogVersion, or None when there was nothing to do."""
+    if p.is_empty():
+        return None
+    token = syncing.set(True)
+    try:
+        with transaction.atomic():
+            return _apply(p)
+    finally:
+        syncing.reset(token)
+
+
+def _apply(p: CatalogPlan):
+    Through = Map.modes.through
+
+    GameMode.objects.bulk_create([GameMode(name=n, is_objective=o) for n, o in p.create_modes])
+    if p.update_modes:
+        ids = dict(GameMode.objects.filter(name__in=[n for n, _ in p.update_modes]).values_list("name", "pk"))
+        GameMode.objects.bulk_update(
+            [GameMode(pk=ids[n], name=n, is_objective=o) for n, o in p.update_modes], ["is_objective"]
+        )
+    Map.objects.bulk_create([Map(name=n) for n in p.create_maps])
+
+    if p.add_links or p.remove_links:
+        names = {m for m, _ in p.add_links + p.remove_links}
+        map_ids = dict(Map.objects.filter(name__in=names).values_list("name", "pk"))
+        mode_ids = dict(GameMode.objects.values_list("name", "pk"))
+        if p.remove_links:
+            match = Q()
+            for m, md in p.remove_links:
+                match |= Q(map_id=map_ids[m], gamemode_id=mode_ids[md])
+            Through.objects.filter(match).delete()
+        Through.objects.bulk_create([Through(map_id=map_ids[m], gamemode_id=mode_ids[md]) for m, md in p.add_links])
+
+    if p.delete_maps or p.delete_modes:
+        pinned_maps, pinned_modes = pools.pinned_ids()
+        pinned = sorted(
+            set(Map.objects.filter(name__in=p.delete_maps, pk__in=pinned_maps).values_list("name", flat=True))
+            | set(GameMode.objects.filter(name__in=p.delete_modes, pk__in=pinned_modes).values_list("name", flat=True))
+        )
+        if pinned:
+            raise CatalogError(f"Cannot remove maps/modes used by the map pool of a series in progress: {pinned[:5]}")
+
+    try:
+        if p.delete_maps:
+            Map.objects.filter(name__in=p.delete_maps).delete()
+        if p.delete_modes:
+            GameMode.objects.filter(name__in=p.delete_modes).delete()
+    except ProtectedError as e:
+        used = sorted({str(obj) for obj in e.protected_objects})[:5]
+        raise CatalogError(f"Cannot remove maps/modes still referenced by series history or map stats: {used}")
+
+    return CatalogVersion.objects.create(label=p.label, summary=p.summary())
+
+
+def sync(data: dict, dry_run: bool = False, prune: bool = True):
+    """Plan and (unless dry_run) apply; returns (plan, CatalogVersion or None)."""
+    p = plan(data, prune=prune)
+    if dry_run:
+        return p, None
+    return p, apply(p)
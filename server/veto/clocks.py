@@ -0,0 +1,165 @@
+# /veto/clocks.py
+"""
+Turn clocks: TURN_SECONDS per ban or pick, then TURN_TIMEOUT_FALLBACK.
+
+Every TSDMachine command that hands the turn over sets Series.turn_deadline and, with the commit,
+announces (series id, version, deadline) to the scheduler:
+
+- Postgres: NOTIFY on the `veto_turn_clock` channel, sent inside the command's transaction, so only
+  committed turns are announced
+- other databases (single-box SQLite): one UDP datagram to TURN_CLOCK_UDP after the commit
+
+The scheduler (`manage.py run_turn_clock`, one process) loads the live deadlines once at start-up,
+then keeps them in a heap: O(log n) per announcement and per expiry, and it sleeps until the earliest
+deadline or the next announcement. It never polls the series table. A superseded entry (the turn was
+played, undone or cleared) stays in the heap until it surfaces and is then dropped, because its
+version is no longer the series' latest. On expiry, TSDMachine.expire_turn re-checks version and
+deadline under the row lock and plays the fallback through the normal command path.
+"""
+import heapq
+import json
+import logging
+import select
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "veto_turn_clock"
+FALLBACKS = ("random", "abort")
+
+
+def deadline_for(s):
+    """Deadline for the turn now set on `s` (None when nobody is on turn or clocks are off)."""
+    if not s.turn or settings.TURN_SECONDS <= 0:
+        return None
+    return timezone.now() + timedelta(seconds=settings.TURN_SECONDS)
+
+
+def _payload(series_id, version, deadline) -> str:
+    return json.dumps({"id": series_id, "version": version, "deadline": deadline.timestamp() if deadline else None})
+
+
+def _udp_address():
+    host, _, port = settings.TURN_CLOCK_UDP.rpartition(":")
+    return host, int(port)
+
+
+def announce(series_id, version, deadline):
+    """Tell the scheduler about a series' new deadline (None clears it). Call inside the transaction."""
+    payload = _payload(series_id, version, deadline)
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+        return
+
+    def send():
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.sendto(payload.encode(), _udp_address())
+        except OSError:
+            log.warning("turn clock announcement for series %s failed", series_id, exc_info=True)
+
+    transaction.on_commit(send)
+
+
+class PostgresListener:
+    # LISTEN on a psycopg connection of its own, which Django never closes or recycles: the
+    # scheduler calls close_old_connections() before each expiry, and the subscription would go
+    # with the default connection
+    def __init__(self):
+        self.conn = connection.Database.connect(**connection.get_connection_params(), autocommit=True)
+        self.conn.execute(f"LISTEN {CHANNEL}")
+
+    def wait(self, timeout):
+        return [n.payload for n in self.conn.notifies(timeout=timeout, stop_after=1)]
+
+    def close(self):
+        self.conn.close()
+
+
+class UDPListener:
+    def __init__(self, address=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(address or _udp_address())
+        self.sock.setblocking(False)
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def wait(self, timeout):
+        payloads = []
+        if select.select([self.sock], [], [], timeout)[0]:
+            while True:
+                try:
+                    payloads.append(self.sock.recv(512).decode())
+                except BlockingIOError:
+                    break
+        return payloads
+
+    def close(self):
+        self.sock.close()
+
+
+def listener():
+    return PostgresListener() if connection.vendor == "postgresql" else UDPListener()
+
+
+class TurnClock:
+    """The deadline heap. `expire(series_id, version)` is called for each turn that runs out."""
+
+    def __init__(self, expire, clock=time.time):
+        self.expire = expire
+        self.clock = clock
+        self.heap = []  # (deadline, series id, version)
+        self.latest = {}  # series id -> latest announced version
+
+    def __len__(self):
+        return len(self.latest)
+
+    def schedule(self, series_id, version, deadline):
+        """deadline: UNIX time, or None to clear the series' clock."""
+        if version < self.latest.get(series_id, -1):
+            return  # announcements can arrive out of order
+        if deadline is None:
+            self.latest.pop(series_id, None)
+            return
+        self.latest[series_id] = version
+        heapq.heappush(self.heap, (deadline, series_id, version))
+
+    def receive(self, payload):
+        try:
+            msg = json.loads(payload)
+            self.schedule(int(msg["id"]), int(msg["version"]), msg["deadline"])
+        except (ValueError, KeyError, TypeError):
+            log.warning("ignoring malformed turn clock announcement %r", payload)
+
+    def next_timeout(self, idle=60.0):
+        """Seconds until the earliest deadline (at most `idle`)."""
+        if not self.heap:
+            return idle
+        return min(idle, max(0.0, self.heap[0][0] - self.clock()))
+
+    def fire_due(self) -> int:
+        """Expire every turn whose deadline has passed; returns how many were expired."""
+        fired = 0
+        while self.heap and self.heap[0][0] <= self.clock():
+            _, series_id, version = heapq.heappop(self.heap)
+            if self.latest.get(series_id) != version:
+                continue  # superseded
+            del self.latest[series_id]
+            fired += 1
+            try:
+                s = self.expire(series_id, version)
+            except Exception:
+                log.exception("turn expiry failed for series %s", series_id)
+                continue
+            if s is not None:
+                self.schedule(s.pk, s.version, s.turn_deadline.timestamp() if s.turn_deadline else None)
+        return fired
@@ -0,0 +1,118 @@
+# /veto/delta.py
+"""
+Series detail as an RFC 6902 JSON Patch against a version the client already has.
+
+    GET /api/series/<id>/?since=<version>
+
+The base is the snapshot the cache already keeps for that version (`series:<id>:v<version>`, written
+through after every commit). The response is a patch (Content-Type application/json-patch+json) when
+the base is still cached, at most SERIES_PATCH_MAX_VERSIONS behind, and the patch is smaller than the
+full body; otherwise it is the full body as usual. A patch always replaces /version (unless ?fields=
+leaves it out), so a client can check it applied the patch to the right base.
+
+diff() compares objects key by key and lists by common prefix and suffix. An appended action or a
+changed turn is therefore one or two operations; a list that changed throughout becomes per-index
+replaces.
+"""
+import json
+
+from django.conf import settings
+
+from . import cache
+
+CONTENT_TYPE = "application/json-patch+json"
+
+
+def _pointer(path, key):
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def diff(old, new, path="") -> list:
+    """RFC 6902 operations turning `old` into `new`."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{"op": "remove", "path": _pointer(path, k)} for k in old if k not in new]
+        for k, v in new.items():
+            if k not in old:
+                ops.append({"op": "add", "path": _pointer(path, k), "value": v})
+            else:
+                ops += diff(old[k], v, _pointer(path, k))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        return _diff_list(old, new, path)
+    if old == new and type(old) is type(new):  # 1 == True, but not in JSON
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _diff_list(old, new, path):
+    start = 0
+    while start < min(len(old), len(new)) and old[start] == new[start]:
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+    ops = []
+    common = min(end_old, end_new) - start
+    for i in range(start, start + common):
+        ops += diff(old[i], new[i], _pointer(path, i))
+    # Removals from the highest index down, so earlier indexes stay valid
+    for i in reversed(range(start + common, end_old)):
+        ops.append({"op": "remove", "path": _pointer(path, i)})
+    for i in range(start + common, end_new):
+        ops.append({"op": "add", "path": _pointer(path, i), "value": new[i]})
+    return ops
+
+
+def apply(doc, ops):
+    """Apply add/remove/replace operations (the ones diff() emits) to a copy of `doc`."""
+    doc = json.loads(json.dumps(doc))
+    for op in ops:
+        if op["path"] == "":
+            doc = op["value"]
+            continue
+        *parents, last = [p.replace("~1", "/").replace("~0", "~") for p in op["path"].split("/")[1:]]
+        target = doc
+        for p in parents:
+            target = target[int(p)] if isinstance(target, list) else target[p]
+        if isinstance(target, list):
+            index = len(target) if last == "-" else int(last)
+            if op["op"] == "add":
+                target.insert(index, op["value"])
+            elif op["op"] == "remove":
+                del target[index]
+            else:
+                target[index] = op["value"]
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+    return doc
+
+
+def only(doc, fields):
+    """`doc` cut down to `fields` (a ?fields= set); unchanged when None."""
+    return doc if fields is None else {k: v for k, v in doc.items() if k in fields}
+
+
+def series_patch(series_id, since, snapshot, fields=None):
+    """
+    Patch from version `since` to `snapshot`, or None when the full body should be sent.
+    With `fields` (?fields=), both versions are cut down to them first.
+    """
+    version = snapshot["version"]
+    if since == version:
+        return []
+    base = None
+    if 0 <= version - since <= settings.SERIES_PATCH_MAX_VERSIONS:
+        base = cache.peek_series_snapshot(series_id, since)
+    if base is None:
+        cache.count("patch", "miss")
+        return None
+    snapshot = only(snapshot, fields)
+    ops = diff(only(base, fields), snapshot)
+    if len(json.dumps(ops, separators=(",", ":"))) >= len(json.dumps(snapshot, separators=(",", ":"))):
+        cache.count("patch", "miss")
+        return None
+    cache.count("patch", "hit")
+    return ops
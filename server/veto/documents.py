@@ -0,0 +1,135 @@
+# /veto/documents.py
+"""
+Self-contained JSON documents for a series (teams, bans, picks, legacy actions).
+
+Used as the archive payload and as the export/import line format. Maps and modes carry both ids
+and names so a document stays readable after the catalog changes.
+"""
+from django.db.models import Prefetch
+
+from .models import Action, BanKind, SeriesBan, SeriesRound, SlotType
+
+
+def document_prefetches():
+    """Prefetches that let series_document() run without per-row queries."""
+    return [
+        Prefetch("bans", queryset=SeriesBan.objects.select_related("map", "objective_mode")),
+        Prefetch("rounds", queryset=SeriesRound.objects.select_related("pick_map", "mode")),
+        Prefetch("actions", queryset=Action.objects.order_by("step", "id")),
+    ]
+
+
+def series_document(series, slayer_mode_id=None) -> dict:
+    bans = []
+    for ban in series.bans.all():
+        if ban.kind == BanKind.SLAYER_MAP:
+            mode_id, mode_name = slayer_mode_id, "Slayer"
+        else:
+            mode_id = ban.objective_mode_id
+            mode_name = ban.objective_mode.name if ban.objective_mode_id else None
+        bans.append({
+            "step": ban.step_index,
+            "team": ban.by_team,
+            "kind": ban.kind,
+            "map_id": ban.map_id,
+            "map": ban.map.name,
+            "mode_id": mode_id,
+            "mode": mode_name,
+        })
+
+    picks = []
+    for rnd in series.rounds.all():
+        if not rnd.pick_map_id:
+            continue
+        picks.append({
+            "game": rnd.order + 1,
+            "slot_type": rnd.slot_type,
+            "team": rnd.pick_by,
+            "map_id": rnd.pick_map_id,
+            "map": rnd.pick_map.name,
+            "mode_id": rnd.mode_id,
+            "mode": rnd.mode.name if rnd.mode_id else None,
+        })
+
+    actions = [
+        {
+            "step": a.step,
+            "action_type": a.action_type,
+            "team": a.team,
+            "map_id": a.map_id,
+            "mode_id": a.mode_id,
+        }
+        for a in series.actions.all()
+    ]
+
+    return {
+        "id": series.id,
+        "team_a": series.team_a,
+        "team_b": series.team_b,
+        "state": series.state,
+        "ruleset": series.ruleset,
+        "series_type": series.series_type,
+        "map_pool": series.map_pool_id,
+        "created_at": series.created_at.isoformat(),
+        "bans": bans,
+        "picks": picks,
+        "actions": actions,
+    }
+
+
+def document_timeline(doc: dict) -> list:
+    """The `actions` timeline of SeriesSerializer, rebuilt from a document."""
+    timeline = []
+    for ban in doc.get("bans", []):
+        timeline.append({
+            "id": f"ban_{doc['id']}_{ban['step']}",
+            "action_type": "BAN",
+            "team": ban["team"],
+            "map": ban["map_id"],
+            "mode": ban["mode_id"],
+            "step": ban["step"],
+            "kind": ban["kind"],
+            "map_name": ban["map"],
+            "mode_name": ban["mode"],
+        })
+    for pick in doc.get("picks", []):
+        slot = pick["slot_type"]
+        timeline.append({
+            "id": f"round_{doc['id']}_{pick['game']}",
+            "action_type": "PICK",
+            "team": pick["team"],
+            "map": pick["map_id"],
+            "mode": pick["mode_id"],
+            "step": pick["game"] - 1,
+            "kind": BanKind.SLAYER_MAP if slot == SlotType.SLAYER else BanKind.OBJECTIVE_COMBO,
+            "slot_type": slot,
+            "map_name": pick["map"],
+            "mode_name": pick["mode"],
+        })
+    for action in doc.get("actions", []):
+        timeline.append({
+            "id": f"action_{doc['id']}_{action['step']}",
+            "action_type": action["action_type"].upper(),
+            "team": action["team"],
+            "map": action["map_id"],
+            "mode": action["mode_id"],
+            "step": action["step"],
+            "kind": None,
+        })
+    return sorted(timeline, key=lambda x: x.get("step", 0))
+
+
+def archived_representation(doc: dict) -> dict:
+    """Series detail payload for an archived series (same keys as SeriesSerializer)."""
+    return {
+        "id": doc["id"],
+        "version": None,
+        "team_a": doc["team_a"],
+        "team_b": doc["team_b"],
+        "created_at": doc["created_at"],
+        "state": doc["state"],
+        "turn": {},
+        "map_pool": doc.get("map_pool"),
+        "actions": document_timeline(doc),
+        "archived": True,
+    }
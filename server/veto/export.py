@@ -0,0 +1,64 @@
+# /veto/export.py
+"""
+Streaming export of series history (live + archived) as NDJSON or CSV.
+
+Rows are read with iterator(chunk_size=...) (server-side cursors on Postgres) and written as they are
+produced, so memory stays flat and the first byte goes out after the first chunk.
+"""
+import csv
+import json
+
+from . import stats
+from .documents import document_prefetches, series_document
+from .models import Series, SeriesArchive
+
+CSV_COLUMNS = [
+    "series_id", "team_a", "team_b", "state", "series_type", "created_at",
+    "event", "step", "team", "kind", "map", "mode",
+]
+
+
+def filter_series(qs, date_from=None, date_to=None, states=None):
+    if date_from:
+        qs = qs.filter(created_at__date__gte=date_from)
+    if date_to:
+        qs = qs.filter(created_at__date__lte=date_to)
+    if states:
+        qs = qs.filter(state__in=states)
+    return qs
+
+
+def iter_documents(date_from=None, date_to=None, states=None, chunk_size=500):
+    """Yield one document per series: archived ones first, then live ones, each in id order."""
+    archived = filter_series(SeriesArchive.objects.all(), date_from, date_to, states)
+    for doc in archived.order_by("series_id").values_list("document", flat=True).iterator(chunk_size=chunk_size):
+        yield doc
+
+    slayer_id = stats.slayer_mode_id()
+    live = filter_series(Series.objects.all(), date_from, date_to, states)
+    for series in live.order_by("id").prefetch_related(*document_prefetches()).iterator(chunk_size=chunk_size):
+        yield series_document(series, slayer_id)
+
+
+def ndjson_lines(docs):
+    for doc in docs:
+        yield json.dumps(doc, separators=(",", ":")) + "\n"
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+    def write(self, value):
+        return value
+
+
+def csv_lines(docs):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for doc in docs:
+        head = [doc["id"], doc["team_a"], doc["team_b"], doc["state"], doc["series_type"], doc["created_at"]]
+        events = [("BAN", b["step"], b["team"], b["kind"], b["map"], b["mode"]) for b in doc.get("bans", [])]
+        events += [("PICK", p["game"], p["team"], p["slot_type"], p["map"], p["mode"]) for p in doc.get("picks", [])]
+        if not events:
+            yield writer.writerow(head + [""] * 6)
+        for event in events:
+            yield writer.writerow(head + list(event))
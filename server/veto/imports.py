@@ -0,0 +1,223 @@
+# /veto/imports.py
+"""
+Bulk import of historical series from NDJSON documents (the export/archive format).
+
+Each document is validated in memory against the TSD rules using a preloaded Catalog, then valid
+documents are written with bulk_create, one transaction per batch. Invalid documents are reported
+and skipped; they never abort the run.
+"""
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import stats
+from .machine_tsd import ROUND_SLOTS
+from .models import BanKind, Series, SeriesBan, SeriesRound, SeriesState, SlotType, StatAction
+from .rules import Catalog, Move, position, replay
+
+DEFAULT_RULESET = "TSD_8s_v2"
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected: list = field(default_factory=list)  # [{"line": n, "errors": [...]}]
+
+    def as_dict(self):
+        return {"imported": self.imported, "rejected_count": len(self.rejected), "rejected": self.rejected}
+
+
+def _team_code(doc, raw):
+    v = str(raw or "").strip()
+    if v in ("A", "B"):
+        return v
+    if v and v == doc.get("team_a"):
+        return "A"
+    if v and v == doc.get("team_b"):
+        return "B"
+    return None
+
+
+def _move(doc, entry, catalog, errors, label, slot=None):
+    team = _team_code(doc, entry.get("team"))
+    map_id = catalog.resolve_map(entry.get("map_id", entry.get("map")))
+    mode_ref = entry.get("mode_id", entry.get("mode"))
+    mode_id = catalog.resolve_mode(mode_ref) if mode_ref not in (None, "") else None
+    if team is None:
+        errors.append(f"{label}: invalid or unknown team")
+    if map_id is None:
+        errors.append(f"{label}: unknown map {entry.get('map_id', entry.get('map'))!r}")
+    if mode_ref not in (None, "") and mode_id is None:
+        errors.append(f"{label}: unknown mode {mode_ref!r}")
+    kind = entry.get("kind")
+    if kind not in (None, "", *BanKind.values):
+        errors.append(f"{label}: unknown kind {kind!r}")
+    slot_kind = None
+    if slot is not None:
+        slot_kind = BanKind.SLAYER_MAP if slot == SlotType.SLAYER else BanKind.OBJECTIVE_COMBO
+        if kind and kind != slot_kind:
+            errors.append(f"{label}: kind {kind} does not match the {slot} slot")
+    kind = slot_kind or kind or (
+        BanKind.SLAYER_MAP if mode_id in (None, catalog.slayer_id) else BanKind.OBJECTIVE_COMBO
+    )
+    if kind == BanKind.SLAYER_MAP:
+        # A Slayer move may leave the mode out, but not name another one
+        if mode_id is not None and mode_id != catalog.slayer_id:
+            errors.append(f"{label}: mode {mode_ref!r} is not Slayer")
+        mode_id = catalog.slayer_id
+    return Move(team, kind, map_id, mode_id)
+
+
+def _created_at(doc, errors):
+    raw = doc.get("created_at")
+    if raw in (None, ""):
+        return None
+    if isinstance(raw, str):
+        try:
+            parsed = parse_datetime(raw)
+        except ValueError:  # well-formed but out of range, e.g. month 13
+            parsed = None
+        if parsed is not None:
+            return parsed
+    errors.append(f"created_at: expected an ISO 8601 datetime, got {raw!r}")
+    return None
+
+
+def _entries(doc, key, errors):
+    entries = doc.get(key) or []
+    if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+        errors.append(f"{key} must be a list of objects")
+        return []
+    return entries
+
+
+def _text(doc, key, errors, required=True):
+    value = doc.get(key)
+    if not required and value in (None, ""):
+        return
+    max_length = Series._meta.get_field(key).max_length
+    if not isinstance(value, str) or not value.strip():
+        errors.append(f"{key} is required (a string)" if required else f"{key} must be a string")
+    elif len(value.strip()) > max_length:
+        errors.append(f"{key} is longer than {max_length} characters")
+
+
+def resolve(doc, catalog):
+    """Validate one document; returns (bans, picks, created_at, errors)."""
+    errors = []
+    _text(doc, "team_a", errors)
+    _text(doc, "team_b", errors)
+    _text(doc, "ruleset", errors, required=False)
+    created_at = _created_at(doc, errors)
+    series_type = doc.get("series_type")
+    if not isinstance(series_type, str) or series_type not in ROUND_SLOTS:
+        return [], [], None, errors + [f"Invalid series_type {series_type!r}"]
+    slots = ROUND_SLOTS[series_type]
+
+    bans = [_move(doc, b, catalog, errors, f"ban {i}") for i, b in enumerate(_entries(doc, "bans", errors))]
+    picks = [
+        _move(doc, p, catalog, errors, f"pick {i}", slots[i] if i < len(slots) else None)
+        for i, p in enumerate(_entries(doc, "picks", errors))
+    ]
+    if errors:
+        return bans, picks, created_at, errors
+    errors += [f"{v.phase} {v.index}: {v.error}" for v in replay(catalog, series_type, bans, picks)]
+    return bans, picks, created_at, errors
+
+
+def _rows(doc, bans, picks, created_at, now):
+    series_type = doc["series_type"]
+    pos = position(series_type, len(bans), len(picks))
+    if doc.get("state") == SeriesState.ABORTED:
+        pos.update(state=SeriesState.ABORTED, turn={})
+    series = Series(
+        team_a=doc["team_a"].strip(), team_b=doc["team_b"].strip(),
+        created_at=created_at or now, ruleset=(doc.get("ruleset") or "").strip() or DEFAULT_RULESET,
+        series_type=series_type, **pos,
+    )
+    ban_rows = [
+        SeriesBan(step_index=i, by_team=m.team, kind=m.kind, map_id=m.map_id,
+                  objective_mode_id=m.mode_id if m.kind == BanKind.OBJECTIVE_COMBO else None)
+        for i, m in enumerate(bans)
+    ]
+    round_rows = []
+    for i, slot in enumerate(ROUND_SLOTS[series_type]):
+        pick = picks[i] if i < len(picks) else None
+        round_rows.append(SeriesRound(
+            order=i, slot_type=slot,
+            mode_id=pick.mode_id if pick else None, pick_map_id=pick.map_id if pick else None,
+            pick_by=pick.team if pick else "", locked=bool(pick),
+        ))
+    return series, ban_rows, round_rows
+
+
+def _write_batch(batch, now, batch_size):
+    with transaction.atomic():
+        built = [_rows(doc, bans, picks, created_at, now) for doc, bans, picks, created_at in batch]
+        series_rows = [s for s, _, _ in built]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Series.objects.bulk_create(series_rows, batch_size=batch_size)
+        else:
+            for s in series_rows:
+                s.save()
+
+        bans_out, rounds_out, deltas = [], [], Counter()
+        for (series, ban_rows, round_rows), (_, bans, picks, _) in zip(built, batch):
+            for row in ban_rows + round_rows:
+                row.series = series
+            bans_out += ban_rows
+            rounds_out += round_rows
+            for m in bans:
+                deltas[stats.bucket(series, StatAction.BAN, m.team, m.map_id, m.mode_id)] += 1
+            for m in picks:
+                deltas[stats.bucket(series, StatAction.PICK, m.team, m.map_id, m.mode_id)] += 1
+        SeriesBan.objects.bulk_create(bans_out, batch_size=batch_size)
+        SeriesRound.objects.bulk_create(rounds_out, batch_size=batch_size)
+        stats.apply(deltas)
+
+
+def import_documents(lines, batch_size=1000, catalog=None, progress=None, result=None, first_line=1) -> ImportResult:
+    """
+    Import NDJSON lines (str or bytes). `progress(done_lines)` is called after each batch, inside the
+    batch's transaction, so whatever it records commits (or rolls back) with the batch. `result` and
+    `first_line` continue an earlier, interrupted run.
+    """
+    catalog = catalog or Catalog.from_db()
+    result = result or ImportResult()
+    now = timezone.now()
+    batch, lineno = [], first_line - 1
+
+    def flush():
+        if batch:
+            with transaction.atomic():
+                _write_batch(batch, now, batch_size)
+                result.imported += len(batch)
+                batch.clear()
+                if progress:
+                    progress(lineno)
+
+    for lineno, line in enumerate(lines, start=first_line):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            doc = json.loads(line)
+            if not isinstance(doc, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            result.rejected.append({"line": lineno, "errors": [f"Invalid JSON: {e}"]})
+            continue
+        bans, picks, created_at, errors = resolve(doc, catalog)
+        if errors:
+            result.rejected.append({"line": lineno, "errors": errors})
+            continue
+        batch.append((doc, bans, picks, created_at))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return result
@@ -0,0 +1,196 @@
+# /veto/integrity.py
+"""
+Rules-integrity check over stored series (`manage.py check_series_rules`).
+
+Rows written by older code, the admin (which edits SeriesBan / SeriesRound directly) or the legacy
+`veto` action can break the TSD rules. check_shard() reads one id range of series with three range
+queries (series, bans, locked rounds), replays each series against its catalog in memory
+(rules.replay, the same checks as TSDMachine) and also checks that:
+
+- bans are stored as steps 0..n-1 and picks as games 1..n, without gaps
+- the stored state, indexes and turn are the ones the moves lead to
+
+Nothing is queried per series, so the cost is the three range reads plus the replay. Shards are
+independent: the command spreads them over a process pool.
+
+flag() marks violating series with `needs_review` (and clears it on those that pass); repair()
+truncates a series at its first bad move, unlocks later picks and recomputes its position.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.db import models, transaction
+
+from .models import BanKind, MapPool, Series, SeriesBan, SeriesRound, SeriesState
+from .rules import ROUND_SLOTS, Catalog, Move, Violation, position, replay, slot_kind
+
+UNCHECKED_STATES = (SeriesState.IDLE, SeriesState.SERIES_SETUP)
+
+
+class Catalogs:
+    """The live catalog plus every published pool, loaded once per process."""
+
+    def __init__(self):
+        self.live = Catalog.from_db()
+        self.pools = {pk: Catalog.from_document(doc) for pk, doc in MapPool.objects.values_list("pk", "document")}
+
+    def for_pool(self, pool_id):
+        return self.pools.get(pool_id, self.live) if pool_id else self.live
+
+
+@dataclass
+class Checked:
+    id: int
+    state: str
+    series_type: str
+    violations: list
+    ban_ids: list = field(default_factory=list)  # stored order, parallel to the replayed bans
+    round_ids: list = field(default_factory=list)  # locked rounds, parallel to the replayed picks
+
+    def as_dict(self):
+        return {"series": self.id, "state": self.state,
+                "violations": [{"phase": v.phase, "index": v.index, "error": v.error} for v in self.violations]}
+
+
+@dataclass
+class ShardResult:
+    lo: int
+    hi: int
+    checked: int = 0
+    bad: list = field(default_factory=list)  # [Checked]
+    repaired: int = 0
+
+
+def _stored_position(row):
+    return {"state": row["state"], "ban_index": row["ban_index"], "round_index": row["round_index"],
+            "turn": row["turn"] or {}}
+
+
+def check_series(row, bans, picks, catalog) -> list:
+    """Violations of one series. bans: [(step_index, Move)], picks: [(order, Move)], in stored order."""
+    violations = []
+    for i, (step, _) in enumerate(bans):
+        if step != i:
+            violations.append(Violation("ban", i, f"Out of order: stored as step {step}"))
+            break
+    for i, (order, _) in enumerate(picks):
+        if order != i:
+            violations.append(Violation("pick", i, f"Out of order: game {order + 1} stored before game {i + 1}"))
+            break
+    ban_moves = [m for _, m in bans]
+    pick_moves = [m for _, m in picks]
+    violations += replay(catalog, row["series_type"], ban_moves, pick_moves)
+    if violations or row["series_type"] not in ROUND_SLOTS:
+        return violations
+
+    expected = position(row["series_type"], len(ban_moves), len(pick_moves))
+    if row["state"] == SeriesState.ABORTED:
+        expected.update(state=SeriesState.ABORTED, turn={})
+    stored = _stored_position(row)
+    for key in ("state", "ban_index", "round_index", "turn"):
+        if stored[key] != expected[key]:
+            violations.append(Violation("state", 0, f"Stale {key}: stored {stored[key]!r}, moves lead to {expected[key]!r}"))
+    return violations
+
+
+def check_shard(lo, hi, catalogs: Catalogs) -> ShardResult:
+    """Check series with lo <= id < hi."""
+    result = ShardResult(lo, hi)
+    rows = (
+        Series.objects.filter(pk__gte=lo, pk__lt=hi).exclude(state__in=UNCHECKED_STATES)
+        .order_by().values("id", "state", "series_type", "map_pool_id", "ban_index", "round_index", "turn")
+    )
+    bans, picks = defaultdict(list), defaultdict(list)
+    ban_rows = (
+        SeriesBan.objects.filter(series_id__gte=lo, series_id__lt=hi)
+        .order_by("series_id", "step_index", "id")
+        .values_list("series_id", "id", "step_index", "by_team", "kind", "map_id", "objective_mode_id")
+    )
+    for series_id, pk, step, team, kind, map_id, mode_id in ban_rows.iterator(chunk_size=5000):
+        bans[series_id].append((pk, step, team, kind, map_id, mode_id))
+    round_rows = (
+        SeriesRound.objects.filter(series_id__gte=lo, series_id__lt=hi, locked=True)
+        .order_by("series_id", "order")
+        .values_list("series_id", "id", "order", "pick_by", "slot_type", "pick_map_id", "mode_id")
+    )
+    for series_id, pk, order, team, slot, map_id, mode_id in round_rows.iterator(chunk_size=5000):
+        picks[series_id].append((pk, order, Move(team, slot_kind(slot), map_id, mode_id)))
+
+    for row in rows.iterator(chunk_size=5000):
+        result.checked += 1
+        catalog = catalogs.for_pool(row["map_pool_id"])
+        slayer_id = catalog.slayer_id
+        series_bans = bans.get(row["id"], [])
+        ban_moves = [
+            (step, Move(team, kind, map_id, slayer_id if kind == BanKind.SLAYER_MAP else mode_id))
+            for _, step, team, kind, map_id, mode_id in series_bans
+        ]
+        series_picks = picks.get(row["id"], [])
+        violations = check_series(row, ban_moves, [(order, m) for _, order, m in series_picks], catalog)
+        if violations:
+            result.bad.append(Checked(
+                row["id"], row["state"], row["series_type"], violations,
+                [b[0] for b in series_bans], [p[0] for p in series_picks],
+            ))
+    return result
+
+
+def flag(result: ShardResult):
+    """needs_review = True on the shard's violating series, False on the rest."""
+    bad = [c.id for c in result.bad]
+    in_shard = Series.objects.filter(pk__gte=result.lo, pk__lt=result.hi)
+    with transaction.atomic():
+        in_shard.filter(needs_review=True).exclude(pk__in=bad).update(needs_review=False)
+        Series.objects.filter(pk__in=bad).update(needs_review=True)
+
+
+def _kept(checked: Checked):
+    """(bans kept, picks kept) when a series is cut back to its last legal move; None if unrepairable."""
+    first = {}
+    for v in checked.violations:
+        if v.phase == "series":
+            return None
+        if v.phase in ("ban", "pick"):
+            first[v.phase] = min(first.get(v.phase, v.index), v.index)
+    if "ban" in first:
+        return first["ban"], 0
+    return len(checked.ban_ids), first.get("pick", len(checked.round_ids))
+
+
+def repair(result: ShardResult) -> int:
+    """
+    Cut each violating series back to its last legal move: later bans are deleted, later picks
+    unlocked, and state / indexes / turn recomputed. Returns the number of series changed.
+    MapStat is not adjusted here: rebuild it afterwards (backfill_map_stats).
+    """
+    drop_bans, reopen_rounds, positions, repaired = [], [], [], 0
+    for checked in result.bad:
+        kept = _kept(checked)
+        if kept is None:
+            continue
+        bans_kept, picks_kept = kept
+        drop_bans += checked.ban_ids[bans_kept:]
+        reopen_rounds += checked.round_ids[picks_kept:]
+        pos = position(checked.series_type, bans_kept, picks_kept)
+        if checked.state == SeriesState.ABORTED:
+            pos.update(state=SeriesState.ABORTED, turn={})
+        positions.append((checked.id, pos))
+    with transaction.atomic():
+        SeriesBan.objects.filter(pk__in=drop_bans).delete()
+        SeriesRound.objects.filter(pk__in=reopen_rounds).update(mode=None, pick_by="", pick_map=None, locked=False)
+        for series_id, pos in positions:
+            repaired += Series.objects.filter(pk=series_id).update(
+                **pos, turn_deadline=None, needs_review=False, version=models.F("version") + 1,
+            )
+    return repaired
+
+
+def id_shards(shard_size, lo=None, hi=None):
+    """[lo, hi) id ranges covering every stored series."""
+    bounds = Series.objects.aggregate(lo=models.Min("pk"), hi=models.Max("pk"))
+    if bounds["lo"] is None:
+        return []
+    lo = max(lo or bounds["lo"], bounds["lo"])
+    hi = min(hi or bounds["hi"] + 1, bounds["hi"] + 1)
+    return [(start, min(start + shard_size, hi)) for start in range(lo, hi, shard_size)]
+
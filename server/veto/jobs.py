@@ -0,0 +1,246 @@
+# /veto/jobs.py
+"""
+Background jobs: heavy, non-request work queued in the database and run by `manage.py run_jobs`.
+
+    job = jobs.enqueue("backfill_map_stats", batch_size=1000)   # from a view, the admin, a command
+    GET /api/jobs/<id>/                                           # status, progress, result
+
+A job kind is a function registered with @job("<kind>"). It gets a Progress reporter plus the job's
+params, and returns a JSON-serialisable result. A job that raises is retried after JOB_RETRY_SECONDS,
+doubling each attempt, until it has run `max_attempts` times; then it is FAILED with the traceback.
+
+Workers claim jobs with a conditional UPDATE (QUEUED -> RUNNING), so any number of workers, on any
+database, never run a job twice. `run_jobs` runs claimed jobs on a process pool (JOB_WORKERS
+processes), so they use every core and never hold a gunicorn worker. `run_jobs --processes 0` and
+`run_pending()` run them in the calling process, which is what tests use. A job whose worker died is
+found by its stale heartbeat (JOB_STALE_SECONDS) and queued again. While a job runs, a thread beats
+its heartbeat every JOB_HEARTBEAT_SECONDS, so one long call (a stats rebuild) never looks like a dead
+worker.
+"""
+import logging
+import os
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, models
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import export, stats
+from .imports import ImportResult, import_documents
+from .models import Job, JobStatus
+
+log = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def job(kind):
+    """Register `fn(progress, **params)` as the job kind `kind`."""
+    def register(fn):
+        REGISTRY[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, *, max_attempts=None, run_after=None, **params) -> Job:
+    if kind not in REGISTRY:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    return Job.objects.create(
+        kind=kind, params=params,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=run_after or timezone.now(),
+    )
+
+
+class Progress:
+    """`progress(done, total=None, message=None)`; written at most once per `every` seconds."""
+
+    def __init__(self, job_id, every=1.0, params=None):
+        self.job_id = job_id
+        self.every = every
+        self.params = params or {}
+        self.fields = {}
+        self._written = 0.0
+
+    def __call__(self, done, total=None, message=None):
+        self.fields["done"] = done
+        if total is not None:
+            self.fields["total"] = total
+        if message is not None:
+            self.fields["message"] = str(message)[:255]
+        if time.monotonic() - self._written >= self.every:
+            self.flush()
+
+    def checkpoint(self, **params):
+        """Merge `params` into the job's params and write now: a retry of the job is called with them."""
+        self.params = {**self.params, **params}
+        self.fields["params"] = self.params
+        self.flush()
+
+    def flush(self):
+        Job.objects.filter(pk=self.job_id).update(heartbeat=timezone.now(), **self.fields)
+        self._written = time.monotonic()
+
+
+def claim(worker: str):
+    """Take the next due job, or None. Safe against any number of concurrent workers."""
+    now = timezone.now()
+    due = (
+        Job.objects.filter(status=JobStatus.QUEUED, run_after__lte=now)
+        .order_by("run_after", "id").values_list("pk", flat=True)[:10]
+    )
+    for pk in due:
+        won = Job.objects.filter(pk=pk, status=JobStatus.QUEUED).update(
+            status=JobStatus.RUNNING, worker=worker, started_at=now, heartbeat=now,
+            attempts=models.F("attempts") + 1,
+        )
+        if won:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def retry_or_fail(job: Job, error: str) -> str:
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        delay = settings.JOB_RETRY_SECONDS * 2 ** (job.attempts - 1)
+        Job.objects.filter(pk=job.pk).update(
+            status=JobStatus.QUEUED, error=error, run_after=now + timedelta(seconds=delay), heartbeat=now,
+        )
+        return JobStatus.QUEUED
+    Job.objects.filter(pk=job.pk).update(status=JobStatus.FAILED, error=error, finished_at=now, heartbeat=now)
+    return JobStatus.FAILED
+
+
+@contextmanager
+def heartbeat(job_id, every=None):
+    """Refresh the job's heartbeat from a thread (with its own connection) until the block exits."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(every or settings.JOB_HEARTBEAT_SECONDS):
+                Job.objects.filter(pk=job_id, status=JobStatus.RUNNING).update(heartbeat=timezone.now())
+        except Exception:
+            log.warning("heartbeat of job %s stopped", job_id, exc_info=True)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"job-{job_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run(job_id) -> str:
+    """Run a claimed job to completion, retry or failure; returns its new status."""
+    job = Job.objects.get(pk=job_id)
+    fn = REGISTRY.get(job.kind)
+    progress = Progress(job.pk, params=job.params)
+    try:
+        if fn is None:
+            raise LookupError(f"Unknown job kind {job.kind!r}")
+        with heartbeat(job.pk):
+            result = fn(progress, **job.params)
+    except Exception:
+        log.warning("job %s (%s) attempt %s failed", job.pk, job.kind, job.attempts, exc_info=True)
+        return retry_or_fail(job, traceback.format_exc()[-4000:])
+    progress.flush()
+    Job.objects.filter(pk=job.pk).update(status=JobStatus.SUCCEEDED, result=result, finished_at=timezone.now())
+    return JobStatus.SUCCEEDED
+
+
+def requeue_stale() -> int:
+    """Jobs RUNNING without a heartbeat for JOB_STALE_SECONDS lost their worker: retry or fail them."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    stale = list(Job.objects.filter(status=JobStatus.RUNNING, heartbeat__lt=cutoff))
+    for job in stale:
+        retry_or_fail(job, f"Worker {job.worker or '?'} stopped reporting")
+    return len(stale)
+
+
+def run_pending(worker="inline") -> int:
+    """Run every due job in this process; returns how many were run."""
+    ran = 0
+    while (claimed := claim(worker)) is not None:
+        run(claimed.pk)
+        ran += 1
+    return ran
+
+
+def job_path(name) -> Path:
+    """Path for a job's input or output file under JOB_DIR."""
+    directory = Path(settings.JOB_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / name
+
+
+# ---- job kinds ----
+
+@job("seed_catalog")
+def seed_catalog(progress):
+    out = StringIO()
+    call_command("seed_hcs", stdout=out)
+    return {"output": out.getvalue().strip()}
+
+
+@job("import_series")
+def import_series(progress, path, batch_size=1000, cleanup=False, resume=None):
+    # Each batch checkpoints where the next one starts, in the batch's transaction; a retry
+    # is called with that checkpoint as `resume` and skips what is already imported.
+    resume = resume or {"offset": 0, "line": 1, "imported": 0, "rejected": []}
+    result = ImportResult(resume["imported"], resume["rejected"])
+    with open(path, "rb") as src:
+        total = os.fstat(src.fileno()).st_size
+        src.seek(resume["offset"])
+
+        def committed(lineno):
+            progress(src.tell(), total)
+            progress.checkpoint(resume={
+                "offset": src.tell(), "line": lineno + 1, "imported": result.imported, "rejected": result.rejected,
+            })
+
+        import_documents(src, batch_size=batch_size, progress=committed, result=result, first_line=resume["line"])
+    if cleanup:
+        os.remove(path)
+    return result.as_dict()
+
+
+@job("backfill_map_stats")
+def backfill_map_stats(progress, batch_size=1000):
+    progress(0, message="Rebuilding map stats")
+    return {"buckets": stats.rebuild(batch_size=batch_size)}
+
+
+@job("export_series")
+def export_series(progress, fmt="ndjson", date_from=None, date_to=None, states=()):
+    writer = {"ndjson": export.ndjson_lines, "csv": export.csv_lines}[fmt]
+    docs = export.iter_documents(
+        parse_date(date_from) if date_from else None, parse_date(date_to) if date_to else None, list(states),
+    )
+    counted = 0
+
+    def counting(documents):
+        nonlocal counted
+        for doc in documents:
+            counted += 1
+            if counted % 500 == 0:
+                progress(counted)
+            yield doc
+
+    path = job_path(f"export-{progress.job_id}.{fmt}")
+    with open(path, "w", encoding="utf-8", newline="") as out:
+        for chunk in writer(counting(docs)):
+            out.write(chunk)
+    progress(counted)
+    return {"path": str(path), "documents": counted}
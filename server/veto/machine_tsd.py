@@ -1,42 +1,65 @@
 # /veto/machine_tsd.py
-from django.db import transaction
+import random
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
 from django.utils import timezone
 from transitions import Machine
+from . import cache, clocks, pools, stats
+from .timing import timed
 from .models import (
     Series, SeriesState, SeriesRound, SeriesBan,
-    SlotType, BanKind, GameMode, Map
+    SlotType, BanKind, Map, MapPool, StatAction
 )
+from .rules import BAN_SCHEDULE, ROUND_SLOTS, picking_team_for_game
 
-# 7-step ban schedule (A obj, B obj, A obj, B obj, A obj, B slayer, A slayer)
-BAN_SCHEDULE = [
-    ("A", BanKind.OBJECTIVE_COMBO),  # Step 1: Team A bans one Objective and map combination
-    ("B", BanKind.OBJECTIVE_COMBO),  # Step 2: Team B bans one Objective and map combination
-    ("A", BanKind.OBJECTIVE_COMBO),  # Step 3: Team A bans one Objective and map combination
-    ("B", BanKind.OBJECTIVE_COMBO),  # Step 4: Team B bans one Objective and map combination
-    ("A", BanKind.OBJECTIVE_COMBO),  # Step 5: Team A bans one Objective and map combination
-    ("B", BanKind.SLAYER_MAP),       # Step 6: Team B bans one Slayer map
-    ("A", BanKind.SLAYER_MAP),       # Step 7: Team A bans one Slayer map
-]
-
-
-ROUND_SLOTS = {
-    "Bo3": [SlotType.OBJECTIVE, SlotType.SLAYER, SlotType.OBJECTIVE],
-    "Bo5": [SlotType.OBJECTIVE, SlotType.SLAYER, SlotType.OBJECTIVE, SlotType.OBJECTIVE, SlotType.SLAYER],
-    "Bo7": [SlotType.OBJECTIVE, SlotType.SLAYER, SlotType.OBJECTIVE, SlotType.OBJECTIVE, SlotType.SLAYER, SlotType.OBJECTIVE, SlotType.SLAYER],
-}
-
-def picking_team_for_game(game_number: int) -> str:
-    # Odd games -> Team B picks; Even -> Team A picks
-    return "B" if game_number % 2 == 1 else "A"
 
 class TSDMachineError(Exception): ...
 class GuardError(TSDMachineError): ...
 class TurnError(TSDMachineError): ...
 
+def _rule_constraints():
+    # Postgres reports the violated constraint by name, SQLite by its columns ("table.col, table.col")
+    for model in (SeriesBan, SeriesRound):
+        for c in model._meta.constraints:
+            yield c.name
+            yield ", ".join(f"{model._meta.db_table}.{model._meta.get_field(f).column}" for f in c.fields)
+
+RULE_CONSTRAINTS = frozenset(_rule_constraints())
+
+def _violated(e: IntegrityError) -> str:
+    diag = getattr(e.__cause__, "diag", None)
+    if diag is not None and diag.constraint_name:
+        return diag.constraint_name
+    return str(e).rpartition("constraint failed: ")[2]
+
+@contextmanager
+def integrity_guard(message: str):
+    # Rule invariants live in DB constraints; surface their violations as GuardError. Anything else,
+    # e.g. a (series, step_index) collision with a writer that skipped the lock, is a real error
+    try:
+        yield
+    except IntegrityError as e:
+        if _violated(e) not in RULE_CONSTRAINTS:
+            raise
+        raise GuardError(message) from e
+
+# Normalize team labels to "A"/"B"
+def team_code(series, raw: str) -> str:
+    v = (raw or "").strip()
+    if v in ("A", "B"):
+        return v
+    if v == series.team_a:
+        return "A"
+    if v == series.team_b:
+        return "B"
+    raise GuardError("Invalid or unknown team")
+
 class TSDMachine(Machine):
     def __init__(self, series_id: int):
         self.series_id = series_id
-        self.series = Series.objects.get(pk=series_id)
+        # Always the primary: commands lock and write this row (reads inside commands are atomic, so they follow)
+        self.series = Series.objects.using(router.db_for_write(Series)).get(pk=series_id)
 
         states = ['IDLE', 'BANNING', 'PICKING', 'FINALIZED']
 
@@ -55,6 +78,25 @@ class TSDMachine(Machine):
         self.series.save()
 
     # ---- helpers ----
+    def _lock(self) -> Series:
+        # Row lock serialising commands on this series; the wait shows up as `lock` in Server-Timing
+        with timed("lock"):
+            return Series.objects.select_for_update().get(pk=self.series_id)
+
+    def _commit(self, s: Series, *fields):
+        # Every command bumps Series.version in its final save; cached snapshots are keyed by it
+        s.version += 1
+        announce = False
+        if "turn" in fields:
+            # A new turn restarts the clock (veto/clocks.py)
+            previous, s.turn_deadline = s.turn_deadline, clocks.deadline_for(s)
+            announce = previous is not None or s.turn_deadline is not None
+            fields = (*fields, "turn_deadline")
+        s.save(update_fields=[*fields, "version"])
+        cache.write_through_series(s.pk)
+        if announce:
+            clocks.announce(s.pk, s.version, s.turn_deadline)
+
     def _expect_turn(self, s: Series, team: str, action: str, kind: str | None = None):
         t = s.turn or {}
         if t.get("team") != team or t.get("action") != action:
@@ -67,7 +109,7 @@ class TSDMachine(Machine):
         s.ban_index = 0
         team, kind = BAN_SCHEDULE[0]
         s.turn = {"team": team, "action": "BAN", "kind": kind}
-        s.save(update_fields=["state","ban_index","turn"])
+        self._commit(s, "ruleset", "series_type", "map_pool", "state", "ban_index", "turn")
 
     def _advance_ban_turn(self, s: Series):
         idx = s.ban_index + 1
@@ -75,7 +117,7 @@ class TSDMachine(Machine):
             team, kind = BAN_SCHEDULE[idx]
             s.ban_index = idx
             s.turn = {"team": team, "action": "BAN", "kind": kind}
-            s.save(update_fields=["ban_index","turn"])
+            self._commit(s, "ban_index", "turn")
         else:
             # Move to Game 1 pick
             s.ban_index = idx
@@ -85,7 +127,7 @@ class TSDMachine(Machine):
             slot = s.rounds.get(order=0).slot_type
             kind = BanKind.OBJECTIVE_COMBO if slot == SlotType.OBJECTIVE else BanKind.SLAYER_MAP
             s.turn = {"team": picking_team_for_game(game_no), "action": "PICK", "kind": kind}
-            s.save(update_fields=["ban_index","state","round_index","turn"])
+            self._commit(s, "ban_index", "state", "round_index", "turn")
 
     def _map_unused(self, s: Series, m: Map) -> bool:
         return not SeriesRound.objects.filter(series=s, pick_map=m).exists()
@@ -94,13 +136,15 @@ class TSDMachine(Machine):
 
     @transaction.atomic
     def confirm_tsd(self, series_type: str, ruleset="TSD_8s_v2"):
-        s = Series.objects.select_for_update().get(pk=self.series_id)
-        if s.state not in [SeriesState.IDLE, SeriesState.SERIES_SETUP]:
-            raise GuardError("Series already configured")
-        if series_type not in ROUND_SLOTS:
-            raise GuardError("Invalid series_type")
+        s = self._lock()
+        with timed("guards"):
+            if s.state not in [SeriesState.IDLE, SeriesState.SERIES_SETUP]:
+                raise GuardError("Series already configured")
+            if series_type not in ROUND_SLOTS:
+                raise GuardError("Invalid series_type")
         s.ruleset = ruleset
         s.series_type = series_type
+        s.map_pool_id = MapPool.current_id()
         s.rounds.all().delete()
         for i, slot in enumerate(ROUND_SLOTS[series_type]):
             SeriesRound.objects.create(series=s, order=i, slot_type=slot)
@@ -109,115 +153,116 @@ class TSDMachine(Machine):
 
     @transaction.atomic
     def assign_roles(self, team_a: str, team_b: str):
-        s = Series.objects.select_for_update().get(pk=self.series_id)
+        s = self._lock()
         if s.state != SeriesState.IDLE:
             raise GuardError("Roles can only be assigned in IDLE")
         s.team_a = team_a
         s.team_b = team_b
         s.state = SeriesState.SERIES_SETUP
-        s.save(update_fields=["team_a","team_b","state"])
+        self._commit(s, "team_a", "team_b", "state")
         return s
 
     @transaction.atomic
     def ban_objective_combo(self, team: str, objective_mode_id: int, map_id: int):
-        s = Series.objects.select_for_update().get(pk=self.series_id)
-        self._expect_turn(s, team, "BAN", BanKind.OBJECTIVE_COMBO)
-        if s.state != SeriesState.BAN_PHASE:
-            raise GuardError("Not in ban phase")
-
-        mode = GameMode.objects.get(pk=objective_mode_id)
-        if not mode.is_objective:
-            raise GuardError("Mode must be objective")
-        m = Map.objects.get(pk=map_id)
-        if not m.modes.filter(pk=mode.pk).exists():
-            raise GuardError("Map does not support this objective")
-        if SeriesBan.objects.filter(series=s, kind=BanKind.OBJECTIVE_COMBO, objective_mode=mode, map=m).exists():
-            raise GuardError("That combo is already banned")
-
-        SeriesBan.objects.create(
-            series=s, step_index=s.ban_index, by_team=team,
-            kind=BanKind.OBJECTIVE_COMBO, map=m, objective_mode=mode
-        )
+        s = self._lock()
+        with timed("guards"):
+            self._expect_turn(s, team, "BAN", BanKind.OBJECTIVE_COMBO)
+            if s.state != SeriesState.BAN_PHASE:
+                raise GuardError("Not in ban phase")
+
+            catalog = pools.catalog_for(s)
+            if not catalog.is_objective(objective_mode_id):
+                raise GuardError("Mode must be objective")
+            if not catalog.supports(map_id, objective_mode_id):
+                raise GuardError("Map does not support this objective")
+
+        with integrity_guard("That combo is already banned"):
+            SeriesBan.objects.create(
+                series=s, step_index=s.ban_index, by_team=team,
+                kind=BanKind.OBJECTIVE_COMBO, map_id=map_id, objective_mode_id=objective_mode_id
+            )
+        stats.record(s, StatAction.BAN, team, map_id, objective_mode_id)
         self._advance_ban_turn(s)
         return s
 
     @transaction.atomic
     def ban_slayer_map(self, team: str, map_id: int):
-        s = Series.objects.select_for_update().get(pk=self.series_id)
-        self._expect_turn(s, team, "BAN", BanKind.SLAYER_MAP)
-        if s.state != SeriesState.BAN_PHASE:
-            raise GuardError("Not in ban phase")
-
-        m = Map.objects.get(pk=map_id)
-        if not m.modes.filter(name="Slayer").exists():
-            raise GuardError("Map is not valid for Slayer")
-        if SeriesBan.objects.filter(series=s, kind=BanKind.SLAYER_MAP, map=m).exists():
-            raise GuardError("That Slayer map is already banned")
-
-        SeriesBan.objects.create(
-            series=s, step_index=s.ban_index, by_team=team,
-            kind=BanKind.SLAYER_MAP, map=m
-        )
+        s = self._lock()
+        with timed("guards"):
+            self._expect_turn(s, team, "BAN", BanKind.SLAYER_MAP)
+            if s.state != SeriesState.BAN_PHASE:
+                raise GuardError("Not in ban phase")
+
+            catalog = pools.catalog_for(s)
+            if not catalog.supports(map_id, catalog.slayer_id):
+                raise GuardError("Map is not valid for Slayer")
+
+        with integrity_guard("That Slayer map is already banned"):
+            SeriesBan.objects.create(
+                series=s, step_index=s.ban_index, by_team=team,
+                kind=BanKind.SLAYER_MAP, map_id=map_id
+            )
+        stats.record(s, StatAction.BAN, team, map_id, catalog.slayer_id)
         self._advance_ban_turn(s)
         return s
 
     @transaction.atomic
     def pick_objective_combo(self, team: str, objective_mode_id: int, map_id: int):
-        s = Series.objects.select_for_update().get(pk=self.series_id)
-        self._expect_turn(s, team, "PICK", BanKind.OBJECTIVE_COMBO)
-        if s.state != SeriesState.PICK_WINDOW:
-            raise GuardError("Not in pick window")
-
-        r = s.rounds.get(order=s.round_index)
-        if r.slot_type != SlotType.OBJECTIVE:
-            raise GuardError("This round is not Objective")
-
-        mode = GameMode.objects.get(pk=objective_mode_id)
-        m = Map.objects.get(pk=map_id)
-        if not mode.is_objective or not m.modes.filter(pk=mode.pk).exists():
-            raise GuardError("Invalid objective combo")
-        if SeriesBan.objects.filter(series=s, kind=BanKind.OBJECTIVE_COMBO, objective_mode=mode, map=m).exists():
-            raise GuardError("Combo is banned")
-
-        # Only block the exact Map+Mode if it was already picked
-        if SeriesRound.objects.filter(series=s, pick_map=m, mode=mode).exists():
-            raise GuardError("That objective combo was already picked")
-
-        r.mode = mode
+        s = self._lock()
+        with timed("guards"):
+            self._expect_turn(s, team, "PICK", BanKind.OBJECTIVE_COMBO)
+            if s.state != SeriesState.PICK_WINDOW:
+                raise GuardError("Not in pick window")
+
+            r = s.rounds.get(order=s.round_index)
+            if r.slot_type != SlotType.OBJECTIVE:
+                raise GuardError("This round is not Objective")
+
+            catalog = pools.catalog_for(s)
+            if not catalog.is_objective(objective_mode_id) or not catalog.supports(map_id, objective_mode_id):
+                raise GuardError("Invalid objective combo")
+            if SeriesBan.objects.filter(
+                series=s, kind=BanKind.OBJECTIVE_COMBO, objective_mode_id=objective_mode_id, map_id=map_id
+            ).exists():
+                raise GuardError("Combo is banned")
+
+        r.mode_id = objective_mode_id
         r.pick_by = team
-        r.pick_map = m
+        r.pick_map_id = map_id
         r.locked = True
-        r.save(update_fields=["mode","pick_by","pick_map","locked"])
+        # Only block the exact Map+Mode if it was already picked (uniq_round_pick_combo)
+        with integrity_guard("That objective combo was already picked"):
+            r.save(update_fields=["mode","pick_by","pick_map","locked"])
+        stats.record(s, StatAction.PICK, team, map_id, objective_mode_id)
         self._advance_round_after_pick(s)
         return s
 
     @transaction.atomic
     def pick_slayer_map(self, team: str, map_id: int):
-        s = Series.objects.select_for_update().get(pk=self.series_id)
-        self._expect_turn(s, team, "PICK", BanKind.SLAYER_MAP)
-        if s.state != SeriesState.PICK_WINDOW:
-            raise GuardError("Not in pick window")
+        s = self._lock()
+        with timed("guards"):
+            self._expect_turn(s, team, "PICK", BanKind.SLAYER_MAP)
+            if s.state != SeriesState.PICK_WINDOW:
+                raise GuardError("Not in pick window")
 
-        r = s.rounds.get(order=s.round_index)
-        if r.slot_type != SlotType.SLAYER:
-            raise GuardError("This round is not Slayer")
+            r = s.rounds.get(order=s.round_index)
+            if r.slot_type != SlotType.SLAYER:
+                raise GuardError("This round is not Slayer")
 
-        m = Map.objects.get(pk=map_id)
-        if not m.modes.filter(name="Slayer").exists():
-            raise GuardError("Map is not valid for Slayer")
-        if SeriesBan.objects.filter(series=s, kind=BanKind.SLAYER_MAP, map=m).exists():
-            raise GuardError("This Slayer map is banned")
+            catalog = pools.catalog_for(s)
+            if not catalog.supports(map_id, catalog.slayer_id):
+                raise GuardError("Map is not valid for Slayer")
+            if SeriesBan.objects.filter(series=s, kind=BanKind.SLAYER_MAP, map_id=map_id).exists():
+                raise GuardError("This Slayer map is banned")
 
-        # Only block reuse of the map in SLAYER rounds (allow if used for Objective)
-        if SeriesRound.objects.filter(series=s, pick_map=m, slot_type=SlotType.SLAYER).exists():
-            raise GuardError("Map already used for Slayer")
-
-        slayer = GameMode.objects.get(name="Slayer")
-        r.mode = slayer
+        r.mode_id = catalog.slayer_id
         r.pick_by = team
-        r.pick_map = m
+        r.pick_map_id = map_id
         r.locked = True
-        r.save(update_fields=["mode","pick_by","pick_map","locked"])
+        # Only block reuse of the map in SLAYER rounds (allow if used for Objective)
+        with integrity_guard("Map already used for Slayer"):
+            r.save(update_fields=["mode","pick_by","pick_map","locked"])
+        stats.record(s, StatAction.PICK, team, map_id, catalog.slayer_id)
         self._advance_round_after_pick(s)
         return s
 
@@ -233,22 +278,56 @@ class TSDMachine(Machine):
         else:
             s.state = SeriesState.SERIES_COMPLETE
             s.turn = {}
-        s.save(update_fields=["round_index","state","turn"])
+        self._commit(s, "round_index", "state", "turn")
+
+    @transaction.atomic
+    def expire_turn(self, version: int, fallback: str | None = None):
+        """
+        Turn clock ran out: play TURN_TIMEOUT_FALLBACK for the team on turn ("random": a random legal
+        move through the normal command; "abort": end the series). No-op (None) once nobody is on the
+        clock. The series unchanged if its deadline has not passed yet, or if its version moved on
+        without an announcement (API/admin edits, Action rows): the scheduler re-queues it at the
+        current version and deadline.
+        """
+        s = self._lock()
+        if s.turn_deadline is None:
+            return None
+        if s.version != version or s.turn_deadline > timezone.now():
+            return s
+        fallback = fallback or settings.TURN_TIMEOUT_FALLBACK
+        if fallback not in clocks.FALLBACKS:
+            raise GuardError(f"Unknown turn timeout fallback {fallback!r}")
+        moves = pools.series_legal_moves(s) if fallback == "random" else []
+        if not moves:
+            s.state = SeriesState.ABORTED
+            s.turn = {}
+            self._commit(s, "state", "turn")
+            return s
+        move = random.choice(moves)
+        if s.turn["action"] == "BAN" and move.kind == BanKind.OBJECTIVE_COMBO:
+            return self.ban_objective_combo(move.team, move.mode_id, move.map_id)
+        if s.turn["action"] == "BAN":
+            return self.ban_slayer_map(move.team, move.map_id)
+        if move.kind == BanKind.OBJECTIVE_COMBO:
+            return self.pick_objective_combo(move.team, move.mode_id, move.map_id)
+        return self.pick_slayer_map(move.team, move.map_id)
 
     @transaction.atomic
     def undo_last(self):
         # minimal, safe undo: delete last ban if in BAN_PHASE, else reopen last locked round in PICK_WINDOW
-        s = Series.objects.select_for_update().get(pk=self.series_id)
+        s = self._lock()
         if s.state == SeriesState.BAN_PHASE:
             last_ban = s.bans.order_by('-step_index','-id').first()
             if not last_ban:
                 raise GuardError("Nothing to undo")
             last_ban.delete()
+            mode_id = stats.slayer_mode_id() if last_ban.kind == BanKind.SLAYER_MAP else last_ban.objective_mode_id
+            stats.record(s, StatAction.BAN, last_ban.by_team, last_ban.map_id, mode_id, delta=-1)
             # reset turn to that step
             s.ban_index = last_ban.step_index
             team, kind = BAN_SCHEDULE[s.ban_index]
             s.turn = {"team": team, "action": "BAN", "kind": kind}
-            s.save(update_fields=["ban_index","turn"])
+            self._commit(s, "ban_index", "turn")
             return s
 
         if s.state == SeriesState.PICK_WINDOW:
@@ -258,6 +337,7 @@ class TSDMachine(Machine):
             except SeriesRound.DoesNotExist:
                 raise GuardError("Nothing to undo")
             if r.pick_map_id:
+                stats.record(s, StatAction.PICK, r.pick_by, r.pick_map_id, r.mode_id, delta=-1)
                 r.mode = None
                 r.pick_by = ""
                 r.pick_map = None
@@ -267,13 +347,15 @@ class TSDMachine(Machine):
                 game_no = s.round_index + 1
                 kind = BanKind.OBJECTIVE_COMBO if r.slot_type == SlotType.OBJECTIVE else BanKind.SLAYER_MAP
                 s.turn = {"team": picking_team_for_game(game_no), "action":"PICK", "kind": kind}
-                s.save(update_fields=["turn"])
+                self._commit(s, "turn")
                 return s
             # move to previous round if exists
             if s.round_index == 0:
                 raise GuardError("Nothing to undo")
             s.round_index -= 1
             r = s.rounds.get(order=s.round_index)
+            if r.pick_map_id:
+                stats.record(s, StatAction.PICK, r.pick_by, r.pick_map_id, r.mode_id, delta=-1)
             r.mode = None
             r.pick_by = ""
             r.pick_map = None
@@ -282,21 +364,25 @@ class TSDMachine(Machine):
             game_no = s.round_index + 1
             kind = BanKind.OBJECTIVE_COMBO if r.slot_type == SlotType.OBJECTIVE else BanKind.SLAYER_MAP
             s.turn = {"team": picking_team_for_game(game_no), "action":"PICK", "kind": kind}
-            s.save(update_fields=["round_index","turn"])
+            self._commit(s, "round_index", "turn")
             return s
 
         raise GuardError("Undo not available in current state")
 
     @transaction.atomic
     def reset(self):
-        s = Series.objects.select_for_update().get(pk=self.series_id)
+        s = self._lock()
+        stats.apply(stats.series_deltas(s, sign=-1))
         s.bans.all().delete()
         s.rounds.all().delete()
+        s.actions.all().delete()
         s.ruleset = ""
         s.series_type = ""
         s.round_index = 0
         s.ban_index = 0
+        s.action_seq = 0
+        s.map_pool = None
         s.turn = {}
         s.state = SeriesState.IDLE
-        s.save(update_fields=["ruleset","series_type","round_index","ban_index","turn","state"])
+        self._commit(s, "ruleset", "series_type", "map_pool", "round_index", "ban_index", "action_seq", "turn", "state")
         return s
\ No newline at end of file
@@ -0,0 +1,29 @@
+# server/veto/management/commands/archive_series.py
+import time
+
+from django.core.management.base import BaseCommand
+from veto.archive import archive_finished
+
+
+class Command(BaseCommand):
+    help = "Move finished series older than N days into the SeriesArchive cold store."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=90)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--max-batches", type=int, default=None,
+                            help="Stop after this many batches per run")
+        parser.add_argument("--every", type=int, default=0, metavar="SECONDS",
+                            help="Scheduled mode: repeat the run every SECONDS (0 = run once)")
+
+    def handle(self, *args, **options):
+        while True:
+            archived = archive_finished(
+                options["older_than_days"],
+                batch_size=options["batch_size"],
+                max_batches=options["max_batches"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Archived {archived} series."))
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
@@ -0,0 +1,14 @@
+# server/veto/management/commands/backfill_map_stats.py
+from django.core.management.base import BaseCommand
+from veto import stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the MapStat ban/pick rollup from stored series bans and picks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        buckets = stats.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt map stats: {buckets} buckets."))
@@ -0,0 +1,77 @@
+# server/veto/management/commands/bench_http.py
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Closed-loop HTTP load test: N concurrent keep-alive clients against one or more URLs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+", help="e.g. http://127.0.0.1:8000/api/series/")
+        parser.add_argument("--clients", type=int, default=200)
+        parser.add_argument("--duration", type=float, default=20.0, help="Seconds to measure")
+        parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unmeasured warm-up")
+        parser.add_argument("--timeout", type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        targets = [urlsplit(u) for u in options["urls"]]
+        if any(t.scheme != "http" or not t.hostname for t in targets):
+            raise CommandError("Only http:// URLs are supported")
+
+        latencies, errors, lock = [], [0], threading.Lock()
+        start_at = time.monotonic() + options["warmup"]
+        stop_at = start_at + options["duration"]
+
+        def client(n):
+            conn, i = None, n
+            while time.monotonic() < stop_at:
+                t = targets[i % len(targets)]
+                i += 1
+                began = time.monotonic()
+                try:
+                    if conn is None:
+                        conn = http.client.HTTPConnection(t.hostname, t.port or 80, timeout=options["timeout"])
+                    conn.request("GET", t.path + (f"?{t.query}" if t.query else ""))
+                    response = conn.getresponse()
+                    response.read()
+                    ok = response.status < 400
+                    if response.getheader("Connection", "").lower() == "close":
+                        conn.close()
+                        conn = None
+                except (OSError, http.client.HTTPException):
+                    ok = False
+                    if conn is not None:
+                        conn.close()
+                    conn = None
+                ended = time.monotonic()
+                if began >= start_at and ended <= stop_at:
+                    with lock:
+                        if ok:
+                            latencies.append(ended - began)
+                        else:
+                            errors[0] += 1
+            if conn is not None:
+                conn.close()
+
+        threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(options["clients"])]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+
+        if not latencies:
+            raise CommandError(f"No successful requests ({errors[0]} errors)")
+        latencies.sort()
+        pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        self.stdout.write(
+            f"clients={options['clients']} duration={options['duration']:.0f}s "
+            f"requests={len(latencies)} errors={errors[0]} "
+            f"rps={len(latencies) / options['duration']:.1f} "
+            f"p50={pct(0.50):.0f}ms p95={pct(0.95):.0f}ms p99={pct(0.99):.0f}ms "
+            f"mean={statistics.fmean(latencies) * 1000:.0f}ms"
+        )
@@ -0,0 +1,70 @@
+# server/veto/management/commands/bench_payloads.py
+import gzip
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from veto import cache, renderers
+from veto.models import Series, SeriesState
+from veto.views import MapModeComboView, MapModeGroupedView
+
+
+def _per_call_us(fn, loops, repeat):
+    """Median over `repeat` runs of the mean time of one call, in microseconds."""
+    runs = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        runs.append((time.perf_counter() - began) / loops * 1e6)
+    return statistics.median(runs)
+
+
+class Command(BaseCommand):
+    help = (
+        "Payload size and encode/decode time of JSON (the DRF JSONRenderer) vs MessagePack "
+        "(veto.renderers) on series detail and combo catalog payloads from the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", type=int, help="Series id (default: the latest completed series)")
+        parser.add_argument("--loops", type=int, default=2000, help="Calls per timing run")
+        parser.add_argument("--repeat", type=int, default=5, help="Timing runs; the median is reported")
+
+    def handle(self, *args, **options):
+        if renderers.msgpack is None:
+            raise CommandError("msgpack is not installed")
+        series_id = options["series"] or (
+            Series.objects.filter(state=SeriesState.SERIES_COMPLETE).order_by("-series_type", "-pk")
+            .values_list("pk", flat=True).first()
+        )
+        if series_id is None:
+            raise CommandError("No completed series: pass --series or run `manage.py bench_veto_flow --keep`")
+
+        payloads = {
+            f"series {series_id}": cache.build_series_snapshot(series_id),
+            "combos": MapModeComboView.build(None, None),
+            "combos grouped": MapModeGroupedView.build(None, None),
+        }
+        json_renderer, msgpack_renderer = JSONRenderer(), renderers.MessagePackRenderer()
+        loops, repeat = options["loops"], options["repeat"]
+
+        self.stdout.write(
+            f"{'payload':<16} {'format':<8} {'bytes':>7} {'gzip':>6} {'encode µs':>10} {'decode µs':>10}"
+        )
+        for name, data in payloads.items():
+            formats = {
+                "json": (lambda: json_renderer.render(data), json.loads),
+                "msgpack": (lambda: msgpack_renderer.render(data), renderers.unpackb),
+            }
+            for fmt, (encode, decode) in formats.items():
+                body = encode()
+                assert decode(body) == json.loads(json_renderer.render(data)), f"{fmt} round trip of {name}"
+                self.stdout.write(
+                    f"{name:<16} {fmt:<8} {len(body):>7} {len(gzip.compress(body)):>6} "
+                    f"{_per_call_us(encode, loops, repeat):>10.1f} "
+                    f"{_per_call_us(lambda: decode(body), loops, repeat):>10.1f}"
+                )
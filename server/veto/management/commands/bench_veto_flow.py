@@ -0,0 +1,118 @@
+# server/veto/management/commands/bench_veto_flow.py
+import multiprocessing
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from veto import pools
+from veto.machine_tsd import TSDMachine, TSDMachineError
+from veto.models import Map, Series
+
+COMMANDS = {
+    ("BAN", "OBJECTIVE_COMBO"): lambda m, mv: m.ban_objective_combo(mv.team, mv.mode_id, mv.map_id),
+    ("BAN", "SLAYER_MAP"): lambda m, mv: m.ban_slayer_map(mv.team, mv.map_id),
+    ("PICK", "OBJECTIVE_COMBO"): lambda m, mv: m.pick_objective_combo(mv.team, mv.mode_id, mv.map_id),
+    ("PICK", "SLAYER_MAP"): lambda m, mv: m.pick_slayer_map(mv.team, mv.map_id),
+}
+
+
+def _timed(results, name, fn):
+    began = time.perf_counter()
+    fn()
+    results["latency"][name].append((time.perf_counter() - began) * 1000)
+
+
+def _writer(n, series_count, series_type, seed):
+    """One writer process: drive `series_count` series through the full veto, one command at a time."""
+    connections.close_all()  # never reuse the parent's connection after fork
+    rng = random.Random(seed + n)
+    results = {"latency": defaultdict(list), "errors": Counter(), "completed": 0, "series": []}
+    for _ in range(series_count):
+        try:
+            s = Series.objects.create(team_a=f"Writer {n} A", team_b=f"Writer {n} B")
+            results["series"].append(s.pk)
+            m = TSDMachine(s.pk)
+            _timed(results, "assign_roles", lambda: m.assign_roles(s.team_a, s.team_b))
+            _timed(results, "confirm_tsd", lambda: m.confirm_tsd(series_type))
+            while True:
+                s.refresh_from_db(fields=["turn", "series_type", "map_pool", "state"])
+                moves = pools.series_legal_moves(s)
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                action = s.turn["action"]
+                _timed(results, f"{action.lower()}", lambda: COMMANDS[(action, move.kind)](m, move))
+            results["completed"] += 1
+        except OperationalError as e:
+            results["errors"][f"OperationalError: {e}"] += 1
+        except TSDMachineError as e:
+            results["errors"][f"{type(e).__name__}: {e}"] += 1
+    connections.close_all()
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent-writer benchmark of the full veto flow (assign, confirm, 7 bans, picks) through "
+        "TSDMachine, one process per writer. Writes series and map stats into the configured database: "
+        "point DATABASE_URL at a scratch copy. Created series are deleted afterwards unless --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8, help="Concurrent writer processes")
+        parser.add_argument("--series", type=int, default=10, help="Series per writer")
+        parser.add_argument("--series-type", default="Bo5", choices=["Bo3", "Bo5", "Bo7"])
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true", help="Keep the created series")
+
+    def handle(self, *args, **options):
+        if not Map.objects.exists():
+            raise CommandError("The catalog is empty: run `manage.py seed_hcs` first")
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                journal = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+            profile = f"sqlite journal_mode={journal} transaction_mode={connection.transaction_mode or 'DEFERRED'}"
+        else:
+            profile = connection.vendor
+        connections.close_all()
+
+        writers = options["writers"]
+        began = time.perf_counter()
+        with ProcessPoolExecutor(writers, mp_context=multiprocessing.get_context("fork")) as pool:
+            parts = list(pool.map(
+                _writer, range(writers), [options["series"]] * writers,
+                [options["series_type"]] * writers, [options["seed"]] * writers,
+            ))
+        elapsed = time.perf_counter() - began
+
+        latency, errors, created = defaultdict(list), Counter(), []
+        for part in parts:
+            for name, values in part["latency"].items():
+                latency[name].extend(values)
+            errors.update(part["errors"])
+            created.extend(part["series"])
+        completed = sum(part["completed"] for part in parts)
+        commands = sum(len(v) for v in latency.values())
+
+        self.stdout.write(
+            f"{profile} writers={writers} series={completed}/{writers * options['series']} "
+            f"commands={commands} errors={sum(errors.values())} elapsed={elapsed:.1f}s "
+            f"commands/s={commands / elapsed:.1f} series/s={completed / elapsed:.2f}"
+        )
+        for name, values in sorted(latency.items()):
+            values.sort()
+            pct = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+            self.stdout.write(
+                f"  {name:<13} n={len(values):<5} p50={pct(0.50):.1f}ms p95={pct(0.95):.1f}ms "
+                f"p99={pct(0.99):.1f}ms max={values[-1]:.1f}ms mean={statistics.fmean(values):.1f}ms"
+            )
+        for message, n in errors.most_common():
+            self.stdout.write(self.style.WARNING(f"  {n} × {message}"))
+
+        if not options["keep"]:
+            Series.objects.filter(pk__in=created).delete()
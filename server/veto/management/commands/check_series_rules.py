@@ -0,0 +1,116 @@
+# server/veto/management/commands/check_series_rules.py
+import json
+import multiprocessing
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# Pool processes are spawned (see run_jobs) and unpickle `_check` by importing this module before
+# django.setup(): import veto lazily.
+_catalogs = None
+
+
+def _init_process():
+    global _catalogs
+    django.setup()
+    from veto.integrity import Catalogs
+    _catalogs = Catalogs()
+
+
+def _check(lo, hi, mode):
+    from veto import integrity
+
+    result = integrity.check_shard(lo, hi, _catalogs)
+    if mode == "flag":
+        integrity.flag(result)
+    elif mode == "repair":
+        result.repaired = integrity.repair(result)
+    connections.close_all()
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay every stored series' bans and picks against the TSD rules (veto/integrity.py) and write "
+        "the violations to an NDJSON report. Series ids are sharded over a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--report", default="-", help="NDJSON report path ('-' = stdout)")
+        parser.add_argument("--processes", type=int, default=None,
+                            help="Pool size (default JOB_WORKERS); 0 checks in this process")
+        parser.add_argument("--shard-size", type=int, default=20000, help="Series ids per shard")
+        parser.add_argument("--from-id", type=int, default=None)
+        parser.add_argument("--to-id", type=int, default=None, help="Exclusive")
+        action = parser.add_mutually_exclusive_group()
+        action.add_argument("--flag", action="store_true",
+                            help="Set needs_review on violating series (and clear it on the others)")
+        action.add_argument("--repair", action="store_true",
+                            help="Cut violating series back to their last legal move, then queue a "
+                                 "backfill_map_stats job")
+
+    def handle(self, *args, **options):
+        if options["shard_size"] < 1:
+            raise CommandError("--shard-size must be positive")
+        from veto import integrity, jobs
+
+        mode = "repair" if options["repair"] else "flag" if options["flag"] else "check"
+        processes = settings.JOB_WORKERS if options["processes"] is None else options["processes"]
+        shards = integrity.id_shards(options["shard_size"], options["from_id"], options["to_id"])
+
+        began = time.perf_counter()
+        checked = bad = repaired = 0
+        errors = Counter()
+        report = sys.stdout if options["report"] == "-" else open(options["report"], "w", encoding="utf-8")
+        try:
+            for result in self._results(shards, mode, processes):
+                checked += result.checked
+                bad += len(result.bad)
+                repaired += result.repaired
+                for c in result.bad:
+                    report.write(json.dumps(c.as_dict()) + "\n")
+                    # Count by rule: the detail after a colon varies per series
+                    errors.update(f"{v.phase}: {v.error.split(':')[0]}" for v in c.violations)
+        finally:
+            if report is not sys.stdout:
+                report.close()
+        elapsed = time.perf_counter() - began
+
+        out = self.stderr if options["report"] == "-" else self.stdout
+        out.write(
+            f"Checked {checked} series in {len(shards)} shards, {bad} with violations, "
+            f"{elapsed:.1f}s ({checked / elapsed if elapsed else 0:.0f} series/s)."
+        )
+        for error, n in errors.most_common(20):
+            out.write(f"  {n} × {error}")
+        if repaired:
+            job = jobs.enqueue("backfill_map_stats")
+            out.write(f"Repaired {repaired} series; queued backfill_map_stats job #{job.pk}.")
+
+    def _results(self, shards, mode, processes):
+        """ShardResults as shards finish (in-process, in id order, with --processes 0)."""
+        if processes < 1:
+            from veto.integrity import Catalogs, check_shard, flag, repair
+
+            catalogs = Catalogs()
+            for lo, hi in shards:
+                result = check_shard(lo, hi, catalogs)
+                if mode == "flag":
+                    flag(result)
+                elif mode == "repair":
+                    result.repaired = repair(result)
+                yield result
+            return
+
+        connections.close_all()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(processes, mp_context=context, initializer=_init_process) as pool:
+            futures = [pool.submit(_check, lo, hi, mode) for lo, hi in shards]
+            for future in as_completed(futures):
+                yield future.result()
@@ -0,0 +1,42 @@
+# server/veto/management/commands/import_series.py
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from veto.imports import import_documents
+
+
+class Command(BaseCommand):
+    help = "Import historical series from an NDJSON file (one series document per line)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file, or '-' for stdin")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Documents per bulk insert / transaction")
+        parser.add_argument("--rejects", default=None,
+                            help="Write rejected documents (line + errors) to this NDJSON file")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        try:
+            src = sys.stdin if options["path"] == "-" else open(options["path"], encoding="utf-8")
+        except OSError as e:
+            raise CommandError(str(e))
+        with src:
+            result = import_documents(
+                src,
+                batch_size=options["batch_size"],
+                progress=lambda n: self.stdout.write(f"... {n} lines read"),
+            )
+
+        if options["rejects"]:
+            with open(options["rejects"], "w", encoding="utf-8") as out:
+                for row in result.rejected:
+                    out.write(json.dumps(row) + "\n")
+        else:
+            for row in result.rejected:
+                self.stderr.write(f"line {row['line']}: {'; '.join(row['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} series, rejected {len(result.rejected)}."
+        ))
@@ -0,0 +1,16 @@
+# server/veto/management/commands/profile_token.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from veto.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed X-Veto-Profile header value that profiles the requests carrying it."
+
+    def handle(self, *args, **options):
+        if not settings.PROFILE_DIR:
+            self.stderr.write(self.style.WARNING("PROFILE_DIR is not set: the profiler is disabled."))
+        self.stdout.write(make_token())
+        self.stderr.write(f"Valid for {settings.PROFILE_TOKEN_MAX_AGE} s with this SECRET_KEY, e.g.\n"
+                          f"  curl -H 'X-Veto-Profile: <token>' https://.../api/series/42/")
@@ -0,0 +1,88 @@
+# server/veto/management/commands/run_jobs.py
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+# Pool processes are spawned, not forked, so no database connection or lock is inherited from this
+# one. They unpickle `_run` by importing this module before django.setup(): import veto lazily.
+
+
+def _init_process():
+    django.setup()
+
+
+def _run(job_id):
+    from veto import jobs
+
+    close_old_connections()
+    try:
+        return jobs.run(job_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Background job worker: claims queued jobs and runs them on a process pool (see veto/jobs.py). "
+        "--processes 0 runs them in this process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=None,
+                            help="Pool size (default JOB_WORKERS); 0 runs jobs in this process")
+        parser.add_argument("--once", action="store_true", help="Exit when no job is due")
+
+    def handle(self, *args, **options):
+        from veto import jobs
+
+        processes = settings.JOB_WORKERS if options["processes"] is None else options["processes"]
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs."))
+
+        running = True
+
+        def stop(*_):
+            nonlocal running
+            running = False
+
+        signal.signal(signal.SIGTERM, stop)
+        if processes < 1:
+            while running:
+                if not jobs.run_pending(worker) and options["once"]:
+                    break
+                if not options["once"]:
+                    time.sleep(settings.JOB_POLL_SECONDS)
+            return
+
+        context = multiprocessing.get_context("spawn")
+        inflight = {}
+        try:
+            with ProcessPoolExecutor(processes, mp_context=context, initializer=_init_process) as pool:
+                while running or inflight:
+                    while running and len(inflight) < processes and (job := jobs.claim(worker)) is not None:
+                        inflight[pool.submit(_run, job.pk)] = job
+                    if not inflight:
+                        if options["once"]:
+                            break
+                        time.sleep(settings.JOB_POLL_SECONDS)
+                        continue
+                    done, _ = wait(inflight, timeout=settings.JOB_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = inflight.pop(future)
+                        self.stdout.write(f"{job.kind} #{job.pk}: {future.result()}")
+        except BrokenProcessPool as e:
+            # A pool process died (OOM kill, segfault): its jobs count as a failed attempt
+            for job in inflight.values():
+                jobs.retry_or_fail(job, f"Worker process died: {e}")
+            raise CommandError(f"Job worker pool broke: {e}")
@@ -0,0 +1,55 @@
+# server/veto/management/commands/run_turn_clock.py
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from veto import clocks
+from veto.machine_tsd import TSDMachine
+from veto.models import Series
+
+
+def expire(series_id, version):
+    close_old_connections()
+    try:
+        return TSDMachine(series_id).expire_turn(version)
+    except Series.DoesNotExist:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Turn clock scheduler: applies TURN_TIMEOUT_FALLBACK when a team runs out of TURN_SECONDS. "
+        "Run exactly one per deployment; see veto/clocks.py."
+    )
+
+    def handle(self, *args, **options):
+        if settings.TURN_TIMEOUT_FALLBACK not in clocks.FALLBACKS:
+            raise CommandError(f"TURN_TIMEOUT_FALLBACK must be one of: {', '.join(clocks.FALLBACKS)}")
+        # Listen before loading, so no deadline committed in between is missed
+        source = clocks.listener()
+        clock = clocks.TurnClock(expire)
+        live = Series.objects.filter(turn_deadline__isnull=False).values_list("pk", "version", "turn_deadline")
+        for pk, version, deadline in live.iterator():
+            clock.schedule(pk, version, deadline.timestamp())
+        self.stdout.write(f"turn clock: {len(clock)} live deadlines, TURN_SECONDS={settings.TURN_SECONDS}")
+
+        running = True
+
+        def stop(*_):
+            nonlocal running
+            running = False
+
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            while running:
+                for payload in source.wait(clock.next_timeout(idle=1.0)):
+                    clock.receive(payload)
+                expired = clock.fire_due()
+                if expired:
+                    self.stdout.write(f"turn clock: {expired} expired, {len(clock)} live deadlines")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            source.close()
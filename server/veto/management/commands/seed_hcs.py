@@ -1,73 +1,22 @@
 # server/veto/management/commands/seed_hcs.py
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from veto.models import Map, GameMode as Mode  # Mode has fields: name (unique), is_objective (bool)
+from django.core.management.base import BaseCommand, CommandError
+from veto import pools
+from veto.catalog import DEFAULT_CATALOG, CatalogError, load_file, sync
+from veto.models import MapPool
 
-OFFICIAL = {
-    "Slayer": [
-        "Aquarius", "Live Fire", "Origin", "Recharge", "Solitude", "Streets",
-    ],
-    "Capture the Flag": [
-        "Aquarius", "Forbidden", "Fortress", "Origin",
-    ],
-    "King of the Hill": [
-        "Live Fire", "Recharge", "Lattice",
-    ],
-    "Oddball": [
-        "Live Fire", "Recharge", "Lattice",  # added
-    ],
-    "Strongholds": [
-        "Live Fire", "Recharge", "Lattice",  # added
-    ],
-    "Neutral Bomb": [
-        "Aquarius"
-    ],
-}
-
-def is_objective_mode(mode_name: str) -> bool:
-    return mode_name != "Slayer"
 
 class Command(BaseCommand):
     help = "Seed ONLY the official HCS 2025 maps & modes (+ Lattice: KOTH, Oddball, Strongholds)."
 
-    @transaction.atomic
     def handle(self, *args, **kwargs):
-        # Create/ensure modes
-        mode_objs = {}
-        for mode_name in OFFICIAL.keys():
-            obj, _ = Mode.objects.update_or_create(
-                name=mode_name,
-                defaults={"is_objective": is_objective_mode(mode_name)}
-            )
-            mode_objs[mode_name] = obj
-
-        # Create/ensure maps & exact combos
-        required_maps = set()
-        for mode_name, maps in OFFICIAL.items():
-            for map_name in maps:
-                required_maps.add(map_name)
-
-        # Create maps
-        map_objs = {}
-        for map_name in required_maps:
-            m, _ = Map.objects.get_or_create(name=map_name)
-            map_objs[map_name] = m
-
-        # Assign EXACT modes to each map (clear any others)
-        # Build reverse index Map -> [Modes]
-        map_to_modes = {mn: [] for mn in required_maps}
-        for mode_name, maps in OFFICIAL.items():
-            for map_name in maps:
-                map_to_modes[map_name].append(mode_objs[mode_name])
-
-        # apply sets
-        for map_name, modes in map_to_modes.items():
-            m = map_objs[map_name]
-            m.modes.set(modes)  # overwrites to be exact
-            m.save()
-
-        # Remove any maps and modes not in OFFICIAL
-        Map.objects.exclude(name__in=required_maps).delete()
-        Mode.objects.exclude(name__in=OFFICIAL.keys()).delete()
-
-        self.stdout.write(self.style.SUCCESS("Seeded official HCS 2025 maps & modes (+ Lattice)."))
+        # The pool lives in veto/data/hcs_2025.json; maps and modes not in it are removed
+        try:
+            plan, _ = sync(load_file(DEFAULT_CATALOG))
+        except CatalogError as e:
+            raise CommandError(str(e))
+        # New series are pinned to the published season pool
+        if not MapPool.objects.filter(label=plan.label).exists():
+            pools.publish(plan.label)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded official HCS 2025 maps & modes (+ Lattice) ({len(list(plan.lines()))} changes)."
+        ))
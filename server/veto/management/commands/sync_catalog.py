@@ -0,0 +1,50 @@
+# server/veto/management/commands/sync_catalog.py
+from django.core.management.base import BaseCommand, CommandError
+from veto import pools
+from veto.catalog import DEFAULT_CATALOG, CatalogError, apply, load_file, plan
+from veto.models import MapPool
+
+
+class Command(BaseCommand):
+    help = "Sync maps, modes and map/mode combos to a versioned catalog file (JSON or YAML)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default=str(DEFAULT_CATALOG))
+        parser.add_argument("--dry-run", action="store_true", help="Print the plan without applying it")
+        parser.add_argument("--no-prune", action="store_true",
+                            help="Keep maps, modes and combos that are not in the file")
+        parser.add_argument("--publish", action="store_true",
+                            help="Freeze the synced catalog as an immutable map pool labelled with the file version")
+
+    def handle(self, *args, **options):
+        try:
+            data = load_file(options["path"])
+            p = plan(data, prune=not options["no_prune"])
+        except (OSError, ValueError, CatalogError) as e:
+            raise CommandError(str(e))
+
+        published = options["publish"] and MapPool.objects.filter(label=p.label).exists()
+        if options["publish"]:
+            if not p.label:
+                raise CommandError("Publishing needs a 'version' in the catalog file")
+            if published and not p.is_empty():
+                raise CommandError(f"Pool {p.label} is already published and immutable; bump the file version")
+
+        for line in p.lines():
+            self.stdout.write(line)
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run: no changes applied."))
+            return
+
+        try:
+            version = apply(p)
+        except CatalogError as e:
+            raise CommandError(str(e))
+        if version is None:
+            self.stdout.write(self.style.SUCCESS("Catalog already up to date."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Applied catalog {p.label or '(unlabelled)'} as version {version.id}."))
+
+        if options["publish"] and not published:
+            pool = pools.publish(p.label)
+            self.stdout.write(self.style.SUCCESS(f"Published map pool {pool.label} (#{pool.id})."))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:09
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_repeated_moves(apps, schema_editor):
+    # Older writers could store a ban or pick twice; the constraints below would fail on those rows.
+    # Keep the earliest of each repeat (bans: delete the rest, rounds: clear the later picks) and name
+    # the series, whose position is then off: `manage.py check_series_rules --repair` recomputes it.
+    SeriesBan = apps.get_model('veto', 'SeriesBan')
+    SeriesRound = apps.get_model('veto', 'SeriesRound')
+    repeats = [
+        (SeriesBan, 'step_index', models.Q(kind='OBJECTIVE_COMBO'), ('series', 'objective_mode', 'map')),
+        (SeriesBan, 'step_index', models.Q(kind='SLAYER_MAP'), ('series', 'map')),
+        (SeriesRound, 'order', models.Q(pick_map__isnull=False), ('series', 'pick_map', 'mode')),
+        (SeriesRound, 'order', models.Q(pick_map__isnull=False, slot_type='SLAYER'), ('series', 'pick_map')),
+    ]
+    touched = set()
+    for model, position, condition, fields in repeats:
+        groups = (
+            model.objects.filter(condition).values(*fields).order_by()
+            .annotate(n=Count('pk'), first=Min(position)).filter(n__gt=1)
+        )
+        for group in groups:
+            first = group.pop('first')
+            group.pop('n')
+            later = model.objects.filter(condition, **group).exclude(**{position: first})
+            if model is SeriesBan:
+                later.delete()
+            else:
+                later.update(pick_map=None, mode=None, pick_by='', locked=False)
+            touched.add(group['series'])
+    if touched:
+        print(f"\n  Dropped repeated bans/picks in series {', '.join(map(str, sorted(touched)))}; "
+              "run `manage.py check_series_rules --repair`")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0003_series_ban_index_series_round_index_series_ruleset_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_repeated_moves, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='seriesban',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'OBJECTIVE_COMBO')), fields=('series', 'objective_mode', 'map'), name='uniq_ban_objective_combo'),
+        ),
+        migrations.AddConstraint(
+            model_name='seriesban',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'SLAYER_MAP')), fields=('series', 'map'), name='uniq_ban_slayer_map'),
+        ),
+        migrations.AddConstraint(
+            model_name='seriesround',
+            constraint=models.UniqueConstraint(condition=models.Q(('pick_map__isnull', False)), fields=('series', 'pick_map', 'mode'), name='uniq_round_pick_combo'),
+        ),
+        migrations.AddConstraint(
+            model_name='seriesround',
+            constraint=models.UniqueConstraint(condition=models.Q(('pick_map__isnull', False), ('slot_type', 'SLAYER')), fields=('series', 'pick_map'), name='uniq_round_slayer_map'),
+        ),
+    ]
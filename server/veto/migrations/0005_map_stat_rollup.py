@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0004_series_rule_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('team', models.CharField(max_length=64)),
+                ('action', models.CharField(choices=[('BAN', 'Ban'), ('PICK', 'Pick')], max_length=8)),
+                ('count', models.IntegerField(default=0)),
+                ('map', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='veto.map')),
+                ('mode', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='veto.gamemode')),
+            ],
+            options={
+                'ordering': ['day', 'map', 'mode'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'map', 'mode', 'team', 'action'), name='uniq_map_stat_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0005_map_stat_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeriesArchive',
+            fields=[
+                ('series_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('team_a', models.CharField(max_length=64)),
+                ('team_b', models.CharField(max_length=64)),
+                ('state', models.CharField(choices=[('IDLE', 'Idle'), ('SERIES_SETUP', 'Series Setup'), ('BAN_PHASE', 'Ban Phase'), ('PICK_WINDOW', 'Pick Window'), ('SERIES_COMPLETE', 'Series Complete'), ('ABORTED', 'Aborted')], max_length=32)),
+                ('series_type', models.CharField(blank=True, default='', max_length=8)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('document', models.JSONField()),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:13
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def seed_action_seq(apps, schema_editor):
+    # Start each counter at the highest step already used by the series
+    Series = apps.get_model('veto', 'Series')
+    Action = apps.get_model('veto', 'Action')
+    last_step = (
+        Action.objects.filter(series=OuterRef('pk')).order_by()
+        .values('series').annotate(m=Max('step')).values('m')
+    )
+    Series.objects.update(action_seq=Coalesce(Subquery(last_step), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0006_series_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='series',
+            name='action_seq',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(seed_action_seq, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0007_series_action_seq'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='series',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
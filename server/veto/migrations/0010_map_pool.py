@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0009_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapPool',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=64, unique=True)),
+                ('document', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='series',
+            name='map_pool',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='series', to='veto.mappool'),
+        ),
+    ]
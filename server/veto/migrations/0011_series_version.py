@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0010_map_pool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='series',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
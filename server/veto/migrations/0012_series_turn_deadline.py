@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0011_series_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='series',
+            name='turn_deadline',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
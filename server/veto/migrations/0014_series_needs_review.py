@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0013_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='series',
+            name='needs_review',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
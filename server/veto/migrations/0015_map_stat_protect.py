@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veto', '0014_series_needs_review'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mapstat',
+            name='map',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='veto.map'),
+        ),
+        migrations.AlterField(
+            model_name='mapstat',
+            name='mode',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='veto.gamemode'),
+        ),
+    ]
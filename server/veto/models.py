@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
 class GameMode(models.Model):
     """Optional: normalize game modes (Slayer, CTF, Strongholds, Oddball, KOTH, etc.)"""
@@ -42,7 +44,8 @@ class Map(models.Model):
 class Series(models.Model):
     team_a = models.CharField(max_length=64)
     team_b = models.CharField(max_length=64)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # default rather than auto_now_add so bulk imports can keep historical dates
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     # --- State machine fields (TSD $8s ruleset) ---
     state = models.CharField(max_length=32, choices=SeriesState.choices, default=SeriesState.IDLE)
@@ -51,6 +54,12 @@ class Series(models.Model):
     round_index = models.PositiveIntegerField(default=0)
     ban_index = models.PositiveIntegerField(default=0)
     turn = models.JSONField(default=dict, blank=True)  # {"team":"A|B","action":"BAN|PICK","kind":"OBJECTIVE_COMBO|SLAYER_MAP"}
+    turn_deadline = models.DateTimeField(null=True, blank=True, db_index=True)  # turn clock, see veto/clocks.py
+    needs_review = models.BooleanField(default=False, db_index=True)  # set by `check_series_rules --flag`
+    action_seq = models.PositiveIntegerField(default=0)  # last Action.step handed out, see next_action_step()
+    version = models.PositiveIntegerField(default=0)  # bumped by every committed change; keys cached snapshots
+    # Frozen map pool the series is played on; pinned at confirm_tsd (null = live catalog)
+    map_pool = models.ForeignKey('MapPool', null=True, blank=True, on_delete=models.PROTECT, related_name='series')
 
     class Meta:
         ordering = ['-created_at']
@@ -58,6 +67,11 @@ class Series(models.Model):
     def __str__(self):
         return f"{self.team_a} vs {self.team_b} (#{self.id})"
 
+    @classmethod
+    def touch(cls, pk):
+        """Bump the version of a series changed outside TSDMachine (admin edits, Action rows)."""
+        cls.objects.filter(pk=pk).update(version=models.F('version') + 1)
+
 # ---- SeriesRound and SeriesBan models ----
 class SeriesRound(models.Model):
     """
@@ -77,6 +91,20 @@ class SeriesRound(models.Model):
     class Meta:
         unique_together = ('series', 'order')
         ordering = ['order']
+        constraints = [
+            # The exact Map + Mode can only be picked once per series
+            models.UniqueConstraint(
+                fields=['series', 'pick_map', 'mode'],
+                condition=models.Q(pick_map__isnull=False),
+                name='uniq_round_pick_combo',
+            ),
+            # A map can only be used once for Slayer (it may still be used for Objective)
+            models.UniqueConstraint(
+                fields=['series', 'pick_map'],
+                condition=models.Q(slot_type='SLAYER', pick_map__isnull=False),
+                name='uniq_round_slayer_map',
+            ),
+        ]
 
     def __str__(self):
         base = f"Game {self.order + 1}: {self.slot_type}"
@@ -101,12 +129,53 @@ class SeriesBan(models.Model):
     class Meta:
         unique_together = ('series', 'step_index')
         ordering = ['step_index', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['series', 'objective_mode', 'map'],
+                condition=models.Q(kind='OBJECTIVE_COMBO'),
+                name='uniq_ban_objective_combo',
+            ),
+            models.UniqueConstraint(
+                fields=['series', 'map'],
+                condition=models.Q(kind='SLAYER_MAP'),
+                name='uniq_ban_slayer_map',
+            ),
+        ]
 
     def __str__(self):
         if self.kind == BanKind.SLAYER_MAP:
             return f"{self.by_team} banned Slayer on {self.map.name} (step {self.step_index})"
         return f"{self.by_team} banned {self.objective_mode.name if self.objective_mode_id else 'Objective'} on {self.map.name} (step {self.step_index})"
 
+def next_action_step(series_id: int) -> int:
+    """
+    Allocate the next Action.step for a series from Series.action_seq (and bump Series.version).
+    The counter is bumped and read back by a single UPDATE ... RETURNING, which also row-locks the series
+    for the rest of the transaction, so concurrent inserts can never share a step.
+    """
+    alias = router.db_for_write(Series)
+    conn = connections[alias]
+    if conn.vendor in ("postgresql", "sqlite") and conn.features.can_return_columns_from_insert:
+        qn = conn.ops.quote_name
+        sql = (
+            f"UPDATE {qn(Series._meta.db_table)} SET {qn('action_seq')} = {qn('action_seq')} + 1, "
+            f"{qn('version')} = {qn('version')} + 1 WHERE {qn('id')} = %s RETURNING {qn('action_seq')}"
+        )
+        with conn.cursor() as cursor:
+            cursor.execute(sql, [series_id])
+            row = cursor.fetchone()
+        if row is None:
+            raise Series.DoesNotExist(f"Series {series_id} does not exist")
+        return row[0]
+    # Backends without UPDATE ... RETURNING: same lock, one extra read
+    with transaction.atomic(using=alias):
+        updated = Series.objects.using(alias).filter(pk=series_id).update(
+            action_seq=models.F('action_seq') + 1, version=models.F('version') + 1,
+        )
+        if not updated:
+            raise Series.DoesNotExist(f"Series {series_id} does not exist")
+        return Series.objects.using(alias).values_list('action_seq', flat=True).get(pk=series_id)
+
 class Action(models.Model):
     BAN = 'ban'
     PICK = 'pick'
@@ -134,10 +203,153 @@ class Action(models.Model):
         if not self.action_type:
             self.action_type = Action.BAN
         if not self.step:
-            # Next step for this series: max(step) + 1
-            last = Action.objects.filter(series=self.series).order_by('-step').first()
-            self.step = (last.step if last else 0) + 1
+            self.step = next_action_step(self.series_id)
+        else:
+            # An explicit step also moves the counter past it, so later allocations cannot collide
+            Series.objects.filter(pk=self.series_id).update(
+                action_seq=Greatest(models.F('action_seq'), self.step), version=models.F('version') + 1,
+            )
         super().save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        Series.touch(self.series_id)
+        return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"{self.get_action_type_display()} {self.map.name} {self.mode.name} (step {self.step})"
+
+class StatAction(models.TextChoices):
+    BAN = "BAN", "Ban"
+    PICK = "PICK", "Pick"
+
+class MapStat(models.Model):
+    """
+    Daily rollup of bans/picks per map, mode and team (bucketed by the series' creation day).
+    Maintained incrementally by TSDMachine via veto.stats; rebuilt by `manage.py backfill_map_stats`.
+    Slayer bans are attributed to the Slayer mode.
+    """
+    day = models.DateField()
+    # PROTECT: the rollup is the only ban/pick history left for archived series
+    map = models.ForeignKey('Map', on_delete=models.PROTECT, related_name='+')
+    mode = models.ForeignKey('GameMode', on_delete=models.PROTECT, related_name='+')
+    team = models.CharField(max_length=64)
+    action = models.CharField(max_length=8, choices=StatAction.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['day', 'map', 'mode']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'map', 'mode', 'team', 'action'], name='uniq_map_stat_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.action} {self.map_id}/{self.mode_id} {self.team}: {self.count}"
+
+class SeriesArchive(models.Model):
+    """
+    Finished series moved out of the hot tables by `manage.py archive_series`.
+    One write-once row per series; `document` is built by veto.documents.series_document.
+    """
+    series_id = models.BigIntegerField(primary_key=True)
+    team_a = models.CharField(max_length=64)
+    team_b = models.CharField(max_length=64)
+    state = models.CharField(max_length=32, choices=SeriesState.choices)
+    series_type = models.CharField(max_length=8, blank=True, default="")
+    created_at = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    document = models.JSONField()
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Archived series are immutable")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.team_a} vs {self.team_b} (#{self.series_id}, archived)"
+
+class CatalogVersion(models.Model):
+    """
+    One row per applied catalog change (see `manage.py sync_catalog`); the latest id is the current
+    catalog version.
+    """
+    label = models.CharField(max_length=64, blank=True, default="")  # "version" from the data file
+    summary = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    @classmethod
+    def current(cls) -> int:
+        return cls.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def __str__(self):
+        return f"Catalog v{self.id} {self.label}".strip()
+
+class MapPool(models.Model):
+    """
+    Published, immutable snapshot of the catalog (a season). Series pin the pool that was current when
+    they were confirmed, so later catalog edits never change the rules of a series in progress.
+    `document` is rules.Catalog.to_document(); see veto.pools.
+    """
+    label = models.CharField(max_length=64, unique=True)
+    document = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    @classmethod
+    def current_id(cls):
+        return cls.objects.order_by('-id').values_list('id', flat=True).first()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Published map pools are immutable")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Pool {self.label} (#{self.id})"
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = "QUEUED", "Queued"
+    RUNNING = "RUNNING", "Running"
+    SUCCEEDED = "SUCCEEDED", "Succeeded"
+    FAILED = "FAILED", "Failed"
+
+
+class Job(models.Model):
+    """
+    Background work queued with veto.jobs.enqueue and run by `manage.py run_jobs`.
+    `kind` names a function registered in veto.jobs; `params` are its keyword arguments.
+    """
+    kind = models.CharField(max_length=64)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    run_after = models.DateTimeField(default=timezone.now)  # retries back off by pushing this forward
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+
+    # Progress, reported by the running job
+    done = models.PositiveBigIntegerField(default=0)
+    total = models.PositiveBigIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True, default="")
+
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    worker = models.CharField(max_length=64, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [models.Index(fields=['status', 'run_after'], name='job_queue_idx')]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
@@ -0,0 +1,79 @@
+# /veto/pools.py
+"""
+Season map pools: immutable catalog snapshots that series are pinned to at confirm_tsd.
+
+A published pool never changes, so its Catalog is built once per process and kept for the life of
+the process, and its combos can be served with far-future cache headers. Series without a pool
+(confirmed before any pool was published) fall back to the live catalog.
+"""
+from functools import lru_cache
+
+from .models import BanKind, MapPool, Series, SeriesState
+from .rules import Catalog, Move, legal_moves, slot_kind
+
+# States in which a series still resolves moves against its pool
+LIVE_STATES = (SeriesState.BAN_PHASE, SeriesState.PICK_WINDOW)
+
+
+class PoolError(Exception): ...
+
+
+def publish(label: str) -> MapPool:
+    """Freeze the current live catalog as a new pool; later confirm_tsd calls pin to it."""
+    label = label.strip()
+    if not label:
+        raise PoolError("A pool needs a label")
+    if MapPool.objects.filter(label=label).exists():
+        raise PoolError(f"Pool {label!r} is already published")
+    catalog = Catalog.from_db()
+    if not catalog.map_modes or not any(catalog.map_modes.values()):
+        raise PoolError("Cannot publish an empty catalog")
+    return MapPool.objects.create(label=label, document=catalog.to_document())
+
+
+@lru_cache(maxsize=None)
+def pool_catalog(pool_id: int) -> Catalog:
+    # Safe to cache forever: MapPool rows are write-once
+    return Catalog.from_document(MapPool.objects.values_list("document", flat=True).get(pk=pool_id))
+
+
+def catalog_for(series: Series) -> Catalog:
+    if series.map_pool_id:
+        return pool_catalog(series.map_pool_id)
+    return Catalog.from_db()
+
+
+def pinned_ids():
+    """(map ids, mode ids) used by pools that series in progress are pinned to."""
+    map_ids, mode_ids = set(), set()
+    pool_ids = (
+        Series.objects.filter(state__in=LIVE_STATES, map_pool__isnull=False)
+        .values_list("map_pool_id", flat=True).distinct()
+    )
+    for pool_id in pool_ids:
+        catalog = pool_catalog(pool_id)
+        map_ids |= set(catalog.maps)
+        mode_ids |= set(catalog.modes)
+    return map_ids, mode_ids
+
+
+def series_moves(series: Series, catalog: Catalog):
+    """The series' stored bans and picks as rules.Move tuples (two queries)."""
+    slayer_id = catalog.slayer_id
+    bans = [
+        Move(b.by_team, b.kind, b.map_id, slayer_id if b.kind == BanKind.SLAYER_MAP else b.objective_mode_id)
+        for b in series.bans.order_by("step_index", "id")
+    ]
+    picks = [
+        Move(r.pick_by, slot_kind(r.slot_type), r.pick_map_id, r.mode_id)
+        for r in series.rounds.filter(locked=True).order_by("order")
+    ]
+    return bans, picks
+
+
+def series_legal_moves(series: Series):
+    if series.state not in LIVE_STATES:
+        return []
+    catalog = catalog_for(series)
+    bans, picks = series_moves(series, catalog)
+    return legal_moves(catalog, series.series_type, bans, picks)
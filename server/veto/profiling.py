@@ -0,0 +1,173 @@
+# /veto/profiling.py
+"""
+On-demand profiling of single requests in production.
+
+Enable it by setting PROFILE_DIR. A request is then profiled when it carries a valid signed token in
+the `X-Veto-Profile` header (`python manage.py profile_token`), or when it is picked at random with
+probability PROFILE_SAMPLE_RATE. Each profiled request writes three files to PROFILE_DIR, all named
+after the id returned in the `X-Veto-Profile-Id` response header:
+
+- `<id>.prof`    cProfile stats, for `python -m pstats` or snakeviz
+- `<id>.folded`  wall-clock stacks sampled every PROFILE_SAMPLE_INTERVAL seconds, in the collapsed
+                 format read by flamegraph.pl and speedscope
+- `<id>.sql.json` the SQL the request executed, with per-query timings
+
+Without PROFILE_DIR the middleware raises MiddlewareNotUsed, so Django drops it from the chain and
+requests pay nothing.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+log = logging.getLogger(__name__)
+
+HEADER = "HTTP_X_VETO_PROFILE"
+SALT = "veto.profiling"
+
+
+def make_token() -> str:
+    return signing.TimestampSigner(salt=SALT).sign("profile")
+
+
+def token_is_valid(token) -> bool:
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(token, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack on a timer and counts the stacks it sees."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="veto-profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def _short_path(filename):
+    for marker in ("site-packages/", "lib/python"):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    try:
+        return os.path.relpath(filename, settings.BASE_DIR)
+    except ValueError:
+        return filename
+
+
+class QueryRecorder:
+    """connection.execute_wrapper callback that keeps every statement with its duration."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                "alias": context["connection"].alias,
+                "ms": round((time.perf_counter() - start) * 1000, 3),
+                "sql": sql,
+                "params": repr(params)[:500],
+                "many": many,
+            })
+
+
+class ProfileMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.directory = Path(settings.PROFILE_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, request):
+        token = request.META.get(HEADER)
+        if token is not None:
+            if not token_is_valid(token):
+                return self.get_response(request)
+        elif random.random() >= settings.PROFILE_SAMPLE_RATE:
+            return self.get_response(request)
+        return self.profile(request)
+
+    def profile(self, request):
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            sampler.start()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+                sampler.stop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        profile_id = "{}-{}-{}-{}ms-{}".format(
+            time.strftime("%Y%m%dT%H%M%S"), request.method,
+            re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_")[:80] or "root", round(elapsed_ms),
+            uuid.uuid4().hex[:6],
+        )
+        try:
+            self.write(profile_id, profiler, sampler, recorder, request, response, elapsed_ms)
+        except OSError:
+            log.warning("could not write profile %s", profile_id, exc_info=True)
+            return response
+        response["X-Veto-Profile-Id"] = profile_id
+        return response
+
+    def write(self, profile_id, profiler, sampler, recorder, request, response, elapsed_ms):
+        base = self.directory / profile_id
+        profiler.dump_stats(f"{base}.prof")
+        Path(f"{base}.folded").write_text(sampler.folded())
+        Path(f"{base}.sql.json").write_text(json.dumps({
+            "request": f"{request.method} {request.get_full_path()}",
+            "status": response.status_code,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "sql_ms": round(sum(q["ms"] for q in recorder.queries), 3),
+            "queries": recorder.queries,
+        }, indent=2))
+        log.info("profiled %s %s into %s", request.method, request.path, base)
@@ -0,0 +1,216 @@
+# /veto/queryaudit.py
+"""
+N+1 detector and slow-query log.
+
+QueryAudit records every statement executed while it is active, grouped by normalized SQL and by the
+innermost line of project code that issued it (the call site). When the audit closes, it reports:
+
+- repeats: a SELECT issued more than `repeat` times from the same call site (typically an N+1 from a
+  lazy FK such as `rnd.pick_map.name` inside a loop)
+- slow:    any statement slower than `slow_ms`, with the project frames of its stack
+
+It is used three ways:
+
+- `with QueryAudit() as audit: ...; audit.assert_clean()` around any block
+- QueryAuditMiddleware audits each request when QUERY_AUDIT is on (default: DEBUG); findings are logged
+  on `veto.queryaudit`, and QUERY_AUDIT_STRICT turns them into a 500
+- `pytest --query-audit=warn|strict` audits every test-client request (see conftest.py); strict fails
+  the test
+"""
+import logging
+import re
+import sys
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+log = logging.getLogger(__name__)
+
+_SKIP_PARTS = ("site-packages", "/lib/python", "<frozen")
+# Middleware wraps every request; a query is attributed to the code below it, or to Django itself
+_PLUMBING = {"api/middleware.py", "veto/profiling.py", "veto/timing.py", "veto/queryaudit.py"}
+
+
+class QueryAuditError(AssertionError):
+    """Raised by QueryAudit.assert_clean() (and in strict mode) when the audit found problems."""
+
+
+class QueryAuditWarning(UserWarning):
+    """Emitted for audit findings in non-strict test runs."""
+
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*%s\s*,?)+\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(sql: str) -> str:
+    """Statement shape: literals and IN-lists collapsed, so repeats with different ids group together."""
+    sql = _STRING.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def _project_frames(limit=8):
+    """Innermost-first (file, line, function) of frames in project code."""
+    base = str(settings.BASE_DIR)
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < limit:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base) and not any(part in filename for part in _SKIP_PARTS):
+            path = Path(filename).relative_to(base).as_posix()
+            if path not in _PLUMBING:
+                frames.append((path, frame.f_lineno, frame.f_code.co_name))
+        frame = frame.f_back
+    return frames
+
+
+@dataclass
+class QueryGroup:
+    sql: str
+    site: str
+    count: int = 0
+    ms: float = 0.0
+
+
+@dataclass
+class SlowQuery:
+    sql: str
+    ms: float
+    stack: list = field(default_factory=list)
+
+
+class QueryAudit:
+    def __init__(self, repeat=None, slow_ms=None, label=""):
+        self.repeat = settings.QUERY_AUDIT_REPEAT if repeat is None else repeat
+        self.slow_ms = settings.QUERY_AUDIT_SLOW_MS if slow_ms is None else slow_ms
+        self.label = label
+        self.groups = {}
+        self.slow = []
+        self.total = 0
+        self._stack = None
+
+    # ---- recording ----
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, (time.perf_counter() - start) * 1000)
+
+    def record(self, sql, ms):
+        self.total += 1
+        frames = _project_frames()
+        site = "{}:{} in {}".format(*frames[0]) if frames else "<django>"
+        shape = normalize(sql)
+        group = self.groups.get((shape, site))
+        if group is None:
+            group = self.groups[(shape, site)] = QueryGroup(shape, site)
+        group.count += 1
+        group.ms += ms
+        if ms >= self.slow_ms:
+            self.slow.append(SlowQuery(sql, ms, ["{}:{} in {}".format(*f) for f in frames]))
+            log.warning("slow query (%.1f ms) %s\n  %s", ms, sql, "\n  ".join(self.slow[-1].stack))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc):
+        self._stack.close()
+        self._stack = None
+        return False
+
+    # ---- findings ----
+    @property
+    def repeats(self):
+        return sorted(
+            (g for g in self.groups.values() if g.count > self.repeat and g.sql.upper().startswith("SELECT")),
+            key=lambda g: -g.count,
+        )
+
+    @property
+    def clean(self) -> bool:
+        return not self.repeats and not self.slow
+
+    def report(self) -> str:
+        lines = [f"query audit{' ' + self.label if self.label else ''}: {self.total} queries"]
+        for g in self.repeats:
+            lines.append(f"  repeated {g.count}x ({g.ms:.1f} ms) at {g.site}: {g.sql[:300]}")
+        for q in self.slow:
+            lines.append(f"  slow {q.ms:.1f} ms: {q.sql[:300]}")
+            lines.extend(f"      {frame}" for frame in q.stack)
+        return "\n".join(lines)
+
+    def assert_clean(self):
+        if not self.clean:
+            raise QueryAuditError(self.report())
+
+
+class QueryAuditMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.QUERY_AUDIT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryAudit(label=f"{request.method} {request.path}") as audit:
+            response = self.get_response(request)
+        if not audit.clean:
+            log.warning(audit.report())
+            if settings.QUERY_AUDIT_STRICT:
+                raise QueryAuditError(audit.report())
+        response["X-Query-Audit"] = f"{audit.total} queries, {len(audit.repeats)} repeated, {len(audit.slow)} slow"
+        return response
+
+
+class RequestAuditor:
+    """Audits each request separately between request_started and request_finished (test clients)."""
+
+    def __init__(self, repeat=None, slow_ms=None):
+        # Thresholds are fixed up front, so tests that override the settings don't change the audit
+        self.repeat = settings.QUERY_AUDIT_REPEAT if repeat is None else repeat
+        self.slow_ms = settings.QUERY_AUDIT_SLOW_MS if slow_ms is None else slow_ms
+        self.audits = []
+        self._current = None
+
+    def started(self, sender=None, environ=None, **kwargs):
+        environ = environ or {}
+        label = f"{environ.get('REQUEST_METHOD', '')} {environ.get('PATH_INFO', '')}"
+        self._current = QueryAudit(self.repeat, self.slow_ms, label).__enter__()
+
+    def finished(self, sender=None, **kwargs):
+        if self._current is not None:
+            self._current.__exit__(None, None, None)
+            self.audits.append(self._current)
+            self._current = None
+
+    def __enter__(self):
+        from django.core.signals import request_finished, request_started
+        request_started.connect(self.started, weak=False, dispatch_uid="veto-query-audit-start")
+        request_finished.connect(self.finished, weak=False, dispatch_uid="veto-query-audit-finish")
+        return self
+
+    def __exit__(self, *exc):
+        from django.core.signals import request_finished, request_started
+        self.finished()
+        request_started.disconnect(dispatch_uid="veto-query-audit-start")
+        request_finished.disconnect(dispatch_uid="veto-query-audit-finish")
+        return False
+
+    def problems(self):
+        return [audit for audit in self.audits if not audit.clean]
+
+    def report(self) -> str:
+        return "\n".join(audit.report() for audit in self.problems())
@@ -0,0 +1,97 @@
+# /veto/renderers.py
+"""
+MessagePack for machine clients (bots, overlays), next to JSON on every /api/ endpoint.
+
+    Accept: application/msgpack          -> msgpack response (or ?format=msgpack)
+    Content-Type: application/msgpack    -> msgpack request body
+
+DRF views get it from the renderer and parser below (REST_FRAMEWORK settings; only listed when
+`msgpack` is installed). The plain Django views that speak JSON themselves (series_command) use
+parse_body() / respond(). The payload is the one JSON clients get: dates and decimals are encoded as
+the same strings, by DRF's JSON encoder.
+"""
+import json
+
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON only
+    msgpack = None
+
+MEDIA_TYPE = "application/msgpack"
+
+_encoder = JSONEncoder()
+
+
+def packb(data) -> bytes:
+    return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+def unpackb(body: bytes):
+    try:
+        return msgpack.unpackb(body, raw=False, timestamp=3)
+    except (ValueError, TypeError, msgpack.UnpackException) as exc:
+        raise ParseError(f"MessagePack parse error - {exc}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b"" if data is None else packb(data)
+
+
+class MessagePackParser(BaseParser):
+    media_type = MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return unpackb(stream.read())
+
+
+def _is_msgpack(media_type) -> bool:
+    return msgpack is not None and media_type.split(";")[0].strip().lower() == MEDIA_TYPE
+
+
+def wants_msgpack(request) -> bool:
+    """The Accept entry with the highest q (the first of equals) is application/msgpack."""
+    best, best_q = None, 0.0
+    for entry in request.headers.get("Accept", "").split(","):
+        media, *params = entry.split(";")
+        q = 1.0
+        for p in params:
+            name, _, value = p.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = media, q
+    return best is not None and _is_msgpack(best)
+
+
+def parse_body(request):
+    """Request body as a dict from JSON or MessagePack (by Content-Type); ValueError if malformed."""
+    if not request.body:
+        return {}
+    if _is_msgpack(request.content_type or ""):
+        try:
+            return unpackb(request.body)
+        except ParseError as exc:
+            raise ValueError(exc.detail)
+    return json.loads(request.body)
+
+
+def respond(request, data, status=200):
+    """JsonResponse, or the MessagePack equivalent when the client asked for it."""
+    if wants_msgpack(request):
+        return HttpResponse(packb(data), status=status, content_type=MEDIA_TYPE)
+    return JsonResponse(data, status=status)
@@ -0,0 +1,94 @@
+# /veto/replicas.py
+"""
+Read replicas for spectator and analytics traffic.
+
+DATABASE_REPLICA_URL adds a `replica` database (DATABASE_READ_REPLICAS lists the aliases in use).
+ReplicaMiddleware sends the reads of safe (GET/HEAD/OPTIONS) /api/ requests to a replica: overlay
+polling, combo catalogs, stats, exports. Everything else uses the primary (`default`):
+
+- writes, always (ReplicaRouter.db_for_write), including saves of objects read from a replica
+- reads inside a transaction on the primary, so every TSDMachine command reads what it locks
+- every read outside a replica-routed request (management commands, workers, the admin)
+
+Replicas lag. A client that just wrote stays on the primary for REPLICA_PIN_SECONDS so it reads its
+own writes: every unsafe /api/ response carries the pin as a `veto_primary` cookie and an
+`X-Veto-Primary` header (a UNIX time). Browsers send the cookie back; clients without cookies
+echo the header. The value is not signed: all it can do is keep its sender on the primary.
+"""
+import math
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "veto_primary"
+PIN_HEADER = "X-Veto-Primary"
+
+_replica_reads = ContextVar("veto_replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Send reads in this block to a replica (when one is configured)."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_READ_REPLICAS
+        if not replicas or not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS  # read-modify-write: read what will be written
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # replicas hold the same rows as the primary
+
+
+def pinned(request) -> bool:
+    raw = request.headers.get(PIN_HEADER) or request.COOKIES.get(PIN_COOKIE)
+    try:
+        return float(raw) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_READ_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+        if request.method in ("GET", "HEAD", "OPTIONS"):
+            if pinned(request):
+                return self.get_response(request)
+            with replica_reads():
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        until = math.ceil(time.time() + settings.REPLICA_PIN_SECONDS)
+        response[PIN_HEADER] = str(until)
+        # The frontend is cross-site: only a Secure cookie may be SameSite=None
+        secure = request.is_secure()
+        response.set_cookie(
+            PIN_COOKIE, str(until), max_age=settings.REPLICA_PIN_SECONDS,
+            secure=secure, samesite="None" if secure else "Lax", httponly=True,
+        )
+        return response
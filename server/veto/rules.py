@@ -0,0 +1,230 @@
+# /veto/rules.py
+"""
+In-memory TSD rules: replay a series' bans and picks against a preloaded catalog without touching the DB.
+
+Mirrors the guards in TSDMachine (same messages) so bulk tools (import, integrity checks) agree with
+the live API. Bans and picks are plain tuples: (team, kind, map_id, mode_id), in step / game order.
+"""
+from collections import namedtuple
+
+from django.utils.text import slugify
+
+from .models import BanKind, GameMode, Map, SeriesState, SlotType
+
+# 7-step ban schedule (A obj, B obj, A obj, B obj, A obj, B slayer, A slayer)
+BAN_SCHEDULE = [
+    ("A", BanKind.OBJECTIVE_COMBO),  # Step 1: Team A bans one Objective and map combination
+    ("B", BanKind.OBJECTIVE_COMBO),  # Step 2: Team B bans one Objective and map combination
+    ("A", BanKind.OBJECTIVE_COMBO),  # Step 3: Team A bans one Objective and map combination
+    ("B", BanKind.OBJECTIVE_COMBO),  # Step 4: Team B bans one Objective and map combination
+    ("A", BanKind.OBJECTIVE_COMBO),  # Step 5: Team A bans one Objective and map combination
+    ("B", BanKind.SLAYER_MAP),       # Step 6: Team B bans one Slayer map
+    ("A", BanKind.SLAYER_MAP),       # Step 7: Team A bans one Slayer map
+]
+
+
+ROUND_SLOTS = {
+    "Bo3": [SlotType.OBJECTIVE, SlotType.SLAYER, SlotType.OBJECTIVE],
+    "Bo5": [SlotType.OBJECTIVE, SlotType.SLAYER, SlotType.OBJECTIVE, SlotType.OBJECTIVE, SlotType.SLAYER],
+    "Bo7": [SlotType.OBJECTIVE, SlotType.SLAYER, SlotType.OBJECTIVE, SlotType.OBJECTIVE, SlotType.SLAYER, SlotType.OBJECTIVE, SlotType.SLAYER],
+}
+
+def picking_team_for_game(game_number: int) -> str:
+    # Odd games -> Team B picks; Even -> Team A picks
+    return "B" if game_number % 2 == 1 else "A"
+
+
+Move = namedtuple("Move", "team kind map_id mode_id")
+Violation = namedtuple("Violation", "phase index error")
+
+
+class Catalog:
+    """Which modes each map supports; loaded once (three queries) and shared by every replay."""
+
+    def __init__(self, modes, maps, links):
+        # modes: {id: (name, is_objective)}, maps: {id: name}, links: iterable of (map_id, mode_id)
+        self.modes = dict(modes)
+        self.maps = dict(maps)
+        self.map_modes = {map_id: set() for map_id in self.maps}
+        for map_id, mode_id in links:
+            self.map_modes.setdefault(map_id, set()).add(mode_id)
+        self.mode_ids = {name.lower(): pk for pk, (name, _) in self.modes.items()}
+        self.map_ids = {name.lower(): pk for pk, name in self.maps.items()}
+        self.slayer_id = self.mode_ids.get("slayer")
+
+    @classmethod
+    def from_db(cls):
+        modes = {pk: (name, obj) for pk, name, obj in GameMode.objects.values_list("pk", "name", "is_objective")}
+        maps = dict(Map.objects.values_list("pk", "name"))
+        links = Map.modes.through.objects.values_list("map_id", "gamemode_id")
+        return cls(modes, maps, links)
+
+    @classmethod
+    def from_document(cls, doc):
+        """Inverse of to_document(); used for frozen MapPool snapshots."""
+        return cls(
+            {pk: (name, obj) for pk, name, obj in doc["modes"]},
+            {pk: name for pk, name in doc["maps"]},
+            [tuple(link) for link in doc["links"]],
+        )
+
+    def to_document(self) -> dict:
+        return {
+            "modes": sorted([pk, name, obj] for pk, (name, obj) in self.modes.items()),
+            "maps": sorted([pk, name] for pk, name in self.maps.items()),
+            "links": sorted([map_id, mode_id] for map_id, ids in self.map_modes.items() for mode_id in ids),
+        }
+
+    def combos(self):
+        """Every supported (map, mode) pair, same shape as /api/maps/combos/ (sorted by mode, map)."""
+        out = [
+            {"map_id": map_id, "map": self.maps[map_id], "mode_id": mode_id, "mode": self.modes[mode_id][0],
+             "is_objective": self.is_objective(mode_id),
+             "slug": f"{slugify(self.maps[map_id])}--{slugify(self.modes[mode_id][0])}"}
+            for map_id, ids in self.map_modes.items() for mode_id in ids if mode_id in self.modes
+        ]
+        out.sort(key=lambda c: (c["mode"], c["map"]))
+        return out
+
+    def is_objective(self, mode_id) -> bool:
+        return bool(self.modes.get(mode_id, ("", False))[1])
+
+    def supports(self, map_id, mode_id) -> bool:
+        return mode_id in self.map_modes.get(map_id, ())
+
+    def resolve_map(self, ref):
+        """Map id from an id or a (case-insensitive) name; None if unknown."""
+        if isinstance(ref, int):
+            return ref if ref in self.maps else None
+        return self.map_ids.get(str(ref or "").strip().lower())
+
+    def resolve_mode(self, ref):
+        if isinstance(ref, int):
+            return ref if ref in self.modes else None
+        return self.mode_ids.get(str(ref or "").strip().lower())
+
+
+def slot_kind(slot) -> str:
+    return BanKind.OBJECTIVE_COMBO if slot == SlotType.OBJECTIVE else BanKind.SLAYER_MAP
+
+
+def position(series_type: str, bans_done: int, picks_done: int) -> dict:
+    """State, indexes and turn of a series after `bans_done` bans and `picks_done` picks."""
+    slots = ROUND_SLOTS[series_type]
+    if bans_done < len(BAN_SCHEDULE):
+        team, kind = BAN_SCHEDULE[bans_done]
+        return {"state": SeriesState.BAN_PHASE, "ban_index": bans_done, "round_index": 0,
+                "turn": {"team": team, "action": "BAN", "kind": kind}}
+    if picks_done < len(slots):
+        return {"state": SeriesState.PICK_WINDOW, "ban_index": len(BAN_SCHEDULE), "round_index": picks_done,
+                "turn": {"team": picking_team_for_game(picks_done + 1), "action": "PICK",
+                         "kind": slot_kind(slots[picks_done])}}
+    return {"state": SeriesState.SERIES_COMPLETE, "ban_index": len(BAN_SCHEDULE),
+            "round_index": len(slots) - 1, "turn": {}}
+
+
+def check_ban(catalog, index, move, banned_combos, banned_slayer):
+    if index >= len(BAN_SCHEDULE):
+        return "Not in ban phase"
+    team, kind = BAN_SCHEDULE[index]
+    if move.team != team:
+        return "Not your turn"
+    if move.kind != kind:
+        return f"Wrong action kind (expected {kind})"
+    if kind == BanKind.OBJECTIVE_COMBO:
+        if not catalog.is_objective(move.mode_id):
+            return "Mode must be objective"
+        if not catalog.supports(move.map_id, move.mode_id):
+            return "Map does not support this objective"
+        if (move.mode_id, move.map_id) in banned_combos:
+            return "That combo is already banned"
+    else:
+        if not catalog.supports(move.map_id, catalog.slayer_id):
+            return "Map is not valid for Slayer"
+        if move.map_id in banned_slayer:
+            return "That Slayer map is already banned"
+    return None
+
+
+def check_pick(catalog, slots, index, move, banned_combos, banned_slayer, picked_combos, slayer_maps):
+    if index >= len(slots):
+        return "Not in pick window"
+    if move.team != picking_team_for_game(index + 1):
+        return "Not your turn"
+    if move.kind != slot_kind(slots[index]):
+        return f"Wrong action kind (expected {slot_kind(slots[index])})"
+    if slots[index] == SlotType.OBJECTIVE:
+        if not catalog.is_objective(move.mode_id) or not catalog.supports(move.map_id, move.mode_id):
+            return "Invalid objective combo"
+        if (move.mode_id, move.map_id) in banned_combos:
+            return "Combo is banned"
+        if (move.mode_id, move.map_id) in picked_combos:
+            return "That objective combo was already picked"
+    else:
+        if move.mode_id not in (None, catalog.slayer_id) or not catalog.supports(move.map_id, catalog.slayer_id):
+            return "Map is not valid for Slayer"
+        if move.map_id in banned_slayer:
+            return "This Slayer map is banned"
+        if move.map_id in slayer_maps:
+            return "Map already used for Slayer"
+    return None
+
+
+def replay(catalog, series_type, bans, picks):
+    """
+    Replay moves in order; returns a list of Violations (empty when the series is legal).
+    A move that violates a rule is still applied, so later steps are judged against what is stored.
+    """
+    if series_type not in ROUND_SLOTS:
+        return [Violation("series", 0, "Invalid series_type")]
+    slots = ROUND_SLOTS[series_type]
+    violations = []
+    banned_combos, banned_slayer = set(), set()
+    for i, move in enumerate(bans):
+        error = check_ban(catalog, i, move, banned_combos, banned_slayer)
+        if error:
+            violations.append(Violation("ban", i, error))
+        if move.kind == BanKind.SLAYER_MAP:
+            banned_slayer.add(move.map_id)
+        else:
+            banned_combos.add((move.mode_id, move.map_id))
+
+    if picks and len(bans) < len(BAN_SCHEDULE):
+        violations.append(Violation("pick", 0, "Not in pick window"))
+    picked_combos, slayer_maps = set(), set()
+    for i, move in enumerate(picks):
+        error = check_pick(catalog, slots, i, move, banned_combos, banned_slayer, picked_combos, slayer_maps)
+        if error:
+            violations.append(Violation("pick", i, error))
+        picked_combos.add((move.mode_id, move.map_id))
+        if move.kind == BanKind.SLAYER_MAP:
+            slayer_maps.add(move.map_id)
+    return violations
+
+
+def legal_moves(catalog, series_type, bans, picks):
+    """Every move the team on turn may make next (empty once the series is complete)."""
+    if series_type not in ROUND_SLOTS:
+        return []
+    slots = ROUND_SLOTS[series_type]
+    banned_combos = {(m.mode_id, m.map_id) for m in bans if m.kind == BanKind.OBJECTIVE_COMBO}
+    banned_slayer = {m.map_id for m in bans if m.kind == BanKind.SLAYER_MAP}
+    turn = position(series_type, len(bans), len(picks))["turn"]
+    if not turn:
+        return []
+
+    candidates = [
+        Move(turn["team"], turn["kind"], map_id, mode_id if turn["kind"] == BanKind.OBJECTIVE_COMBO else catalog.slayer_id)
+        for map_id, mode_id in sorted(
+            (map_id, mode_id) for map_id, ids in catalog.map_modes.items() for mode_id in ids
+            if (mode_id == catalog.slayer_id) == (turn["kind"] == BanKind.SLAYER_MAP)
+        )
+    ]
+    if turn["action"] == "BAN":
+        return [m for m in candidates if check_ban(catalog, len(bans), m, banned_combos, banned_slayer) is None]
+    picked_combos = {(m.mode_id, m.map_id) for m in picks}
+    slayer_maps = {m.map_id for m in picks if m.kind == BanKind.SLAYER_MAP}
+    return [
+        m for m in candidates
+        if check_pick(catalog, slots, len(picks), m, banned_combos, banned_slayer, picked_combos, slayer_maps) is None
+    ]
@@ -1,19 +1,89 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Series, SeriesBan, SeriesRound, Map, GameMode, Action, BanKind, SlotType
+from rest_framework.exceptions import ValidationError
+from .models import Series, SeriesBan, SeriesRound, Map, MapPool, GameMode, Action, BanKind, SlotType, Job
+from .timing import timed
 
-class GameModeSerializer(serializers.ModelSerializer):
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+class TimedModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose `.data` (single or many=True) counts toward the `serialize` Server-Timing phase."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = cls.__dict__.get("Meta")
+        if meta is not None and not hasattr(meta, "list_serializer_class"):
+            meta.list_serializer_class = TimedListSerializer
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+def csv_param(raw):
+    """`?p=a,b` -> {"a", "b"}; None when the parameter is absent."""
+    if raw is None:
+        return None
+    return {v.strip() for v in raw.split(",") if v.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and expansion, decided when the serializer is built:
+
+        fields={"state", "turn"}   only these fields (None: Meta.fields)
+        expand={"modes"}           these EXPANDABLE relations nested, the others as ids (None: DEFAULT_EXPAND)
+
+    Dropped fields are removed from `self.fields` before anything is serialized, so a dropped method
+    field never runs. The views read them from ?fields= / ?expand= (views.SparseFieldsMixin) and skip
+    the prefetches of what was not asked for.
+    """
+    EXPANDABLE = {}  # field -> factory of the nested serializer that replaces the id(s)
+    DEFAULT_EXPAND = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = self.check_params(fields, expand)
+        for name in list(self.fields):
+            if name not in fields:
+                self.fields.pop(name)
+        for name in expand & fields:
+            self.fields[name] = self.EXPANDABLE[name]()
+
+    @classmethod
+    def check_params(cls, fields, expand):
+        """(fields, expand) with the defaults filled in; ValidationError (400) on unknown names."""
+        if fields is not None and fields - set(cls.Meta.fields):
+            raise ValidationError({"fields": f"Choose from: {', '.join(cls.Meta.fields)}"})
+        if expand is not None and expand - set(cls.EXPANDABLE):
+            raise ValidationError({"expand": f"Choose from: {', '.join(cls.EXPANDABLE) or '(none)'}"})
+        return (
+            set(cls.Meta.fields) if fields is None else fields,
+            set(cls.DEFAULT_EXPAND) if expand is None else expand,
+        )
+
+
+class GameModeSerializer(TimedModelSerializer):
     class Meta:
         model = GameMode
         fields = ['id', 'name', 'is_objective']
 
-class MapSerializer(serializers.ModelSerializer):
-    modes = GameModeSerializer(many=True, read_only=True)
-    
+class MapSerializer(DynamicFieldsMixin, TimedModelSerializer):
+    EXPANDABLE = {"modes": lambda: GameModeSerializer(many=True, read_only=True)}
+    DEFAULT_EXPAND = ("modes",)
+
     class Meta:
         model = Map
         fields = ['id', 'name', 'modes']
 
-class MapWriteSerializer(serializers.ModelSerializer):
+class MapWriteSerializer(TimedModelSerializer):
     mode_ids = serializers.ListField(
         child=serializers.IntegerField(),
         write_only=True,
@@ -40,27 +110,63 @@ class MapWriteSerializer(serializers.ModelSerializer):
             instance.modes.set(mode_ids)
         return instance
 
-class ActionSerializer(serializers.ModelSerializer):
+class MapPoolSerializer(TimedModelSerializer):
+    class Meta:
+        model = MapPool
+        fields = ['id', 'label', 'created_at']
+
+class ActionSerializer(DynamicFieldsMixin, TimedModelSerializer):
+    EXPANDABLE = {
+        "series": lambda: SeriesSerializer(read_only=True, fields={"id", "team_a", "team_b", "state"}),
+        "map": lambda: MapSerializer(read_only=True, fields={"id", "name"}),
+        "mode": lambda: GameModeSerializer(read_only=True),
+    }
+
     class Meta:
         model = Action
         fields = ['id', 'series', 'step', 'action_type', 'team', 'map', 'mode', 'created_at']
+        read_only_fields = ['step']  # allocated per series by Action.save()
+
+class SeriesSummarySerializer(DynamicFieldsMixin, TimedModelSerializer):
+    """List representation: summary columns plus counts annotated by SeriesViewSet."""
+    ban_count = serializers.IntegerField(read_only=True)
+    pick_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Series
+        fields = ['id', 'team_a', 'team_b', 'created_at', 'state', 'series_type', 'turn', 'turn_deadline', 'ban_count', 'pick_count']
+
+def series_detail_queryset(qs=None):
+    """Everything SeriesSerializer reads, in a fixed number of queries."""
+    return (Series.objects.all() if qs is None else qs).prefetch_related(
+        Prefetch('bans', queryset=SeriesBan.objects.select_related('map', 'objective_mode')),
+        Prefetch('rounds', queryset=SeriesRound.objects.select_related('pick_map', 'mode')),
+        'actions',
+    )
 
-class SeriesSerializer(serializers.ModelSerializer):
+class SeriesSerializer(DynamicFieldsMixin, TimedModelSerializer):
     actions = serializers.SerializerMethodField()
-    
+    EXPANDABLE = {"map_pool": lambda: MapPoolSerializer(read_only=True)}
+
     class Meta:
         model = Series
-        fields = ['id', 'team_a', 'team_b', 'created_at', 'state', 'turn', 'actions']
+        fields = ['id', 'version', 'team_a', 'team_b', 'created_at', 'state', 'turn', 'turn_deadline', 'map_pool', 'actions']
+        read_only_fields = ['version']  # bumped by the server on every change, never set by clients
     
     def get_actions(self, obj):
         try:
             actions = []
+            bans = obj.bans.all()
+
+            # Slayer bans carry no mode row: resolve the Slayer mode once, not per ban
+            slayer_mode = None
+            if any(ban.kind == BanKind.SLAYER_MAP for ban in bans):
+                slayer_mode = GameMode.objects.filter(name__iexact="Slayer").first()
 
             # 1) Ban actions from SeriesBan model
-            for ban in obj.bans.all():
+            for ban in bans:
                 # Determine mode_id for Slayer bans
                 if ban.kind == BanKind.SLAYER_MAP:
-                    slayer_mode = GameMode.objects.filter(name__iexact="Slayer").first()
                     mode_id = slayer_mode.id if slayer_mode else None
                     mode_name = slayer_mode.name if slayer_mode else "Slayer"
                 else:
@@ -116,3 +222,17 @@ class SeriesSerializer(serializers.ModelSerializer):
         except Exception as e:
             print(f"[DEBUG] Error getting actions: {e}")
             return []
+
+
+class JobSerializer(TimedModelSerializer):
+    error = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'attempts', 'max_attempts', 'done', 'total', 'message', 'result',
+                  'error', 'run_after', 'created_at', 'started_at', 'finished_at']
+
+    def get_error(self, obj):
+        # The exception line only; the full traceback stays in the admin and the worker log
+        lines = [line for line in obj.error.splitlines() if line.strip()]
+        return lines[-1] if lines else ""
@@ -0,0 +1,30 @@
+# /veto/signals.py
+"""
+Catalog edits made one row at a time (admin, /api/maps/) record a CatalogVersion, so catalog payloads
+cached under the previous version are no longer served. sync_catalog records its own version and
+mutes these receivers while it applies a plan.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import syncing
+from .models import CatalogVersion, GameMode, Map
+
+
+def _record(model, pk):
+    if not syncing.get():
+        CatalogVersion.objects.create(label="edit", summary={"model": model._meta.model_name, "id": pk})
+
+
+@receiver(post_save, sender=Map)
+@receiver(post_save, sender=GameMode)
+@receiver(post_delete, sender=Map)
+@receiver(post_delete, sender=GameMode)
+def catalog_row_changed(sender, instance, **kwargs):
+    _record(sender, instance.pk)
+
+
+@receiver(m2m_changed, sender=Map.modes.through)
+def catalog_combos_changed(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        _record(type(instance), instance.pk)
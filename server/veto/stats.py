@@ -0,0 +1,161 @@
+# /veto/stats.py
+"""
+Incremental map/mode ban & pick rollup (MapStat).
+
+A bucket key is (day, map_id, mode_id, team, action). TSDMachine applies +1/-1 deltas inside the
+same transaction as the command, so the rollup commits or rolls back together with the veto.
+"""
+from collections import Counter
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import BanKind, GameMode, MapStat, SeriesArchive, SeriesBan, SeriesRound, StatAction
+
+
+def series_day(series) -> date:
+    return timezone.localtime(series.created_at).date()
+
+
+def team_name(series, code: str) -> str:
+    return series.team_a if code == "A" else series.team_b
+
+
+def slayer_mode_id():
+    return GameMode.objects.filter(name="Slayer").values_list("pk", flat=True).first()
+
+
+def bucket(series, action: str, team_code: str, map_id: int, mode_id: int) -> tuple:
+    return (series_day(series), map_id, mode_id, team_name(series, team_code), action)
+
+
+def _bump(key: tuple, delta: int):
+    day, map_id, mode_id, team, action = key
+    qs = MapStat.objects.filter(day=day, map_id=map_id, mode_id=mode_id, team=team, action=action)
+    if qs.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            MapStat.objects.create(day=day, map_id=map_id, mode_id=mode_id, team=team, action=action, count=delta)
+    except IntegrityError:
+        # Another transaction created the bucket first
+        qs.update(count=F("count") + delta)
+
+
+def apply(deltas: Counter):
+    for key, delta in deltas.items():
+        if delta and key[2] is not None:
+            _bump(key, delta)
+
+
+def record(series, action: str, team_code: str, map_id: int, mode_id: int, delta: int = 1):
+    apply(Counter({bucket(series, action, team_code, map_id, mode_id): delta}))
+
+
+def series_deltas(series, sign: int = 1) -> Counter:
+    """Deltas for every ban and pick currently stored for `series` (used by reset)."""
+    deltas = Counter()
+    bans = list(series.bans.values_list("by_team", "kind", "map_id", "objective_mode_id"))
+    slayer_id = slayer_mode_id() if any(kind == BanKind.SLAYER_MAP for _, kind, _, _ in bans) else None
+    for team, kind, map_id, mode_id in bans:
+        mode_id = slayer_id if kind == BanKind.SLAYER_MAP else mode_id
+        deltas[bucket(series, StatAction.BAN, team, map_id, mode_id)] += sign
+    picks = series.rounds.filter(pick_map__isnull=False).values_list("pick_by", "pick_map_id", "mode_id")
+    for team, map_id, mode_id in picks:
+        deltas[bucket(series, StatAction.PICK, team, map_id, mode_id)] += sign
+    return deltas
+
+
+def _team_buckets(rows, action, map_key, mode_key, team_key, slayer_id=None):
+    counts = Counter()
+    for row in rows:
+        mode_id = row[mode_key]
+        if slayer_id and row.get("kind") == BanKind.SLAYER_MAP:
+            mode_id = slayer_id
+        if mode_id is None:
+            continue
+        team = row["series__team_a"] if row[team_key] == "A" else row["series__team_b"]
+        counts[(row["day"], row[map_key], mode_id, team, action)] += row["n"]
+    return counts
+
+
+def _archive_buckets(chunk_size=500):
+    counts = Counter()
+    rows = SeriesArchive.objects.values_list("created_at", "team_a", "team_b", "document")
+    for created_at, team_a, team_b, doc in rows.iterator(chunk_size=chunk_size):
+        day = timezone.localtime(created_at).date()
+        for action, entries in ((StatAction.BAN, doc.get("bans", [])), (StatAction.PICK, doc.get("picks", []))):
+            for e in entries:
+                if e.get("mode_id") is not None:
+                    team = team_a if e["team"] == "A" else team_b
+                    counts[(day, e["map_id"], e["mode_id"], team, action)] += 1
+    return counts
+
+
+def rebuild(batch_size: int = 1000) -> int:
+    """Recompute the whole rollup from stored (and archived) bans and picks. Returns the number of buckets."""
+    team_cols = ("series__team_a", "series__team_b")
+    bans = (
+        SeriesBan.objects.annotate(day=TruncDate("series__created_at"))
+        .values("day", "map_id", "objective_mode_id", "kind", "by_team", *team_cols)
+        .annotate(n=Count("pk")).order_by()
+    )
+    picks = (
+        SeriesRound.objects.filter(pick_map__isnull=False).annotate(day=TruncDate("series__created_at"))
+        .values("day", "pick_map_id", "mode_id", "pick_by", *team_cols)
+        .annotate(n=Count("pk")).order_by()
+    )
+    counts = _team_buckets(bans, StatAction.BAN, "map_id", "objective_mode_id", "by_team", slayer_mode_id())
+    counts.update(_team_buckets(picks, StatAction.PICK, "pick_map_id", "mode_id", "pick_by"))
+    counts.update(_archive_buckets())
+
+    with transaction.atomic():
+        MapStat.objects.all().delete()
+        MapStat.objects.bulk_create(
+            (MapStat(day=d, map_id=m, mode_id=md, team=t, action=a, count=n)
+             for (d, m, md, t, a), n in counts.items() if n),
+            batch_size=batch_size,
+        )
+    return len(counts)
+
+
+GROUPINGS = {
+    "combo": ("map_id", "map__name", "mode_id", "mode__name"),
+    "map": ("map_id", "map__name"),
+    "mode": ("mode_id", "mode__name"),
+    "team": ("team",),
+}
+
+
+def summarize(by="combo", date_from=None, date_to=None, team=None, map_id=None, mode_id=None):
+    """Aggregate buckets into ban/pick counts and rates; cost depends on bucket count only."""
+    qs = MapStat.objects.all()
+    if date_from:
+        qs = qs.filter(day__gte=date_from)
+    if date_to:
+        qs = qs.filter(day__lte=date_to)
+    if team:
+        qs = qs.filter(team=team)
+    if map_id:
+        qs = qs.filter(map_id=map_id)
+    if mode_id:
+        qs = qs.filter(mode_id=mode_id)
+
+    rows = list(
+        qs.values(*GROUPINGS[by]).annotate(
+            bans=Sum("count", filter=Q(action=StatAction.BAN), default=0),
+            picks=Sum("count", filter=Q(action=StatAction.PICK), default=0),
+        ).order_by(*[f for f in GROUPINGS[by] if not f.endswith("_id")])
+    )
+    total_bans = sum(r["bans"] for r in rows)
+    total_picks = sum(r["picks"] for r in rows)
+    results = []
+    for r in rows:
+        out = {k.replace("__name", ""): v for k, v in r.items()}
+        out["ban_rate"] = round(r["bans"] / total_bans, 4) if total_bans else 0.0
+        out["pick_rate"] = round(r["picks"] / total_picks, 4) if total_picks else 0.0
+        results.append(out)
+    return {"by": by, "totals": {"bans": total_bans, "picks": total_picks}, "results": results}
@@ -0,0 +1,137 @@
+"""
+Minimal in-process Redis-protocol (RESP2) server for tests: the subset of commands Django's
+RedisCache issues (HELLO/GET/SET/DEL/EXISTS/INCRBY/MGET/EXPIRE/...). Keys live in a dict; expiry is lazy.
+"""
+import socketserver
+import threading
+import time
+
+
+class _Store:
+    def __init__(self):
+        self.data = {}  # key -> (value bytes, expires_at or None)
+        self.lock = threading.Lock()
+        self.commands = 0
+
+    def get(self, key):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return item[0]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        self.null = b"$-1\r\n"
+        while True:
+            try:
+                args = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            with self.server.store.lock:
+                self.server.store.commands += 1
+                reply = self._dispatch([a.decode() if i == 0 else a for i, a in enumerate(args)])
+            self.wfile.write(reply)
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            raise ValueError("inline commands are not supported")
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    # ---- replies ----
+    def _bulk(self, value):
+        return self.null if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    @staticmethod
+    def _int(n):
+        return b":%d\r\n" % n
+
+    def _dispatch(self, args):
+        store, cmd, rest = self.server.store, args[0].upper(), args[1:]
+        now = time.monotonic()
+        if cmd == "PING":
+            return b"+PONG\r\n"
+        if cmd in ("SELECT", "CLIENT"):
+            return b"+OK\r\n"
+        if cmd == "HELLO":
+            # Apart from this map and the null reply, everything below is the same in RESP2 and RESP3
+            proto = int(rest[0]) if rest else 2
+            self.null = b"_\r\n" if proto == 3 else b"$-1\r\n"
+            return b"%%2\r\n+server\r\n+veto-test\r\n+proto\r\n:%d\r\n" % proto
+        if cmd == "GET":
+            return self._bulk(store.get(rest[0]))
+        if cmd == "MGET":
+            return b"*%d\r\n" % len(rest) + b"".join(self._bulk(store.get(k)) for k in rest)
+        if cmd == "SET":
+            key, value, opts, expires = rest[0], rest[1], [o.upper() for o in rest[2:]], None
+            if b"NX" in opts and store.get(key) is not None:
+                return self.null
+            if b"XX" in opts and store.get(key) is None:
+                return self.null
+            for unit, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+                if unit in opts:
+                    expires = now + int(opts[opts.index(unit) + 1]) * scale
+            store.data[key] = (value, expires)
+            return b"+OK\r\n"
+        if cmd == "DEL":
+            return self._int(sum(store.data.pop(k, None) is not None for k in rest))
+        if cmd == "EXISTS":
+            return self._int(sum(store.get(k) is not None for k in rest))
+        if cmd in ("INCRBY", "DECRBY", "INCR", "DECR"):
+            delta = int(rest[1]) if len(rest) > 1 else 1
+            delta = -delta if cmd.startswith("DECR") else delta
+            current = store.get(rest[0])
+            value = int(current or 0) + delta
+            expires = store.data[rest[0]][1] if current is not None else None
+            store.data[rest[0]] = (str(value).encode(), expires)
+            return self._int(value)
+        if cmd in ("EXPIRE", "PEXPIRE"):
+            if store.get(rest[0]) is None:
+                return self._int(0)
+            scale = 1.0 if cmd == "EXPIRE" else 0.001
+            store.data[rest[0]] = (store.data[rest[0]][0], now + int(rest[1]) * scale)
+            return self._int(1)
+        if cmd == "PERSIST":
+            if store.get(rest[0]) is None:
+                return self._int(0)
+            store.data[rest[0]] = (store.data[rest[0]][0], None)
+            return self._int(1)
+        if cmd in ("FLUSHDB", "FLUSHALL"):
+            store.data.clear()
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % cmd.encode()
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """`with RespServer() as server: ... server.url ...` serves on a free localhost port."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.store = _Store()
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
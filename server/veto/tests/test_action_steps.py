@@ -0,0 +1,56 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto.models import Action, Series, next_action_step
+from veto.tests.utils import seed_catalog
+
+
+class ActionStepAllocationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.modes, self.maps = seed_catalog()
+        self.series = Series.objects.create(team_a="Team Alpha", team_b="Team Beta")
+
+    def _veto(self, team="Team Alpha"):
+        url = reverse("series-series-veto", kwargs={"pk": self.series.pk})
+        data = {"team": team, "map": self.maps["Live Fire"].pk, "mode": self.modes["Slayer"].pk}
+        return self.client.post(url, data, format="json")
+
+    def test_steps_come_from_series_counter(self):
+        steps = [self._veto().data["step"] for _ in range(3)]
+
+        self.assertEqual(steps, [1, 2, 3])
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.action_seq, 3)
+
+    def test_insert_is_one_allocation_plus_insert(self):
+        with self.assertNumQueries(2):
+            Action.objects.create(
+                series=self.series, team="A", map=self.maps["Live Fire"], mode=self.modes["Slayer"],
+            )
+
+    def test_client_supplied_step_is_ignored(self):
+        self._veto()
+        response = self.client.post(reverse("actions-list"), {
+            "series": self.series.pk, "step": 1, "action_type": "ban", "team": "B",
+            "map": self.maps["Live Fire"].pk, "mode": self.modes["Slayer"].pk,
+        }, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["step"], 2)
+
+    def test_unknown_series(self):
+        with self.assertRaises(Series.DoesNotExist):
+            next_action_step(self.series.pk + 1000)
+
+    def test_explicit_step_moves_the_counter_past_it(self):
+        Action.objects.create(series=self.series, step=5, team="A", map=self.maps["Live Fire"],
+                              mode=self.modes["Slayer"])
+        Action.objects.create(series=self.series, step=2, team="B", map=self.maps["Live Fire"],
+                              mode=self.modes["Slayer"])
+
+        self.assertEqual(self._veto().data["step"], 6)
+        self.series.refresh_from_db()
+        self.assertEqual((self.series.action_seq, self.series.version), (6, 3))
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from veto.machine_tsd import TSDMachine
+from veto.models import Action, Series
+from veto.tests.utils import run_bans, run_picks, seed_catalog, start_series
+
+
+class AdminQueryCountTests(TestCase):
+
+    def setUp(self):
+        self.modes, self.maps = seed_catalog()
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(user)
+
+    def _add_series(self, n):
+        for _ in range(n):
+            series, machine = start_series(TSDMachine)
+            run_bans(machine, self.modes, self.maps)
+            run_picks(machine, self.modes, self.maps)
+            for _ in range(3):
+                Action.objects.create(series=series, team="A", map=self.maps["Origin"], mode=self.modes["Slayer"])
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_changelists_use_fixed_query_count(self):
+        urls = [
+            reverse(f"admin:veto_{model}_changelist")
+            for model in ("map", "series", "seriesban", "seriesround", "action")
+        ]
+        self._add_series(1)
+        self._queries(urls[0])  # warm up per-session queries
+        before = [self._queries(url) for url in urls]
+        self._add_series(4)
+        self.assertEqual([self._queries(url) for url in urls], before)
+
+    def test_series_change_page_uses_fixed_query_count(self):
+        self._add_series(1)
+        url = reverse("admin:veto_series_change", args=[Series.objects.get().pk])
+        self._queries(url)  # warm up per-session queries
+        small = self._queries(url)
+
+        series = Series.objects.get()
+        for _ in range(20):
+            Action.objects.create(series=series, team="B", map=self.maps["Origin"], mode=self.modes["Slayer"])
+        self.assertEqual(self._queries(url), small)
+
+    def test_action_added_in_admin_gets_an_allocated_step(self):
+        series, _ = start_series(TSDMachine)
+        Action.objects.create(series=series, team="A", map=self.maps["Origin"], mode=self.modes["Slayer"])
+
+        response = self.client.post(reverse("admin:veto_action_add"), {
+            "series": series.pk, "action_type": "pick", "team": "B",
+            "map": self.maps["Origin"].pk, "mode": self.modes["Slayer"].pk,
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(series.actions.values_list("step", flat=True)), [1, 2])
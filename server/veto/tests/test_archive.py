@@ -0,0 +1,70 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from veto.machine_tsd import TSDMachine
+from veto.models import MapStat, Series, SeriesArchive, SeriesBan
+from veto.tests.utils import run_bans, run_picks, seed_catalog, start_series
+
+TIMELINE_KEYS = ("action_type", "team", "map", "mode", "step", "kind")
+
+
+def timeline(data):
+    return [tuple(a[k] for k in TIMELINE_KEYS) for a in data["actions"]]
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.modes, self.maps = seed_catalog()
+        self.done, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps)
+        run_picks(machine, self.modes, self.maps)
+        self.live, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps)
+        Series.objects.update(created_at=timezone.now() - timedelta(days=120))
+
+    def archive(self, *args):
+        call_command("archive_series", "--older-than-days", "90", *args, stdout=StringIO())
+
+    def test_only_finished_old_series_are_archived(self):
+        self.archive("--batch-size", "1")
+
+        self.assertEqual(list(SeriesArchive.objects.values_list("series_id", flat=True)), [self.done.pk])
+        self.assertFalse(Series.objects.filter(pk=self.done.pk).exists())
+        self.assertFalse(SeriesBan.objects.filter(series_id=self.done.pk).exists())
+        self.assertTrue(Series.objects.filter(pk=self.live.pk).exists())
+
+    def test_detail_is_served_from_archive(self):
+        url = reverse("series-detail", kwargs={"pk": self.done.pk})
+        before = self.client.get(url).data
+
+        self.archive()
+        after = self.client.get(url).data
+
+        self.assertTrue(after["archived"])
+        self.assertEqual(after["state"], "SERIES_COMPLETE")
+        self.assertEqual(timeline(after), timeline(before))
+
+    def test_stats_cover_archived_series(self):
+        call_command("backfill_map_stats", stdout=StringIO())
+        before = sorted(MapStat.objects.values_list("day", "map_id", "mode_id", "team", "action", "count"))
+
+        self.archive()
+        call_command("backfill_map_stats", stdout=StringIO())
+
+        rebuilt = sorted(MapStat.objects.values_list("day", "map_id", "mode_id", "team", "action", "count"))
+        self.assertEqual(rebuilt, before)
+
+    def test_archive_rows_are_immutable(self):
+        self.archive()
+        row = SeriesArchive.objects.get()
+        row.team_a = "Edited"
+        with self.assertRaises(ValueError):
+            row.save()
@@ -0,0 +1,121 @@
+import pytest
+from django.contrib import admin
+from django.core.cache import cache as default_cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto import cache
+from veto.machine_tsd import TSDMachine
+from veto.models import Action, BanKind, Series, SeriesBan
+from veto.tests.utils import BANS, apply_step, seed_catalog, start_series
+
+pytest.importorskip("redis")
+
+from veto.tests.resp import RespServer  # noqa: E402
+
+
+class SharedCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = RespServer().__enter__()
+        cls.settings_override = override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": cls.server.url,
+        }})
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        cls.server.__exit__(None, None, None)
+
+    def setUp(self):
+        default_cache.clear()
+        cache.reset_stats()
+        self.modes, self.maps = seed_catalog()
+        self.series, self.machine = start_series(TSDMachine)
+        self.client = APIClient()
+        self.url = reverse("series-detail", args=[self.series.pk])
+
+    def test_snapshot_is_served_from_the_shared_cache(self):
+        first = self.client.get(self.url).data
+        with self.assertNumQueries(1):  # the version read
+            second = self.client.get(self.url).data
+
+        self.assertEqual(first, second)
+        self.assertEqual(first["version"], Series.objects.get(pk=self.series.pk).version)
+        self.assertEqual(cache.stats()["series"], {"hits": 1, "misses": 1, "errors": 0, "hit_rate": 0.5})
+        self.assertGreater(self.server.store.commands, 0)
+
+    def test_machine_commits_write_the_new_snapshot_through(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_step(self.machine, self.modes, self.maps, BANS[0])
+
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url).data
+        self.assertEqual(data["turn"]["team"], "B")
+        self.assertEqual(len(data["actions"]), 1)
+        self.assertEqual(cache.stats()["series"]["hits"], 1)
+
+    def test_timeline_writes_outside_the_machine_bump_the_version(self):
+        before = self.client.get(self.url).data
+        Action.objects.create(series=self.series, team="A", map=self.maps["Origin"], mode=self.modes["Slayer"])
+
+        after = self.client.get(self.url).data
+        self.assertEqual(after["version"], before["version"] + 1)
+        self.assertEqual(len(after["actions"]), len(before["actions"]) + 1)
+
+    def test_api_updates_and_admin_adds_bump_the_version(self):
+        before = self.client.get(self.url).data
+        patched = self.client.patch(self.url, {"team_a": "Renamed", "version": 0}, format="json")
+
+        after = self.client.get(self.url).data
+        self.assertEqual((after["team_a"], after["version"]), ("Renamed", before["version"] + 1))
+        self.assertEqual(patched.data["version"], after["version"])
+
+        ban = SeriesBan(series=self.series, step_index=0, by_team="A", kind=BanKind.SLAYER_MAP, map=self.maps["Origin"])
+        admin.site._registry[SeriesBan].save_model(None, ban, None, change=False)
+        self.assertEqual(self.client.get(self.url).data["version"], after["version"] + 1)
+
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertEqual(self.client.get(self.url).status_code, 404)  # no row, no version: the snapshot is unused
+
+    def test_catalog_payloads_follow_catalog_version(self):
+        url = reverse("map-mode-combos")
+        first = self.client.get(url, {"type": "objective"}).data
+        with self.assertNumQueries(1):  # CatalogVersion.current()
+            self.assertEqual(self.client.get(url, {"type": "objective"}).data, first)
+
+        self.maps["Lattice"].modes.remove(self.modes["Oddball"])
+        after = self.client.get(url, {"type": "objective"}).data
+        self.assertEqual(len(after), len(first) - 1)
+
+    def test_health_reports_counters(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+
+        stats = self.client.get(reverse("health")).data["cache"]
+        self.assertEqual(stats["backend"], "RedisCache")
+        self.assertEqual(stats["series"]["hits"], 1)
+
+
+class CacheOutageTests(TestCase):
+
+    @override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://127.0.0.1:1/0",
+        "OPTIONS": {"socket_connect_timeout": 0.2},
+    }})
+    def test_requests_survive_an_unreachable_cache(self):
+        seed_catalog()
+        series, _ = start_series(TSDMachine)
+
+        response = APIClient().get(reverse("series-detail", args=[series.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["state"], "BAN_PHASE")
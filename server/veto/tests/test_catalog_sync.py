@@ -0,0 +1,81 @@
+import copy
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from veto.catalog import DEFAULT_CATALOG, CatalogError, load_file, sync
+from veto.machine_tsd import TSDMachine
+from veto.models import CatalogVersion, GameMode, Map, MapStat
+from veto.tests.utils import BANS, run_bans, seed_catalog, start_series
+
+
+class CatalogSyncTests(TestCase):
+
+    def setUp(self):
+        self.data = load_file(DEFAULT_CATALOG)
+
+    def combos(self):
+        return set(Map.modes.through.objects.values_list("map__name", "gamemode__name"))
+
+    def test_initial_sync_creates_catalog_and_one_version(self):
+        plan, version = sync(self.data)
+
+        self.assertEqual(version.label, "hcs-2025.1")
+        self.assertEqual(CatalogVersion.current(), version.id)
+        self.assertIn(("Lattice", "Oddball"), self.combos())
+        self.assertFalse(GameMode.objects.get(name="Slayer").is_objective)
+        self.assertEqual(Map.objects.count(), 9)
+
+    def test_resync_is_a_noop_in_a_few_queries(self):
+        sync(self.data)
+        with self.assertNumQueries(3):
+            plan, version = sync(self.data)
+        self.assertTrue(plan.is_empty())
+        self.assertIsNone(version)
+        self.assertEqual(CatalogVersion.objects.count(), 1)
+
+    def test_season_update_applies_only_the_diff(self):
+        sync(self.data)
+        data = copy.deepcopy(self.data)
+        data["version"] = "hcs-2025.2"
+        data["modes"]["Slayer"]["maps"].remove("Streets")
+        data["modes"]["Oddball"]["maps"].append("Aquarius")
+        del data["modes"]["Neutral Bomb"]
+
+        plan, version = sync(data)
+
+        self.assertEqual(plan.delete_maps, ["Streets"])
+        self.assertEqual(plan.delete_modes, ["Neutral Bomb"])
+        self.assertEqual(plan.add_links, [("Aquarius", "Oddball")])
+        self.assertEqual(plan.remove_links, [])
+        self.assertFalse(Map.objects.filter(name="Streets").exists())
+        self.assertIn(("Aquarius", "Oddball"), self.combos())
+        self.assertEqual(CatalogVersion.objects.count(), 2)
+
+    def test_dry_run_prints_plan_without_changes(self):
+        out = StringIO()
+        call_command("sync_catalog", "--dry-run", stdout=out)
+
+        self.assertIn("+ combo Oddball on Lattice", out.getvalue())
+        self.assertFalse(Map.objects.exists())
+        self.assertEqual(CatalogVersion.current(), 0)
+
+    def test_maps_used_by_history_cannot_be_pruned(self):
+        modes, maps = seed_catalog()
+        _, machine = start_series(TSDMachine)
+        run_bans(machine, modes, maps, BANS[:1])
+
+        with self.assertRaises(CatalogError):
+            sync({"version": "empty", "modes": {}})
+        self.assertTrue(Map.objects.filter(name="Live Fire").exists())
+
+    def test_maps_left_only_in_map_stats_cannot_be_pruned(self):
+        modes, maps = seed_catalog()
+        series, machine = start_series(TSDMachine)
+        run_bans(machine, modes, maps, BANS[:1])
+        series.delete()  # as archive_series does: the rollup keeps the ban
+
+        with self.assertRaisesMessage(CatalogError, "map stats"):
+            sync({"version": "empty", "modes": {}})
+        self.assertEqual(MapStat.objects.get().map, maps["Live Fire"])
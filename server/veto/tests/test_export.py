@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from veto.machine_tsd import TSDMachine
+from veto.models import SeriesState
+from veto.tests.utils import run_bans, run_picks, seed_catalog, start_series
+
+
+def body(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class SeriesExportTests(TestCase):
+
+    def setUp(self):
+        self.modes, self.maps = seed_catalog()
+        self.done, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps)
+        run_picks(machine, self.modes, self.maps)
+        self.live, machine = start_series(TSDMachine, team_a="Team Gamma")
+
+    def url(self, fmt):
+        return reverse("export-series", kwargs={"fmt": fmt})
+
+    def test_ndjson_streams_one_document_per_series(self):
+        response = self.client.get(self.url("ndjson"))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        docs = [json.loads(line) for line in body(response).splitlines()]
+        self.assertEqual([d["id"] for d in docs], [self.done.pk, self.live.pk])
+        self.assertEqual(len(docs[0]["bans"]), 7)
+        self.assertEqual(docs[0]["picks"][1]["map"], "Live Fire")
+
+    def test_state_filter(self):
+        response = self.client.get(self.url("ndjson"), {"state": SeriesState.SERIES_COMPLETE})
+
+        docs = [json.loads(line) for line in body(response).splitlines()]
+        self.assertEqual([d["id"] for d in docs], [self.done.pk])
+
+    def test_csv_has_one_row_per_event(self):
+        response = self.client.get(self.url("csv"))
+
+        rows = list(csv.DictReader(io.StringIO(body(response))))
+        done_rows = [r for r in rows if r["series_id"] == str(self.done.pk)]
+        self.assertEqual(len(done_rows), 10)  # 7 bans + 3 picks
+        self.assertEqual([r["event"] for r in rows if r["series_id"] == str(self.live.pk)], [""])
+
+    def test_invalid_date_and_format(self):
+        self.assertEqual(self.client.get(self.url("ndjson"), {"from": "yesterday"}).status_code, 400)
+        response = self.client.get(self.url("csv"), {"to": "2025-02-30"})
+        self.assertEqual((response.status_code, response.json()["detail"]), (400, {"to": "Expected YYYY-MM-DD"}))
+        self.assertEqual(self.client.get(self.url("xml")).status_code, 404)
@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto.imports import import_documents
+from veto.models import MapStat, Series, SeriesState
+from veto.tests.utils import BANS, BO3_PICKS, seed_catalog
+
+
+def document(**overrides):
+    doc = {
+        "team_a": "Team Alpha",
+        "team_b": "Team Beta",
+        "series_type": "Bo3",
+        "created_at": "2024-03-01T18:00:00+00:00",
+        "bans": [{"team": t, "kind": k, "map": m, "mode": md} for t, k, md, m in BANS],
+        "picks": [{"team": t, "map": m, "mode": md} for t, _, md, m in BO3_PICKS],
+    }
+    doc.update(overrides)
+    return json.dumps(doc)
+
+
+class SeriesImportTests(TestCase):
+
+    def setUp(self):
+        self.modes, self.maps = seed_catalog()
+
+    def test_imports_valid_documents_in_batches(self):
+        in_progress = document(picks=[{"team": "Team Beta", "map": "Fortress", "mode": "Capture the Flag"}])
+
+        result = import_documents([document(), in_progress, document()], batch_size=2)
+
+        self.assertEqual((result.imported, result.rejected), (3, []))
+        done = Series.objects.filter(state=SeriesState.SERIES_COMPLETE)
+        self.assertEqual(done.count(), 2)
+        self.assertEqual(done[0].created_at.year, 2024)
+        self.assertEqual(done[0].bans.count(), 7)
+        self.assertEqual(done[0].rounds.filter(locked=True).count(), 3)
+        live = Series.objects.get(state=SeriesState.PICK_WINDOW)
+        self.assertEqual((live.round_index, live.turn["team"]), (1, "A"))
+
+    def test_invalid_documents_are_reported_not_fatal(self):
+        bad_ban = json.loads(document())
+        bad_ban["bans"][1] = dict(bad_ban["bans"][0], team="B")
+        lines = ["{not json", json.dumps(bad_ban), document(series_type="Bo9"), document()]
+
+        result = import_documents(lines)
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual([r["line"] for r in result.rejected], [1, 2, 3])
+        self.assertIn("ban 1: That combo is already banned", result.rejected[1]["errors"])
+
+    def test_malformed_fields_are_rejected_not_raised(self):
+        lines = [
+            document(team_a=5),
+            document(bans="abc"),
+            document(picks=["Fortress"]),
+            document(created_at="2024-13-01T00:00:00"),
+            document(created_at=5),
+            document(created_at="yesterday"),
+            document(series_type=["Bo3"]),
+            document(team_b="x" * 65),
+            document(ruleset={"v": 2}),
+            document(),
+        ]
+
+        result = import_documents(lines)
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual([r["line"] for r in result.rejected], [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertIn("team_a is required (a string)", result.rejected[0]["errors"])
+        self.assertIn("bans must be a list of objects", result.rejected[1]["errors"])
+        self.assertIn("picks must be a list of objects", result.rejected[2]["errors"])
+        self.assertTrue(all(r["errors"][0].startswith("created_at:") for r in result.rejected[3:6]))
+        self.assertEqual([r["errors"] for r in result.rejected[6:]], [
+            ["Invalid series_type ['Bo3']"], ["team_b is longer than 64 characters"], ["ruleset must be a string"],
+        ])
+
+    def test_mode_conflicting_with_slot_or_kind_is_rejected(self):
+        slayer_slot = json.loads(document())
+        slayer_slot["picks"][1]["mode"] = "Oddball"
+        slayer_ban = json.loads(document())
+        slayer_ban["bans"][5]["mode"] = "Oddball"
+        wrong_kind = json.loads(document())
+        wrong_kind["picks"][0]["kind"] = "SLAYER_MAP"
+        no_mode = json.loads(document())
+        del no_mode["bans"][5]["mode"]
+
+        result = import_documents([json.dumps(d) for d in (slayer_slot, slayer_ban, wrong_kind, no_mode)])
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.rejected, [
+            {"line": 1, "errors": ["pick 1: mode 'Oddball' is not Slayer"]},
+            {"line": 2, "errors": ["ban 5: mode 'Oddball' is not Slayer"]},
+            {"line": 3, "errors": ["pick 0: kind SLAYER_MAP does not match the OBJECTIVE slot"]},
+        ])
+
+    def test_import_updates_stats_rollup(self):
+        import_documents([document()])
+
+        self.assertEqual(sum(MapStat.objects.values_list("count", flat=True)), 10)
+
+    def test_command_and_endpoint(self):
+        path = self.write_ndjson([document(), document(team_a="")])
+        out = StringIO()
+        call_command("import_series", path, stdout=out, stderr=StringIO())
+        self.assertIn("Imported 1 series, rejected 1", out.getvalue())
+
+        response = APIClient().post(
+            reverse("import-series"), data=document() + "\n", content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(Series.objects.count(), 2)
+
+    def write_ndjson(self, lines):
+        fd, path = tempfile.mkstemp(suffix=".ndjson")
+        self.addCleanup(os.unlink, path)
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
@@ -0,0 +1,186 @@
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from veto import imports, jobs
+from veto.models import Job, JobStatus, Series
+from veto.tests.test_import import document
+from veto.tests.utils import seed_catalog
+
+
+def register(kind, fn):
+    jobs.job(kind)(fn)
+    return lambda: jobs.REGISTRY.pop(kind, None)
+
+
+@override_settings(JOB_RETRY_SECONDS=0, JOB_MAX_ATTEMPTS=3)
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+    def flaky(self, progress, fail_times):
+        self.calls += 1
+        progress(self.calls, 3, f"attempt {self.calls}")
+        if self.calls <= fail_times:
+            raise RuntimeError(f"boom {self.calls}")
+        return {"calls": self.calls}
+
+    def test_success_with_progress(self):
+        self.addCleanup(register("test_flaky", self.flaky))
+        job = jobs.enqueue("test_flaky", fail_times=0)
+
+        self.assertEqual(jobs.run_pending(), 1)
+
+        response = self.client.get(reverse("jobs-detail", args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["status"], body["attempts"], body["result"]), ("SUCCEEDED", 1, {"calls": 1}))
+        self.assertEqual((body["done"], body["total"], body["message"]), (1, 3, "attempt 1"))
+        self.assertIsNotNone(body["finished_at"])
+
+    def test_retries_then_succeeds(self):
+        self.addCleanup(register("test_flaky", self.flaky))
+        job = jobs.enqueue("test_flaky", fail_times=2)
+
+        jobs.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result), (JobStatus.SUCCEEDED, 3, {"calls": 3}))
+
+    def test_fails_after_max_attempts(self):
+        self.addCleanup(register("test_flaky", self.flaky))
+        job = jobs.enqueue("test_flaky", fail_times=9, max_attempts=2)
+
+        jobs.run_pending()
+
+        body = self.client.get(reverse("jobs-detail", args=[job.pk])).json()
+        self.assertEqual((body["status"], body["attempts"]), ("FAILED", 2))
+        self.assertEqual(body["error"], "RuntimeError: boom 2")
+
+    @override_settings(JOB_RETRY_SECONDS=30)
+    def test_retry_backs_off(self):
+        self.addCleanup(register("test_flaky", self.flaky))
+        job = jobs.enqueue("test_flaky", fail_times=1)
+
+        self.assertEqual(jobs.run_pending(), 1)  # the retry is not due yet
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.QUEUED)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=25))
+
+    def test_claim_is_exclusive(self):
+        jobs.enqueue("backfill_map_stats")
+
+        self.assertIsNotNone(jobs.claim("w1"))
+        self.assertIsNone(jobs.claim("w2"))
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = jobs.enqueue("backfill_map_stats")
+        jobs.claim("gone")
+        Job.objects.filter(pk=job.pk).update(heartbeat=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (JobStatus.QUEUED, "Worker gone stopped reporting"))
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue("no_such_job")
+        self.assertEqual(self.client.get(reverse("jobs-detail", args=[999])).status_code, 404)
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    # The heartbeat thread has its own connection: it must see the job row committed
+
+    @override_settings(JOB_HEARTBEAT_SECONDS=0.05)
+    def test_heartbeat_is_refreshed_during_one_long_call(self):
+        beats = []
+
+        def long_call(progress):
+            claimed = Job.objects.get(pk=progress.job_id).heartbeat
+            for _ in range(100):
+                time.sleep(0.05)
+                beat = Job.objects.get(pk=progress.job_id).heartbeat
+                if beat > claimed:
+                    beats.append(beat)
+                    break
+            return {}
+
+        self.addCleanup(register("test_long_call", long_call))
+        job = jobs.enqueue("test_long_call")
+        jobs.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, len(beats)), (JobStatus.SUCCEEDED, 1))
+
+
+class JobKindTests(TestCase):
+
+    def setUp(self):
+        seed_catalog()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.settings_override = override_settings(JOB_DIR=tmp.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_background_import(self):
+        body = "\n".join([document(), document(series_type="Bo9")])
+        response = self.client.post(reverse("import-series") + "?background=true", body,
+                                    content_type="application/x-ndjson")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Series.objects.exists())
+        call_command("run_jobs", "--processes", "0", "--once", stdout=StringIO())
+
+        job = Job.objects.get(pk=response.json()["job"])
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        self.assertEqual((job.result["imported"], job.result["rejected_count"]), (1, 1))
+        self.assertFalse(os.path.exists(job.params["path"]))
+        self.assertEqual(self.client.get(response.json()["url"]).json()["status"], "SUCCEEDED")
+
+    @override_settings(JOB_RETRY_SECONDS=0)
+    def test_import_retry_resumes_after_committed_batches(self):
+        path = jobs.job_path("retry.ndjson")
+        path.write_text("\n".join([document(series_type="Bo9"), document(), document()]) + "\n")
+        write_batch, calls = imports._write_batch, []
+
+        def fail_second_batch(*args):
+            calls.append(args[0][0][0]["team_a"])
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            write_batch(*args)
+
+        job = jobs.enqueue("import_series", path=str(path), batch_size=1)
+        with mock.patch.object(imports, "_write_batch", fail_second_batch):
+            self.assertEqual(jobs.run_pending(), 2)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, len(calls)), (JobStatus.SUCCEEDED, 2, 3))
+        self.assertEqual((job.result["imported"], job.result["rejected"][0]["line"]), (2, 1))
+        self.assertEqual(job.params["resume"]["line"], 4)
+        self.assertEqual(Series.objects.count(), 2)
+
+    def test_export_and_backfill(self):
+        self.client.post(reverse("import-series"), document(), content_type="application/x-ndjson")
+        export = jobs.enqueue("export_series", fmt="ndjson")
+        backfill = jobs.enqueue("backfill_map_stats")
+
+        self.assertEqual(jobs.run_pending(), 2)
+
+        export.refresh_from_db()
+        backfill.refresh_from_db()
+        self.assertEqual((export.status, export.result["documents"], export.done), (JobStatus.SUCCEEDED, 1, 1))
+        with open(export.result["path"], encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertEqual(backfill.status, JobStatus.SUCCEEDED)
+        self.assertGreater(backfill.result["buckets"], 0)
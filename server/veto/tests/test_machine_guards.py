@@ -0,0 +1,70 @@
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from veto.machine_tsd import GuardError, TSDMachine
+from veto.models import BanKind, SeriesBan, SeriesState
+from veto.tests.utils import BANS, apply_step, run_bans, seed_catalog, start_series
+
+
+class RuleConstraintTests(TestCase):
+
+    def setUp(self):
+        self.modes, self.maps = seed_catalog()
+
+    def test_repeated_objective_ban_maps_to_guard_error(self):
+        series, machine = start_series(TSDMachine)
+        apply_step(machine, self.modes, self.maps, BANS[0])
+
+        with self.assertRaisesMessage(GuardError, "That combo is already banned"):
+            apply_step(machine, self.modes, self.maps, ("B",) + BANS[0][1:])
+
+        series.refresh_from_db()
+        self.assertEqual(series.ban_index, 1)
+        self.assertEqual(series.turn["team"], "B")
+
+    def test_repeated_slayer_ban_maps_to_guard_error(self):
+        series, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps, BANS[:6])
+
+        with self.assertRaisesMessage(GuardError, "That Slayer map is already banned"):
+            apply_step(machine, self.modes, self.maps, ("A",) + BANS[5][1:])
+
+    def test_repeated_picks_map_to_guard_error(self):
+        series, machine = start_series(TSDMachine, series_type="Bo5")
+        run_bans(machine, self.modes, self.maps)
+        picks = [
+            ("B", "OBJECTIVE_COMBO", "Capture the Flag", "Fortress"),
+            ("A", "SLAYER_MAP", "Slayer", "Live Fire"),
+        ]
+        for step in picks:
+            apply_step(machine, self.modes, self.maps, step, "PICK")
+
+        with self.assertRaisesMessage(GuardError, "That objective combo was already picked"):
+            apply_step(machine, self.modes, self.maps, ("B",) + picks[0][1:], "PICK")
+
+        apply_step(machine, self.modes, self.maps, ("B", "OBJECTIVE_COMBO", "Oddball", "Recharge"), "PICK")
+        apply_step(machine, self.modes, self.maps, ("A", "OBJECTIVE_COMBO", "Capture the Flag", "Origin"), "PICK")
+        with self.assertRaisesMessage(GuardError, "Map already used for Slayer"):
+            apply_step(machine, self.modes, self.maps, ("B", "SLAYER_MAP", "Slayer", "Live Fire"), "PICK")
+
+        series.refresh_from_db()
+        self.assertEqual(series.state, SeriesState.PICK_WINDOW)
+        self.assertEqual(series.round_index, 4)
+
+    def test_constraint_holds_without_machine_lock(self):
+        series, machine = start_series(TSDMachine)
+        apply_step(machine, self.modes, self.maps, BANS[0])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SeriesBan.objects.create(
+                series=series, step_index=5, by_team="B", kind=BanKind.OBJECTIVE_COMBO,
+                map=self.maps["Live Fire"], objective_mode=self.modes["King of the Hill"],
+            )
+
+    def test_other_integrity_errors_are_not_rule_violations(self):
+        series, machine = start_series(TSDMachine)
+        SeriesBan.objects.create(series=series, step_index=0, by_team="A", kind=BanKind.SLAYER_MAP,
+                                 map=self.maps["Origin"])
+
+        with self.assertRaisesMessage(IntegrityError, "step_index"):
+            apply_step(machine, self.modes, self.maps, BANS[0])
@@ -0,0 +1,85 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto import pools
+from veto.catalog import CatalogError, sync
+from veto.machine_tsd import GuardError, TSDMachine
+from veto.models import Series
+from veto.tests.utils import BANS, CATALOG, apply_step, run_bans, seed_catalog, start_series
+
+
+class MapPoolTests(TestCase):
+
+    def setUp(self):
+        pools.pool_catalog.cache_clear()
+        self.modes, self.maps = seed_catalog()
+
+    def test_series_is_pinned_to_the_pool_current_at_confirm(self):
+        unpinned, _ = start_series(TSDMachine)
+        pool = pools.publish("season-1")
+        pinned, _ = start_series(TSDMachine)
+
+        self.assertIsNone(Series.objects.get(pk=unpinned.pk).map_pool_id)
+        self.assertEqual(Series.objects.get(pk=pinned.pk).map_pool_id, pool.pk)
+
+    def test_live_catalog_edits_do_not_change_pinned_series(self):
+        _, unpinned_machine = start_series(TSDMachine)
+        pools.publish("season-1")
+        pinned, machine = start_series(TSDMachine)
+        self.maps["Live Fire"].modes.remove(self.modes["King of the Hill"])
+
+        apply_step(machine, self.modes, self.maps, BANS[0])
+        self.assertEqual(pinned.bans.count(), 1)
+        with self.assertRaisesMessage(GuardError, "Map does not support this objective"):
+            apply_step(unpinned_machine, self.modes, self.maps, BANS[0])
+
+    def test_published_pools_are_immutable(self):
+        pool = pools.publish("season-1")
+        pool.label = "season-2"
+        with self.assertRaises(ValueError):
+            pool.save()
+        with self.assertRaises(pools.PoolError):
+            pools.publish("season-1")
+
+    def test_combos_endpoint_serves_frozen_pool_with_far_future_caching(self):
+        pool = pools.publish("season-1")
+        self.maps["Fortress"].delete()
+
+        response = APIClient().get(reverse("pools-combos", args=[pool.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(len(response.data), sum(len(maps) for maps in CATALOG.values()))
+        self.assertIn("Fortress", {c["map"] for c in response.data})
+        with self.assertNumQueries(0):
+            APIClient().get(reverse("pools-combos", args=[pool.pk]))
+
+    def test_legal_moves_follow_turn_and_bans(self):
+        pools.publish("season-1")
+        series, machine = start_series(TSDMachine)
+        url = reverse("series-series-legal-moves", args=[series.pk])
+
+        moves = APIClient().get(url).data["moves"]
+        self.assertEqual(len(moves), 9)  # every objective combo
+        self.assertEqual({m["team"] for m in moves}, {"A"})
+
+        apply_step(machine, self.modes, self.maps, BANS[0])
+        moves = APIClient().get(url).data["moves"]
+        self.assertEqual(len(moves), 8)
+        self.assertNotIn(("King of the Hill", "Live Fire"), {(m["mode"], m["map"]) for m in moves})
+
+        run_bans(machine, self.modes, self.maps, BANS[1:])
+        moves = APIClient().get(url).data["moves"]
+        self.assertEqual({(m["team"], m["kind"]) for m in moves}, {("B", "OBJECTIVE_COMBO")})
+
+    def test_catalog_prune_keeps_maps_pinned_by_series_in_progress(self):
+        pools.publish("season-1")
+        start_series(TSDMachine)
+        data = {"version": "next", "modes": {
+            mode: {"objective": mode != "Slayer", "maps": [m for m in maps if m != "Fortress"]}
+            for mode, maps in CATALOG.items()
+        }}
+
+        with self.assertRaisesMessage(CatalogError, "Fortress"):
+            sync(data)
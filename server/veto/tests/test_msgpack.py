@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from veto import delta
+from veto.machine_tsd import TSDMachine
+from veto.models import Series, SeriesBan
+from veto.tests.utils import BANS, seed_catalog, start_series
+
+msgpack = pytest.importorskip("msgpack")
+
+MSGPACK = "application/msgpack"
+
+
+def unpack(response):
+    assert response["Content-Type"] == MSGPACK
+    return msgpack.unpackb(response.content, raw=False)
+
+
+class MessagePackNegotiationTests(TestCase):
+
+    def setUp(self):
+        self.modes, self.maps = seed_catalog()
+        self.series, self.machine = start_series(TSDMachine)
+        self.url = reverse("series-detail", args=[self.series.pk])
+
+    def test_same_payload_as_json(self):
+        for url in (self.url, reverse("map-mode-combos"), reverse("series-list"), reverse("maps-list")):
+            as_json = self.client.get(url).json()
+            self.assertEqual(unpack(self.client.get(url, HTTP_ACCEPT=MSGPACK)), as_json)
+            self.assertEqual(unpack(self.client.get(url, {"format": "msgpack"})), as_json)
+
+    def test_json_stays_the_default(self):
+        self.assertEqual(self.client.get(self.url)["Content-Type"], "application/json")
+        response = self.client.get(self.url, HTTP_ACCEPT=f"{MSGPACK};q=0.5, application/json")
+        self.assertEqual(response["Content-Type"], "application/json")
+
+    def test_msgpack_action_post(self):
+        team, _, mode, map_name = BANS[0]
+        body = msgpack.packb({"team": team, "map_id": self.maps[map_name].pk, "mode_id": self.modes[mode].pk})
+
+        response = self.client.post(
+            reverse("series-series-ban-objective-combo", args=[self.series.pk]), body,
+            content_type=MSGPACK, HTTP_ACCEPT=MSGPACK,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(unpack(response), {"detail": "Objective combo banned"})
+        self.assertEqual(SeriesBan.objects.filter(series=self.series).count(), 1)
+
+    def test_malformed_body_and_errors(self):
+        url = reverse("series-series-ban-slayer-map", args=[self.series.pk])
+        response = self.client.post(url, b"\xc1", content_type=MSGPACK, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("MessagePack parse error", unpack(response)["detail"])
+        self.assertEqual(unpack(self.client.get(reverse("series-detail", args=[999999]), HTTP_ACCEPT=MSGPACK))["status"], 404)
+
+    def test_patch_keeps_the_msgpack_content_type(self):
+        base = self.client.get(self.url).json()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.machine.ban_objective_combo("A", self.modes[BANS[0][2]].pk, self.maps[BANS[0][3]].pk)
+
+        patch = unpack(self.client.get(self.url, {"since": base["version"]}, HTTP_ACCEPT=MSGPACK))
+
+        self.assertIsInstance(patch, list)
+        self.assertEqual(delta.apply(base, patch), self.client.get(self.url).json())
+
+
+class MessagePackCommandTests(TransactionTestCase):
+    # series_command is a plain async view: it negotiates with veto.renderers.parse_body / respond
+
+    def setUp(self):
+        self.modes, self.maps = seed_catalog()
+        self.series, _ = start_series(TSDMachine)
+        self.url = reverse("series-command", args=[self.series.pk])
+
+    def test_command_round_trip(self):
+        team, _, mode, map_name = BANS[0]
+        version = Series.objects.get(pk=self.series.pk).version
+        payload = {"command": "ban_objective_combo", "team": team, "version": version,
+                   "map_id": self.maps[map_name].pk, "mode_id": self.modes[mode].pk}
+
+        ok = self.client.post(self.url, msgpack.packb(payload), content_type=MSGPACK, HTTP_ACCEPT=MSGPACK)
+        stale = self.client.post(self.url, msgpack.packb(payload), content_type=MSGPACK, HTTP_ACCEPT=MSGPACK)
+        as_json = self.client.post(self.url, json.dumps(payload), content_type="application/json")
+        bad = self.client.post(self.url, b"\xc1", content_type=MSGPACK, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual((ok.status_code, unpack(ok)["version"]), (200, version + 1))
+        self.assertEqual((stale.status_code, unpack(stale)["version"]), (409, version + 1))
+        self.assertEqual((as_json.status_code, as_json["Content-Type"]), (409, "application/json"))
+        self.assertEqual(bad.status_code, 400)
+        self.assertIn("MessagePack parse error", unpack(bad)["detail"])
@@ -0,0 +1,52 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto.machine_tsd import TSDMachine
+from veto.profiling import ProfileMiddleware, make_token
+from veto.tests.utils import seed_catalog, start_series
+
+
+class ProfileMiddlewareTests(TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        seed_catalog()
+        self.series, _ = start_series(TSDMachine)
+        self.url = reverse("series-detail", args=[self.series.pk])
+
+    def get(self, **headers):
+        with self.settings(PROFILE_DIR=str(self.dir)):
+            return APIClient().get(self.url, headers=headers)
+
+    def test_signed_header_writes_profile_stacks_and_sql(self):
+        response = self.get(**{"X-Veto-Profile": make_token()})
+
+        self.assertEqual(response.status_code, 200)
+        profile_id = response["X-Veto-Profile-Id"]
+        self.assertTrue((self.dir / f"{profile_id}.prof").stat().st_size > 0)
+        self.assertTrue((self.dir / f"{profile_id}.folded").exists())
+        sql = json.loads((self.dir / f"{profile_id}.sql.json").read_text())
+        self.assertEqual(sql["status"], 200)
+        self.assertTrue(any("veto_series" in q["sql"] for q in sql["queries"]))
+
+    def test_forged_or_missing_header_is_not_profiled(self):
+        self.assertNotIn("X-Veto-Profile-Id", self.get(**{"X-Veto-Profile": "profile:forged:sig"}))
+        self.assertNotIn("X-Veto-Profile-Id", self.get())
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1.0)
+    def test_sample_rate_profiles_without_header(self):
+        self.assertIn("X-Veto-Profile-Id", self.get())
+
+    @override_settings(PROFILE_DIR="")
+    def test_disabled_middleware_is_dropped_from_the_chain(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfileMiddleware(lambda request: None)
@@ -0,0 +1,77 @@
+import pytest
+from django.core.cache import cache as default_cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto.machine_tsd import TSDMachine
+from veto.models import SeriesBan
+from veto.queryaudit import QueryAudit, QueryAuditError, normalize
+from veto.tests.utils import BANS, apply_step, seed_catalog, start_series
+
+
+class QueryAuditTests(TestCase):
+
+    def setUp(self):
+        default_cache.clear()
+        self.modes, self.maps = seed_catalog()
+        self.series, machine = start_series(TSDMachine)
+        for step in BANS:
+            apply_step(machine, self.modes, self.maps, step)
+
+    def test_normalize_groups_statements_that_differ_only_in_values(self):
+        self.assertEqual(
+            normalize('SELECT * FROM "veto_map" WHERE "id" IN (%s, %s, %s) AND name = \'x\' LIMIT 21'),
+            normalize('SELECT *  FROM "veto_map" WHERE "id" IN (%s) AND name = \'y\' LIMIT 1'),
+        )
+
+    def test_lazy_fk_in_a_loop_is_reported_at_its_call_site(self):
+        with QueryAudit(repeat=3) as audit:
+            labels = [str(ban) for ban in SeriesBan.objects.all()]
+
+        self.assertEqual(len(labels), len(BANS))
+        objective_bans = sum(1 for step in BANS if step[1] == "OBJECTIVE_COMBO")
+        [group] = [g for g in audit.repeats if "veto_map" in g.sql]
+        self.assertEqual(group.count, objective_bans)
+        self.assertRegex(group.site, r"^veto/models\.py:\d+ in __str__$")
+        with self.assertRaisesMessage(QueryAuditError, f"repeated {objective_bans}x"):
+            audit.assert_clean()
+
+    def test_slow_queries_are_logged_with_their_stack(self):
+        with self.assertLogs("veto.queryaudit", "WARNING"):
+            with QueryAudit(slow_ms=0) as audit:
+                SeriesBan.objects.count()
+
+        self.assertEqual(len(audit.slow), 1)
+        self.assertIn("test_query_audit.py", audit.slow[0].stack[0])
+
+    def test_series_detail_resolves_slayer_mode_once(self):
+        with QueryAudit(repeat=1) as audit:
+            response = APIClient().get(reverse("series-detail", args=[self.series.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(1 for a in response.data["actions"] if a["kind"] == "SLAYER_MAP"), 2)
+        audit.assert_clean()
+
+    @override_settings(QUERY_AUDIT=True, QUERY_AUDIT_REPEAT=0)
+    def test_dev_middleware_summarises_each_request(self):
+        with self.assertLogs("veto.queryaudit", "WARNING"):
+            response = APIClient().get(reverse("series-detail", args=[self.series.pk]))
+
+        self.assertRegex(response["X-Query-Audit"], r"^\d+ queries, [1-9]\d* repeated, 0 slow$")
+
+    @override_settings(QUERY_AUDIT=True, QUERY_AUDIT_STRICT=True, QUERY_AUDIT_REPEAT=1000, QUERY_AUDIT_SLOW_MS=0)
+    def test_strict_middleware_fails_on_slow_queries_too(self):
+        with self.assertLogs("veto.queryaudit", "WARNING"), self.assertRaisesMessage(QueryAuditError, "slow"):
+            APIClient().get(reverse("series-detail", args=[self.series.pk]))
+
+
+@pytest.mark.django_db
+def test_query_audit_fixture_fails_on_repeats(query_audit):
+    seed_catalog()
+    with query_audit(repeat=2) as audit:
+        for _ in range(3):
+            SeriesBan.objects.filter(kind="SLAYER_MAP").exists()
+
+    with pytest.raises(QueryAuditError):
+        audit.assert_clean()
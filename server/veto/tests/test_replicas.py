@@ -0,0 +1,66 @@
+import time
+
+from django.core.cache import cache as default_cache
+from django.db import router
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from veto.machine_tsd import TSDMachine
+from veto.models import Series
+from veto.replicas import PIN_COOKIE, PIN_HEADER, replica_reads
+from veto.tests.utils import BANS, apply_step, seed_catalog, start_series
+
+
+@override_settings(DATABASE_READ_REPLICAS=["replica"], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(TransactionTestCase):
+    # Reads inside a transaction stay on the primary, so TestCase's wrapping transaction would hide the replica
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        default_cache.clear()
+        self.modes, self.maps = seed_catalog()
+        self.series, self.machine = start_series(TSDMachine)
+        # The replica lags: it still has the series as it was created
+        Series.objects.using("replica").create(pk=self.series.pk, team_a="Team Alpha", team_b="Team Beta")
+        self.url = reverse("series-detail", args=[self.series.pk])
+        self.primary_version = Series.objects.get(pk=self.series.pk).version
+
+    def test_safe_requests_read_from_the_replica(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.json()["version"], 0)
+        self.assertNotIn(PIN_HEADER, response)
+
+    def test_writer_reads_its_own_writes(self):
+        command = reverse("series-command", args=[self.series.pk])
+        response = self.client.post(command, {"command": "undo", "version": -1}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 409)  # still a write request: it pins
+        self.assertGreater(int(response[PIN_HEADER]), time.time())
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+        self.assertEqual(self.client.get(self.url).json()["version"], self.primary_version)
+
+    def test_pin_header(self):
+        pinned = self.client.get(self.url, headers={"X-Veto-Primary": str(int(time.time()) + 5)})
+        expired = self.client.get(self.url, headers={"X-Veto-Primary": str(int(time.time()) - 1)})
+        garbage = self.client.get(self.url, headers={"X-Veto-Primary": "soon"})
+
+        self.assertEqual(pinned.json()["version"], self.primary_version)
+        self.assertEqual(expired.json()["version"], 0)
+        self.assertEqual(garbage.json()["version"], 0)
+
+    def test_machine_always_uses_the_primary(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Series), "replica")
+            machine = TSDMachine(self.series.pk)
+            s = apply_step(machine, self.modes, self.maps, BANS[0])
+
+        self.assertEqual(machine.series.version, self.primary_version)
+        self.assertEqual(s.version, self.primary_version + 1)
+        self.assertEqual(Series.objects.using("replica").get(pk=self.series.pk).version, 0)
+
+    @override_settings(DATABASE_READ_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Series), "default")
+        self.assertEqual(self.client.get(self.url).json()["version"], self.primary_version)
@@ -0,0 +1,106 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from veto import actors
+from veto.machine_tsd import TSDMachine, TurnError
+from veto.models import Series, SeriesBan
+from veto.tests.utils import BANS, seed_catalog, start_series
+
+
+def ban(step, modes, maps, version=None):
+    team, kind, mode, map_name = step
+    payload = {"command": "ban_objective_combo" if kind == "OBJECTIVE_COMBO" else "ban_slayer_map",
+               "team": team, "map_id": maps[map_name].pk, "mode_id": modes[mode].pk}
+    if version is not None:
+        payload["version"] = version
+    return actors.Command.from_payload(payload)
+
+
+@override_settings(SERIES_ACTORS=True)
+class SeriesActorTests(TransactionTestCase):
+    # Commands run on the actors' own threads, so the data must be committed
+
+    def setUp(self):
+        patcher = mock.patch.object(actors, "registry", actors.ActorRegistry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.modes, self.maps = seed_catalog()
+        self.series, _ = start_series(TSDMachine)
+
+    def run_all(self, *commands):
+        async def go():
+            return await asyncio.gather(
+                *(actors.execute(self.series.pk, c) for c in commands), return_exceptions=True
+            )
+        return asyncio.run(go())
+
+    def test_burst_of_identical_commands_applies_once(self):
+        version = Series.objects.get(pk=self.series.pk).version
+        results = self.run_all(*[ban(BANS[0], self.modes, self.maps, version) for _ in range(5)])
+
+        applied = [r for r in results if isinstance(r, actors.Snapshot)]
+        self.assertEqual(len(applied), 1)
+        self.assertEqual(applied[0].version, version + 1)
+        self.assertTrue(all(isinstance(r, actors.StaleCommand) for r in results if r is not applied[0]))
+        self.assertEqual(SeriesBan.objects.filter(series=self.series).count(), 1)
+
+    def test_queued_commands_run_in_order(self):
+        results = self.run_all(*[ban(step, self.modes, self.maps) for step in BANS[:4]])
+
+        self.assertEqual([r.turn["team"] for r in results], ["B", "A", "B", "A"])
+        self.assertEqual(SeriesBan.objects.filter(series=self.series).count(), 4)
+
+    def test_out_of_turn_command_is_rejected_without_taking_the_lock(self):
+        self.run_all(ban(BANS[0], self.modes, self.maps))
+
+        with mock.patch.object(TSDMachine, "_lock", autospec=True, side_effect=TSDMachine._lock) as lock:
+            [result] = self.run_all(ban(BANS[2], self.modes, self.maps))  # team A again, but B is on turn
+
+        self.assertIsInstance(result, TurnError)
+        lock.assert_not_called()
+
+    def test_writes_made_elsewhere_are_picked_up(self):
+        self.run_all(ban(BANS[0], self.modes, self.maps))
+        TSDMachine(self.series.pk).ban_objective_combo("B", self.modes["King of the Hill"].pk, self.maps["Recharge"].pk)
+
+        version = Series.objects.get(pk=self.series.pk).version
+        [result] = self.run_all(ban(BANS[2], self.modes, self.maps, version))
+
+        self.assertIsInstance(result, actors.Snapshot)
+        self.assertEqual(result.version, version + 1)
+
+
+class SeriesCommandEndpointTests(TransactionTestCase):
+
+    def setUp(self):
+        self.modes, self.maps = seed_catalog()
+        self.series, _ = start_series(TSDMachine)
+        self.url = reverse("series-command", args=[self.series.pk])
+
+    def post(self, payload):
+        return self.client.post(self.url, json.dumps(payload), content_type="application/json")
+
+    def test_command_statuses(self):
+        version = Series.objects.get(pk=self.series.pk).version
+        team, _, mode, map_name = BANS[0]
+        payload = {"command": "ban_objective_combo", "team": team,
+                   "map_id": self.maps[map_name].pk, "mode_id": self.modes[mode].pk, "version": version}
+
+        ok = self.post(payload)
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(ok.json()["version"], version + 1)
+        self.assertEqual(ok.json()["turn"]["team"], "B")
+
+        stale = self.post(payload)
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.json()["version"], version + 1)
+
+        self.assertEqual(self.post({**payload, "version": None}).status_code, 400)  # B's turn now
+        self.assertEqual(self.post({"command": "launch"}).status_code, 400)
+        self.assertEqual(self.client.post(reverse("series-command", args=[999999]), json.dumps({"command": "undo"}),
+                                          content_type="application/json").status_code, 404)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
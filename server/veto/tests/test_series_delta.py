@@ -0,0 +1,103 @@
+import json
+
+from django.core.cache import cache as default_cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto import cache, delta
+from veto.machine_tsd import TSDMachine
+from veto.tests.utils import BANS, BO3_PICKS, apply_step, run_bans, seed_catalog, start_series
+
+
+class SeriesPatchTests(TestCase):
+
+    def setUp(self):
+        default_cache.clear()
+        cache.reset_stats()
+        self.modes, self.maps = seed_catalog()
+        self.series, self.machine = start_series(TSDMachine)
+        self.client = APIClient()
+        self.url = reverse("series-detail", args=[self.series.pk])
+
+    def step(self, step, action="BAN"):
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_step(self.machine, self.modes, self.maps, step, action)
+
+    def get(self, since):
+        return self.client.get(self.url, {"since": since})
+
+    def test_patch_brings_the_client_up_to_date(self):
+        base = self.client.get(self.url).json()
+        self.step(BANS[0])
+        self.step(BANS[1])
+
+        response = self.get(base["version"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], delta.CONTENT_TYPE)
+        patch = response.json()
+        self.assertIn({"op": "replace", "path": "/version", "value": base["version"] + 2}, patch)
+        self.assertEqual(delta.apply(base, patch), self.client.get(self.url).json())
+        self.assertEqual(cache.stats()["patch"]["hits"], 1)
+
+    def test_patch_is_smaller_than_the_body(self):
+        run_bans(self.machine, self.modes, self.maps)
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_step(self.machine, self.modes, self.maps, BO3_PICKS[0], "PICK")
+        base = self.client.get(self.url).json()
+        self.step(BO3_PICKS[1], "PICK")
+
+        response = self.get(base["version"])
+
+        self.assertEqual(response["Content-Type"], delta.CONTENT_TYPE)
+        self.assertLess(len(response.content) * 3, len(self.client.get(self.url).content))
+
+    def test_up_to_date_client_gets_an_empty_patch(self):
+        version = self.client.get(self.url).json()["version"]
+
+        response = self.get(version)
+
+        self.assertEqual((response["Content-Type"], response.json()), (delta.CONTENT_TYPE, []))
+
+    def test_full_body_when_the_base_is_gone(self):
+        base = self.client.get(self.url).json()
+        self.step(BANS[0])
+        default_cache.delete(cache.series_key(self.series.pk, base["version"]))
+
+        response = self.get(base["version"])
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json()["version"], base["version"] + 1)
+        self.assertEqual(cache.stats()["patch"]["misses"], 1)
+
+    @override_settings(SERIES_PATCH_MAX_VERSIONS=1)
+    def test_full_body_when_too_far_behind(self):
+        base = self.client.get(self.url).json()
+        self.step(BANS[0])
+        self.step(BANS[1])
+
+        response = self.get(base["version"])
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json()["version"], base["version"] + 2)
+
+    def test_bad_since(self):
+        self.assertEqual(self.get("latest").status_code, 400)
+
+
+def test_diff_round_trips():
+    old = {"a/b": 1, "x": {"y": [1, 2, 3, 4]}, "gone": None, "flag": 1,
+           "actions": [{"step": 0}, {"step": 1}, {"step": 2}]}
+    new = {"a/b": 2, "x": {"y": [1, 3, 4]}, "new~": [], "flag": True,
+           "actions": [{"step": 0}, {"step": 0, "pick": True}, {"step": 1}, {"step": 2}]}
+
+    ops = delta.diff(old, new)
+
+    assert delta.apply(old, ops) == json.loads(json.dumps(new))
+    assert {"op": "add", "path": "/actions/1", "value": {"step": 0, "pick": True}} in ops
+    assert {"op": "remove", "path": "/x/y/1"} in ops
+    assert {"op": "replace", "path": "/a~1b", "value": 2} in ops
+    assert {"op": "add", "path": "/new~0", "value": []} in ops
+    assert {"op": "replace", "path": "/flag", "value": True} in ops
+    assert delta.diff(new, new) == []
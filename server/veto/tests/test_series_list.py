@@ -0,0 +1,47 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto.machine_tsd import TSDMachine
+from veto.tests.utils import BANS, run_bans, seed_catalog, start_series
+
+
+class SeriesListTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.modes, self.maps = seed_catalog()
+
+    def _make_series(self, n):
+        for _ in range(n):
+            _, machine = start_series(TSDMachine)
+            run_bans(machine, self.modes, self.maps, BANS[:3])
+
+    def test_list_returns_summary_with_counts(self):
+        self._make_series(1)
+
+        response = self.client.get(reverse('series-list'))
+
+        self.assertEqual(response.status_code, 200)
+        row = response.data['results'][0]
+        self.assertNotIn('actions', row)
+        self.assertEqual(row['ban_count'], 3)
+        self.assertEqual(row['pick_count'], 0)
+        self.assertEqual(row['series_type'], 'Bo3')
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        self._make_series(2)
+        with self.assertNumQueries(2):  # COUNT(*) + page
+            self.client.get(reverse('series-list'))
+
+        self._make_series(8)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('series-list'))
+
+    def test_detail_keeps_full_timeline(self):
+        self._make_series(1)
+        series_id = self.client.get(reverse('series-list')).data['results'][0]['id']
+
+        response = self.client.get(reverse('series-detail', kwargs={'pk': series_id}))
+
+        self.assertEqual(len(response.data['actions']), 3)
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from veto.integrity import Catalogs, check_shard, id_shards
+from veto.machine_tsd import TSDMachine
+from veto.models import Job, Series, SeriesBan, SeriesRound, SeriesState
+from veto.tests.utils import BANS, run_bans, run_picks, seed_catalog, start_series
+
+
+class SeriesRulesTests(TestCase):
+
+    def setUp(self):
+        self.modes, self.maps = seed_catalog()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.report = os.path.join(tmp.name, "report.ndjson")
+
+    def finished(self):
+        series, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps)
+        run_picks(machine, self.modes, self.maps)
+        return series
+
+    def banned(self):
+        series, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps)
+        return series
+
+    def check(self, *args):
+        out = StringIO()
+        call_command("check_series_rules", "--processes", "0", "--report", self.report, *args, stdout=out)
+        with open(self.report, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        return {line["series"]: line["violations"] for line in lines}, out.getvalue()
+
+    def test_legal_series_pass(self):
+        self.finished()
+        self.banned()
+        start_series(TSDMachine)
+
+        report, out = self.check("--flag")
+
+        self.assertEqual(report, {})
+        self.assertIn("Checked 3 series", out)
+        self.assertFalse(Series.objects.filter(needs_review=True).exists())
+
+    def test_reports_and_flags_violations(self):
+        clean = self.finished()
+        banned_slayer, wrong_team, banned_pick, stale = self.finished(), self.banned(), self.finished(), self.banned()
+        # Exact duplicates are unique constraints; a pick of a banned map is not
+        SeriesRound.objects.filter(series=banned_slayer, order=1).update(pick_map=self.maps["Streets"])
+        SeriesBan.objects.filter(series=wrong_team, step_index=2).update(by_team="B")
+        SeriesRound.objects.filter(series=banned_pick, order=0).update(
+            pick_map=self.maps["Live Fire"], mode=self.modes["King of the Hill"],
+        )
+        Series.objects.filter(pk=stale.pk).update(state=SeriesState.SERIES_COMPLETE, turn={})
+
+        report, out = self.check("--flag")
+
+        self.assertEqual(set(report), {banned_slayer.pk, wrong_team.pk, banned_pick.pk, stale.pk})
+        self.assertEqual(report[banned_slayer.pk], [
+            {"phase": "pick", "index": 1, "error": "This Slayer map is banned"},
+        ])
+        self.assertEqual(report[wrong_team.pk][0], {"phase": "ban", "index": 2, "error": "Not your turn"})
+        self.assertEqual(report[banned_pick.pk], [{"phase": "pick", "index": 0, "error": "Combo is banned"}])
+        self.assertEqual([v["phase"] for v in report[stale.pk]], ["state", "state"])
+        self.assertIn("4 with violations", out)
+        self.assertIn("1 × ban: Not your turn", out)
+        self.assertEqual(
+            set(Series.objects.filter(needs_review=True).values_list("pk", flat=True)),
+            {banned_slayer.pk, wrong_team.pk, banned_pick.pk, stale.pk},
+        )
+        self.assertFalse(Series.objects.get(pk=clean.pk).needs_review)
+
+    def test_flag_clears_fixed_series(self):
+        series = self.banned()
+        Series.objects.filter(pk=series.pk).update(needs_review=True)
+
+        self.check("--flag")
+
+        self.assertFalse(Series.objects.get(pk=series.pk).needs_review)
+
+    def test_out_of_order_rows(self):
+        series = self.banned()
+        SeriesBan.objects.filter(series=series, step_index=6).update(step_index=9)
+
+        report, _ = self.check()
+
+        self.assertEqual(report[series.pk][0], {"phase": "ban", "index": 6, "error": "Out of order: stored as step 9"})
+        self.assertFalse(Series.objects.get(pk=series.pk).needs_review)  # report only
+
+    def test_repair_cuts_back_to_the_last_legal_move(self):
+        series = self.finished()
+        SeriesBan.objects.filter(series=series, step_index=2).update(by_team="B")
+        version = Series.objects.get(pk=series.pk).version
+
+        _, out = self.check("--repair")
+
+        series.refresh_from_db()
+        self.assertEqual(list(series.bans.values_list("step_index", flat=True)), [0, 1])
+        self.assertFalse(series.rounds.filter(locked=True).exists())
+        self.assertEqual((series.state, series.ban_index), (SeriesState.BAN_PHASE, 2))
+        self.assertEqual(series.turn, {"team": BANS[2][0], "action": "BAN", "kind": BANS[2][1]})
+        self.assertEqual(series.version, version + 1)
+        self.assertIn("queued backfill_map_stats", out)
+        self.assertTrue(Job.objects.filter(kind="backfill_map_stats").exists())
+        self.assertEqual(self.check()[0], {})
+
+    def test_repair_reopens_picks(self):
+        series = self.finished()
+        SeriesRound.objects.filter(series=series, order=1).update(pick_by="B")
+
+        self.check("--repair")
+
+        series.refresh_from_db()
+        self.assertEqual(list(series.rounds.filter(locked=True).values_list("order", flat=True)), [0])
+        self.assertEqual((series.state, series.round_index), (SeriesState.PICK_WINDOW, 1))
+        self.assertEqual(series.turn["action"], "PICK")
+        self.assertEqual(self.check()[0], {})
+
+    def test_shards_cover_every_id(self):
+        ids = [self.banned().pk for _ in range(5)]
+        Series.objects.filter(pk__in=ids[1:]).update(state=SeriesState.SERIES_COMPLETE, turn={})
+
+        shards = id_shards(2)
+        catalogs = Catalogs()
+        results = [check_shard(lo, hi, catalogs) for lo, hi in shards]
+
+        self.assertEqual((shards[0][0], shards[-1][1]), (ids[0], ids[-1] + 1))
+        self.assertEqual(sum(r.checked for r in results), 5)
+        self.assertEqual(sorted(c.id for r in results for c in r.bad), ids[1:])
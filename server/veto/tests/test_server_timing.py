@@ -0,0 +1,64 @@
+import re
+
+from django.core.cache import cache as default_cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto.machine_tsd import TSDMachine
+from veto.tests.utils import BANS, seed_catalog, start_series
+from veto.timing import timed
+
+
+def phases(response):
+    return {m[0]: float(m[1]) for m in re.findall(r"(\w+);(?:desc=\"[^\"]*\";)?dur=([\d.]+)", response["Server-Timing"])}
+
+
+class ServerTimingTests(TestCase):
+
+    def setUp(self):
+        default_cache.clear()
+        self.modes, self.maps = seed_catalog()
+        self.series, _ = start_series(TSDMachine)
+        self.client = APIClient()
+
+    def test_detail_reports_db_serialize_and_render(self):
+        response = self.client.get(reverse("series-detail", args=[self.series.pk]))
+
+        found = phases(response)
+        self.assertLessEqual({"db", "serialize", "render", "total"}, found.keys())
+        self.assertGreaterEqual(found["total"], found["serialize"])
+        self.assertRegex(response["Server-Timing"], r'db;desc="\d+ queries"')
+
+    def test_machine_command_reports_lock_and_guards(self):
+        team, _, mode, map_name = BANS[0]
+        response = self.client.post(
+            reverse("series-series-ban-objective-combo", args=[self.series.pk]),
+            {"team": team, "mode_id": self.modes[mode].pk, "map_id": self.maps[map_name].pk}, format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual({"lock", "guards", "db", "total"}, phases(response).keys())
+
+    def test_guard_failures_are_timed_too(self):
+        response = self.client.post(
+            reverse("series-series-ban-slayer-map", args=[self.series.pk]),
+            {"team": "A", "map_id": self.maps["Streets"].pk}, format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("guards", phases(response))
+
+    def test_allowed_origin_may_read_the_timings(self):
+        response = self.client.get(reverse("health"), HTTP_ORIGIN="http://localhost:5173")
+        self.assertEqual(response["Timing-Allow-Origin"], "http://localhost:5173")
+
+        response = self.client.get(reverse("health"), HTTP_ORIGIN="https://elsewhere.example")
+        self.assertNotIn("Timing-Allow-Origin", response)
+
+    def test_only_api_paths_are_timed(self):
+        self.assertNotIn("Server-Timing", self.client.get("/healthz/"))
+
+    def test_timers_are_inert_outside_a_request(self):
+        with timed("guards"):
+            pass
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+SERVER_DIR = Path(__file__).resolve().parents[2]
+
+BOOT = """
+import sys
+import django
+django.setup()
+from django.test import Client
+from django.urls import Resolver404, resolve
+
+resolve("/api/series/")
+resolve("/api/pools/1/combos/")
+try:
+    resolve("/admin/")
+except Resolver404:
+    pass
+else:
+    sys.exit("admin is routed")
+assert Client(HTTP_HOST="localhost").get("/healthz/").json() == {"ok": True}
+loaded = [m for m in ("jazzmin", "dal", "import_export", "django_extensions", "whitenoise",
+                      "django.contrib.sessions") if m in sys.modules]
+sys.exit(f"back-office modules loaded: {loaded}" if loaded else 0)
+"""
+
+
+class SlimSettingsTests(SimpleTestCase):
+
+    def test_api_profile_serves_api_without_back_office_apps(self):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="api.settings_api", DATABASE_URL="")
+        result = subprocess.run(
+            [sys.executable, "-c", BOOT], cwd=SERVER_DIR, env=env, capture_output=True, text=True, timeout=60
+        )
+        self.assertEqual(result.returncode, 0, result.stderr or result.stdout)
@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.core.cache import cache as default_cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from veto import pools
+from veto.machine_tsd import TSDMachine
+from veto.models import Action
+from veto.serializers import SeriesSerializer
+from veto.tests.utils import BANS, apply_step, seed_catalog, start_series
+
+
+class SparseFieldsTests(TestCase):
+
+    def setUp(self):
+        default_cache.clear()
+        self.modes, self.maps = seed_catalog()
+        self.pool = pools.publish("season-1")
+        self.series, self.machine = start_series(TSDMachine)
+        apply_step(self.machine, self.modes, self.maps, BANS[0])
+        self.url = reverse("series-detail", args=[self.series.pk])
+
+    def test_series_fields_skip_the_timeline(self):
+        with mock.patch.object(SeriesSerializer, "get_actions") as get_actions, self.assertNumQueries(2):
+            response = self.client.get(self.url, {"fields": "state,turn"})  # version + the series row
+
+        self.assertEqual(response.json(), {"state": "BAN_PHASE", "turn": {"team": "B", "action": "BAN",
+                                                                          "kind": "OBJECTIVE_COMBO"}})
+        get_actions.assert_not_called()
+
+    def test_series_fields_are_cut_from_a_cached_snapshot(self):
+        full = self.client.get(self.url).json()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"fields": "id,version,actions"})
+
+        self.assertEqual(response.json(), {k: full[k] for k in ("id", "version", "actions")})
+
+    def test_series_expand_map_pool(self):
+        self.assertEqual(self.client.get(self.url).json()["map_pool"], self.pool.pk)
+
+        body = self.client.get(self.url, {"expand": "map_pool", "fields": "id,map_pool"}).json()
+
+        self.assertEqual(body["map_pool"], {"id": self.pool.pk, "label": "season-1",
+                                            "created_at": body["map_pool"]["created_at"]})
+
+    def test_series_patch_with_fields(self):
+        base = self.client.get(self.url).json()
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_step(self.machine, self.modes, self.maps, BANS[1])
+
+        patch = self.client.get(self.url, {"since": base["version"], "fields": "version,turn,actions"}).json()
+
+        self.assertEqual(sorted(op["path"] for op in patch), ["/actions/1", "/turn/team", "/version"])
+
+    def test_unknown_names_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {"fields": "state,secret"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"expand": "actions"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("series-list"), {"expand": "map_pool"}).status_code, 400)
+
+    def test_series_list_fields_skip_the_counts(self):
+        with CaptureQueriesContext(connection) as queries:
+            body = self.client.get(reverse("series-list"), {"fields": "id,state"}).json()
+
+        self.assertEqual(body["results"], [{"id": self.series.pk, "state": "BAN_PHASE"}])
+        self.assertFalse(any("veto_seriesban" in q["sql"] for q in queries.captured_queries))
+        self.assertEqual(self.client.get(reverse("series-list")).json()["results"][0]["ban_count"], 1)
+
+    def test_maps_expand_and_fields(self):
+        url = reverse("maps-detail", args=[self.maps["Recharge"].pk])
+        nested = self.client.get(url).json()
+        ids = self.client.get(url, {"expand": ""}).json()
+
+        self.assertEqual({m["name"] for m in nested["modes"]}, {"Slayer", "King of the Hill", "Oddball"})
+        self.assertEqual(sorted(ids["modes"]), sorted(m["id"] for m in nested["modes"]))
+        with self.assertNumQueries(2):  # count + page: no modes prefetch
+            names = self.client.get(reverse("maps-list"), {"fields": "name"}).json()["results"]
+        self.assertIn({"name": "Recharge"}, names)
+
+    def test_actions_expand(self):
+        Action.objects.create(series=self.series, team="A", map=self.maps["Origin"], mode=self.modes["Slayer"])
+        url = reverse("actions-list")
+
+        with CaptureQueriesContext(connection) as queries:
+            plain = self.client.get(url).json()["results"][0]
+        self.assertFalse(any("JOIN" in q["sql"] for q in queries.captured_queries))
+        with self.assertNumQueries(2):  # count + page with the expanded rows joined in
+            expanded = self.client.get(url, {"expand": "map,mode,series", "fields": "id,map,mode,series"}).json()
+
+        self.assertEqual((plain["map"], plain["mode"]), (self.maps["Origin"].pk, self.modes["Slayer"].pk))
+        self.assertEqual(expanded["results"][0], {
+            "id": plain["id"],
+            "series": {"id": self.series.pk, "team_a": "Team Alpha", "team_b": "Team Beta", "state": "BAN_PHASE"},
+            "map": {"id": self.maps["Origin"].pk, "name": "Origin"},
+            "mode": {"id": self.modes["Slayer"].pk, "name": "Slayer", "is_objective": False},
+        })
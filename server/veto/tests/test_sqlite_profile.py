@@ -0,0 +1,17 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite profile")
+class SqliteProfileTests(TestCase):
+
+    def test_connection_uses_tuned_pragmas_and_immediate_transactions(self):
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertEqual(cursor.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+            self.assertEqual(cursor.execute("PRAGMA cache_size").fetchone()[0], -32000)
+            # in-memory test databases report "memory"; file databases switch to WAL
+            self.assertIn(cursor.execute("PRAGMA journal_mode").fetchone()[0], ("wal", "memory"))
@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from veto.machine_tsd import TSDMachine
+from veto.models import MapStat
+from veto.tests.utils import BANS, run_bans, run_picks, seed_catalog, start_series
+
+
+def snapshot():
+    return sorted(
+        MapStat.objects.exclude(count=0).values_list("day", "map_id", "mode_id", "team", "action", "count")
+    )
+
+
+class MapStatRollupTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.modes, self.maps = seed_catalog()
+
+    def test_commands_update_rollup_incrementally(self):
+        _, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps)
+        run_picks(machine, self.modes, self.maps)
+
+        slayer_live_fire = MapStat.objects.get(
+            map=self.maps["Live Fire"], mode=self.modes["Slayer"], action="PICK"
+        )
+        self.assertEqual((slayer_live_fire.team, slayer_live_fire.count), ("Team Alpha", 1))
+        self.assertEqual(sum(MapStat.objects.filter(action="BAN").values_list("count", flat=True)), 7)
+
+    def test_undo_and_reset_decrement(self):
+        series, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps)
+        run_picks(machine, self.modes, self.maps, [("B", "OBJECTIVE_COMBO", "Capture the Flag", "Fortress")])
+
+        machine.undo_last()
+        self.assertFalse(MapStat.objects.filter(action="PICK").exclude(count=0).exists())
+
+        machine.reset()
+        self.assertEqual(snapshot(), [])
+
+    def test_backfill_matches_incremental_rollup(self):
+        _, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps)
+        run_picks(machine, self.modes, self.maps)
+        _, machine = start_series(TSDMachine, team_a="Team Gamma")
+        run_bans(machine, self.modes, self.maps, BANS[:4])
+        incremental = snapshot()
+
+        MapStat.objects.all().delete()
+        call_command("backfill_map_stats", stdout=StringIO())
+
+        self.assertEqual(snapshot(), incremental)
+
+    def test_stats_endpoint_groups_and_rates(self):
+        _, machine = start_series(TSDMachine)
+        run_bans(machine, self.modes, self.maps)
+
+        response = self.client.get(reverse("stats-maps"), {"by": "mode"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["totals"], {"bans": 7, "picks": 0})
+        koth = next(r for r in response.data["results"] if r["mode"] == "King of the Hill")
+        self.assertEqual((koth["bans"], koth["ban_rate"]), (3, round(3 / 7, 4)))
+
+    def test_stats_endpoint_rejects_unknown_grouping(self):
+        response = self.client.get(reverse("stats-maps"), {"by": "weather"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_stats_endpoint_rejects_bad_dates_and_ids(self):
+        for params in ({"from": "2025-02-30"}, {"to": "yesterday"}, {"map": "abc"}, {"mode": "-1"}):
+            response = self.client.get(reverse("stats-maps"), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(list(response.data["detail"]), list(params))
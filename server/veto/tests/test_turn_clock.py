@@ -0,0 +1,120 @@
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from veto import clocks
+from veto.machine_tsd import TSDMachine
+from veto.models import Series, SeriesBan, SeriesState
+from veto.tests.utils import BANS, apply_step, seed_catalog, start_series
+
+
+@override_settings(TURN_SECONDS=30, TURN_TIMEOUT_FALLBACK="random")
+class TurnDeadlineTests(TestCase):
+
+    def setUp(self):
+        self.modes, self.maps = seed_catalog()
+        self.series, self.machine = start_series(TSDMachine)
+
+    def expire_now(self):
+        Series.objects.filter(pk=self.series.pk).update(turn_deadline=timezone.now() - timedelta(seconds=1))
+        return Series.objects.get(pk=self.series.pk).version
+
+    def test_each_turn_gets_a_deadline(self):
+        s = Series.objects.get(pk=self.series.pk)
+        self.assertAlmostEqual((s.turn_deadline - timezone.now()).total_seconds(), 30, delta=5)
+        self.assertEqual(self.client.get(reverse("series-detail", args=[s.pk])).json()["turn_deadline"],
+                         s.turn_deadline.isoformat().replace("+00:00", "Z"))
+
+        self.machine.reset()
+        self.assertIsNone(Series.objects.get(pk=s.pk).turn_deadline)
+
+    @override_settings(TURN_SECONDS=0)
+    def test_clock_off(self):
+        apply_step(self.machine, self.modes, self.maps, BANS[0])
+        self.assertIsNone(Series.objects.get(pk=self.series.pk).turn_deadline)
+
+    def test_expiry_plays_a_random_legal_move(self):
+        version = self.expire_now()
+        s = self.machine.expire_turn(version)
+
+        ban = SeriesBan.objects.get(series=self.series)
+        self.assertEqual((ban.by_team, ban.step_index), ("A", 0))
+        self.assertEqual(s.version, version + 1)
+        self.assertEqual(s.turn["team"], "B")
+        self.assertGreater(s.turn_deadline, timezone.now())
+
+    def test_expiry_abort(self):
+        s = self.machine.expire_turn(self.expire_now(), fallback="abort")
+
+        self.assertEqual(s.state, SeriesState.ABORTED)
+        self.assertEqual((s.turn, s.turn_deadline), ({}, None))
+
+    def test_expiry_is_a_no_op_once_the_turn_was_played(self):
+        version = self.expire_now()
+        apply_step(self.machine, self.modes, self.maps, BANS[0])
+        self.expire_now()
+
+        self.assertEqual(self.machine.expire_turn(version).version, version + 1)
+        self.assertEqual(SeriesBan.objects.filter(series=self.series).count(), 1)
+
+    def test_clock_requeues_a_turn_edited_outside_the_machine(self):
+        s = Series.objects.get(pk=self.series.pk)
+        clock = clocks.TurnClock(lambda pk, version: TSDMachine(pk).expire_turn(version),
+                                 clock=lambda: s.turn_deadline.timestamp())
+        clock.schedule(s.pk, s.version, s.turn_deadline.timestamp())
+        self.client.patch(reverse("series-detail", args=[s.pk]), {"team_a": "Renamed"},
+                          content_type="application/json")  # bumps the version, announces nothing
+        self.expire_now()
+
+        self.assertEqual(clock.fire_due(), 2)  # the stale entry, then the one re-queued at the new version
+        ban = SeriesBan.objects.get(series=self.series)
+        self.assertEqual((ban.by_team, ban.step_index), ("A", 0))
+        self.assertEqual(len(clock), 1)  # team B's turn
+
+    def test_early_expiry_leaves_the_series_alone(self):
+        s = Series.objects.get(pk=self.series.pk)
+        self.assertEqual(self.machine.expire_turn(s.version).version, s.version)
+        self.assertFalse(SeriesBan.objects.filter(series=self.series).exists())
+
+    def test_commit_announces_the_deadline(self):
+        listener = clocks.UDPListener(("127.0.0.1", 0))
+        self.addCleanup(listener.close)
+        host, port = listener.address
+        with override_settings(TURN_CLOCK_UDP=f"{host}:{port}"), self.captureOnCommitCallbacks(execute=True):
+            s = apply_step(self.machine, self.modes, self.maps, BANS[0])
+
+        [payload] = listener.wait(1.0)
+        self.assertEqual(json.loads(payload), {"id": s.pk, "version": s.version, "deadline": s.turn_deadline.timestamp()})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_turn_clock_fires_in_deadline_order_and_drops_superseded_turns():
+    now, fired = FakeClock(), []
+    clock = clocks.TurnClock(lambda series_id, version: fired.append((series_id, version)), clock=now)
+    clock.schedule(1, 3, 1030.0)
+    clock.schedule(2, 7, 1010.0)
+    clock.schedule(3, 1, 1020.0)
+    clock.schedule(1, 4, 1040.0)                           # series 1 moved on: version 3 is superseded
+    clock.receive(json.dumps({"id": 3, "version": 2, "deadline": None}))  # series 3 finished
+    clock.receive(json.dumps({"id": 2, "version": 6, "deadline": 1005.0}))  # late, out of order
+    clock.receive("not json")
+
+    assert clock.next_timeout() == 10.0
+    now.now = 1035.0
+    assert clock.fire_due() == 1
+    assert fired == [(2, 7)]
+    assert clock.next_timeout() == 5.0
+    now.now = 1040.0
+    assert clock.fire_due() == 1
+    assert fired == [(2, 7), (1, 4)]
+    assert len(clock) == 0 and clock.next_timeout(idle=60.0) == 60.0
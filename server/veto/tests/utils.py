@@ -0,0 +1,72 @@
+from veto.models import GameMode, Map, Series
+
+# A small catalog that supports a full Bo3/Bo5/Bo7 veto
+CATALOG = {
+    "Slayer": ["Aquarius", "Live Fire", "Recharge", "Streets", "Solitude", "Origin"],
+    "King of the Hill": ["Live Fire", "Recharge", "Lattice"],
+    "Capture the Flag": ["Aquarius", "Fortress", "Origin"],
+    "Oddball": ["Live Fire", "Recharge", "Lattice"],
+}
+
+# (team, kind, mode, map) for the 7-step ban phase
+BANS = [
+    ("A", "OBJECTIVE_COMBO", "King of the Hill", "Live Fire"),
+    ("B", "OBJECTIVE_COMBO", "King of the Hill", "Recharge"),
+    ("A", "OBJECTIVE_COMBO", "Capture the Flag", "Aquarius"),
+    ("B", "OBJECTIVE_COMBO", "Oddball", "Live Fire"),
+    ("A", "OBJECTIVE_COMBO", "King of the Hill", "Lattice"),
+    ("B", "SLAYER_MAP", "Slayer", "Streets"),
+    ("A", "SLAYER_MAP", "Slayer", "Aquarius"),
+]
+
+# (team, kind, mode, map) for a Bo3 pick window
+BO3_PICKS = [
+    ("B", "OBJECTIVE_COMBO", "Capture the Flag", "Fortress"),
+    ("A", "SLAYER_MAP", "Slayer", "Live Fire"),
+    ("B", "OBJECTIVE_COMBO", "Oddball", "Recharge"),
+]
+
+
+def seed_catalog():
+    """Create the test catalog; returns ({mode name: GameMode}, {map name: Map})."""
+    modes = {
+        name: GameMode.objects.create(name=name, is_objective=(name != "Slayer"))
+        for name in CATALOG
+    }
+    maps = {}
+    for mode_name, map_names in CATALOG.items():
+        for map_name in map_names:
+            if map_name not in maps:
+                maps[map_name] = Map.objects.create(name=map_name)
+            maps[map_name].modes.add(modes[mode_name])
+    return modes, maps
+
+
+def apply_step(machine, modes, maps, step, action="BAN"):
+    team, kind, mode_name, map_name = step
+    if action == "BAN" and kind == "OBJECTIVE_COMBO":
+        return machine.ban_objective_combo(team, modes[mode_name].pk, maps[map_name].pk)
+    if action == "BAN":
+        return machine.ban_slayer_map(team, maps[map_name].pk)
+    if kind == "OBJECTIVE_COMBO":
+        return machine.pick_objective_combo(team, modes[mode_name].pk, maps[map_name].pk)
+    return machine.pick_slayer_map(team, maps[map_name].pk)
+
+
+def start_series(machine_cls, series_type="Bo3", team_a="Team Alpha", team_b="Team Beta"):
+    """Create a series and drive it to BAN_PHASE; returns (series, machine)."""
+    series = Series.objects.create(team_a=team_a, team_b=team_b)
+    machine = machine_cls(series.pk)
+    machine.assign_roles(team_a, team_b)
+    machine.confirm_tsd(series_type=series_type)
+    return series, machine
+
+
+def run_bans(machine, modes, maps, bans=BANS):
+    for step in bans:
+        apply_step(machine, modes, maps, step, "BAN")
+
+
+def run_picks(machine, modes, maps, picks=BO3_PICKS):
+    for step in picks:
+        apply_step(machine, modes, maps, step, "PICK")
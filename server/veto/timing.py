@@ -0,0 +1,109 @@
+# /veto/timing.py
+"""
+Server-Timing breakdown for /api/ responses.
+
+ServerTimingMiddleware opens a Timings collector for the request in a ContextVar. Code anywhere in
+the request marks a phase with `with timed("guards"): ...`; outside a request, timed() does nothing.
+The phases are:
+
+- lock       waiting for the series row lock (TSDMachine._lock)
+- guards     rule checks in TSDMachine commands
+- serialize  building the response payload (serializers' `.data`)
+- render     turning the payload into bytes (DRF renderers)
+- db         time spent executing SQL, across all phases
+- total      the whole request, as seen by the middleware
+
+Phases overlap: `db` also counts the queries run inside lock, guards and serialize. Timers are
+time.perf_counter(); a nested timer with the same name as an open one is not counted twice.
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+ORDER = ("lock", "guards", "serialize", "render", "db")
+
+_current = ContextVar("veto_timings", default=None)
+
+
+class Timings:
+    def __init__(self):
+        self.ms = {}
+        self.queries = 0
+        self._open = set()
+
+    def add(self, name, ms):
+        self.ms[name] = self.ms.get(name, 0.0) + ms
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook: accumulates the `db` phase
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add("db", (time.perf_counter() - start) * 1000)
+
+    def header(self, total_ms) -> str:
+        parts = []
+        for name in ORDER:
+            if name == "db":
+                parts.append(f'db;desc="{self.queries} queries";dur={self.ms.get("db", 0.0):.2f}')
+            elif name in self.ms:
+                parts.append(f"{name};dur={self.ms[name]:.2f}")
+        parts.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def timed(name):
+    t = _current.get()
+    if t is None or name in t._open:
+        yield
+        return
+    t._open.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        t._open.discard(name)
+        t.add(name, (time.perf_counter() - start) * 1000)
+
+
+class ServerTimingMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+        t = Timings()
+        token = _current.set(t)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(t))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        response["Server-Timing"] = t.header((time.perf_counter() - start) * 1000)
+        origin = request.headers.get("Origin")
+        if origin and origin in settings.CORS_ALLOWED_ORIGINS:
+            # Lets the frontend read the entries from PerformanceResourceTiming, not just devtools
+            response["Timing-Allow-Origin"] = origin
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render right after this hook; close the phase from a post-render callback
+        t = _current.get()
+        if t is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(lambda r: t.add("render", (time.perf_counter() - start) * 1000))
+        return response
@@ -3,7 +3,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     MapViewSet, SeriesViewSet, ActionViewSet,
-    HealthView, MapModeComboView, MapModeGroupedView, GameModeViewSet
+    HealthView, MapModeComboView, MapModeGroupedView, GameModeViewSet, MapPoolViewSet,
+    MapStatsView, SeriesExportView, SeriesImportView, JobViewSet, series_command,
 )
 
 router = DefaultRouter()
@@ -11,12 +12,19 @@ router.register(r'maps', MapViewSet, basename='maps')
 router.register(r'series', SeriesViewSet, basename='series')
 router.register(r'actions', ActionViewSet, basename='actions')
 router.register(r'gamemodes', GameModeViewSet, basename='gamemode')
+router.register(r'pools', MapPoolViewSet, basename='pools')
+router.register(r'jobs', JobViewSet, basename='jobs')
 router.trailing_slash = '/?'   # makes trailing slash optional
 
 
+# Explicit paths come first: the router's `maps/<pk>/` route would otherwise swallow `maps/combos/`
 urlpatterns = [
-    path('', include(router.urls)),
     path('health/', HealthView.as_view(), name='health'),
+    path('series/<int:pk>/command/', series_command, name='series-command'),
     path('maps/combos/', MapModeComboView.as_view(), name='map-mode-combos'),
     path('maps/combos/grouped/', MapModeGroupedView.as_view(), name='map-mode-combos-grouped'),
+    path('stats/maps/', MapStatsView.as_view(), name='stats-maps'),
+    path('export/series.<str:fmt>', SeriesExportView.as_view(), name='export-series'),
+    path('import/series/', SeriesImportView.as_view(), name='import-series'),
+    path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,18 +1,32 @@
 # server/veto/views.py
+import uuid
+
 from django.utils import timezone
-from .machine_tsd import TSDMachine, GuardError, TurnError
+from .machine_tsd import TSDMachine, GuardError, TurnError, team_code
+from . import actors, cache, delta, export, jobs, pools, renderers, stats
+from .imports import import_documents
+from django.utils.dateparse import parse_date
 from django.utils.text import slugify
 from rest_framework.decorators import action
 from collections import defaultdict
-from rest_framework import status, viewsets
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework import mixins, status, viewsets
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
-from .models import Map, GameMode, Series, Action
+from django.urls import reverse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .models import Map, GameMode, MapPool, Series, SeriesArchive, SeriesBan, SeriesRound, Action, Job
+from .documents import archived_representation
 from .serializers import (
     MapSerializer, MapWriteSerializer,
-    GameModeSerializer, SeriesSerializer, ActionSerializer
+    GameModeSerializer, MapPoolSerializer, SeriesSerializer, SeriesSummarySerializer, ActionSerializer,
+    JobSerializer, csv_param, series_detail_queryset,
 )
 
 class HealthView(APIView):
@@ -25,16 +39,45 @@ class HealthView(APIView):
             "modes": GameMode.objects.count(),
             "series": Series.objects.count(),
             "actions": Action.objects.count(),
+            "cache": cache.stats(),
         }, status=status.HTTP_200_OK)
 
 
-class MapViewSet(viewsets.ModelViewSet):
+class SparseFieldsMixin:
+    """
+    ?fields=a,b and ?expand=x on list/retrieve, for serializers with DynamicFieldsMixin.
+    get_queryset() implementations check sparse() to load only what will be rendered.
+    """
+    SPARSE_ACTIONS = ('list', 'retrieve')
+
+    def sparse(self):
+        """(fields, expand) of this request with the serializer's defaults filled in; 400 on unknown names."""
+        if not hasattr(self, '_sparse'):
+            fields = expand = None
+            if self.action in self.SPARSE_ACTIONS:
+                fields = csv_param(self.request.GET.get('fields'))
+                expand = csv_param(self.request.GET.get('expand'))
+            self._sparse = self.get_serializer_class().check_params(fields, expand)
+        return self._sparse
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.SPARSE_ACTIONS:
+            kwargs['fields'], kwargs['expand'] = self.sparse()
+        return super().get_serializer(*args, **kwargs)
+
+
+class MapViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
-    GET /api/maps/           -> list maps (with modes)
+    GET /api/maps/           -> list maps (with modes; ?fields=id,name, ?expand= for mode ids only)
     POST /api/maps/          -> create (use mode_ids)
     PATCH/PUT /api/maps/:id  -> update (use mode_ids)
     """
-    queryset = Map.objects.all().prefetch_related('modes')
+    queryset = Map.objects.all()
+
+    def get_queryset(self):
+        if self.action in self.SPARSE_ACTIONS and 'modes' not in self.sparse()[0]:
+            return self.queryset
+        return self.queryset.prefetch_related('modes')
 
     def get_serializer_class(self):
         if self.action in ('create', 'update', 'partial_update'):
@@ -42,22 +85,84 @@ class MapViewSet(viewsets.ModelViewSet):
         return MapSerializer
 
 
-# Normalize team labels to "A"/"B"
-def _as_team_code(series: Series, raw: str) -> str:
-    v = (raw or "").strip()
-    if v in ("A", "B"):
-        return v
-    if v == series.team_a:
-        return "A"
-    if v == series.team_b:
-        return "B"
-    raise GuardError("Invalid or unknown team")
+def _count_per_series(qs):
+    # Correlated COUNT(*) per series; avoids multiplying rows when joining bans and rounds together
+    counts = qs.filter(series=OuterRef('pk')).order_by().values('series').annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
 
 # Change base class so get_serializer exists
-class SeriesViewSet(viewsets.ModelViewSet):
+class SeriesViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Series.objects.all()
     serializer_class = SeriesSerializer
 
+    SUMMARY_FIELDS = ('id', 'team_a', 'team_b', 'created_at', 'state', 'series_type', 'turn', 'turn_deadline')
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == 'list':
+            # Fixed query count per page: summary columns + counts, no timeline rows
+            fields, _ = self.sparse()
+            counts = {
+                'ban_count': lambda: _count_per_series(SeriesBan.objects.all()),
+                'pick_count': lambda: _count_per_series(SeriesRound.objects.filter(pick_map__isnull=False)),
+            }
+            return qs.only('id', *(f for f in self.SUMMARY_FIELDS if f in fields)).annotate(
+                **{name: count() for name, count in counts.items() if name in fields}
+            )
+        if self.action == 'retrieve':
+            fields, expand = self.sparse()
+            if 'map_pool' in expand:
+                qs = qs.select_related('map_pool')
+            return series_detail_queryset(qs) if 'actions' in fields else qs
+        return qs
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return SeriesSummarySerializer
+        return super().get_serializer_class()
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Series detail from the snapshot cache (keyed by Series.version, one indexed read);
+        falls back to the archive for series moved out by archive_series.
+        ?since=<version>: a JSON Patch from that version when possible (veto/delta.py)
+        ?fields= is cut from the snapshot; without `actions` a missing snapshot is not built, and
+        ?expand= (not in snapshots) always reads the series itself
+        """
+        pk = kwargs.get("pk")
+        since = request.GET.get("since")
+        if since is not None and not since.isdigit():
+            raise ValidationError({"since": "Must be a series version"})
+        fields, expand = self.sparse()
+        cut = fields if "fields" in request.GET else None  # archived documents carry more than Meta.fields
+        version = Series.objects.filter(pk=pk).values_list("version", flat=True).first() if str(pk).isdigit() else None
+        if version is not None:
+            snapshot = None
+            if not expand:
+                snapshot = (cache.series_snapshot(int(pk), version) if 'actions' in fields
+                            else cache.peek_series_snapshot(int(pk), version))
+            if snapshot is None:
+                return Response(self.get_serializer(get_object_or_404(self.get_queryset(), pk=pk)).data)
+            if since is not None:
+                patch = delta.series_patch(int(pk), int(since), snapshot, cut)
+                if patch is not None:
+                    # Other formats keep their own content type: a patch is an array, a body a map
+                    content_type = delta.CONTENT_TYPE if request.accepted_renderer.format == "json" else None
+                    return Response(patch, status=status.HTTP_200_OK, content_type=content_type)
+            return Response(delta.only(snapshot, cut), status=status.HTTP_200_OK)
+        archived = SeriesArchive.objects.filter(pk=pk).only("document").first() if str(pk).isdigit() else None
+        if archived is None:
+            raise Http404
+        return Response(delta.only(archived_representation(archived.document), cut), status=status.HTTP_200_OK)
+
+    def perform_update(self, serializer):
+        # PUT/PATCH change the series outside TSDMachine: move it to a new version so cached
+        # snapshots and ?since= bases of the old one are not served for it
+        series = serializer.save()
+        Series.touch(series.pk)
+        series.refresh_from_db(fields=['version'])
+
     def create(self, request, *args, **kwargs):
         """Create a new series"""
         try:
@@ -81,6 +186,18 @@ class SeriesViewSet(viewsets.ModelViewSet):
         s = get_object_or_404(Series, pk=pk)
         return Response({"state": s.state}, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=["get"], url_path="legal_moves", url_name="series-legal-moves")
+    def legal_moves(self, request, pk=None):
+        """Moves the team on turn may make next, resolved against the series' pinned map pool"""
+        s = get_object_or_404(Series, pk=pk)
+        catalog = pools.catalog_for(s)
+        moves = [
+            {"team": m.team, "kind": m.kind, "map_id": m.map_id, "map": catalog.maps.get(m.map_id),
+             "mode_id": m.mode_id, "mode": catalog.modes.get(m.mode_id, ("",))[0]}
+            for m in pools.series_legal_moves(s)
+        ]
+        return Response({"turn": s.turn, "map_pool": s.map_pool_id, "moves": moves}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=["post"], url_path="veto", url_name="series-veto")
     def veto(self, request, pk=None):
         """
@@ -113,11 +230,9 @@ class SeriesViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        step = (s.actions.count() or 0) + 1
-
+        # step is allocated atomically from Series.action_seq (see next_action_step)
         act = Action.objects.create(
             series=s,
-            step=step,
             action_type=Action.BAN,
             team=team_code,
             map=map_obj,
@@ -195,7 +310,7 @@ class SeriesViewSet(viewsets.ModelViewSet):
             if not all([team_raw, map_id, mode_id]):
                 return Response({"detail": "team, map/map_id, and mode/mode_id are required"},
                                 status=status.HTTP_400_BAD_REQUEST)
-            team = _as_team_code(s, team_raw)
+            team = team_code(s, team_raw)
             TSDMachine(pk).ban_objective_combo(team, int(mode_id), int(map_id))
             return Response({"detail": "Objective combo banned"}, status=status.HTTP_200_OK)
         except (GuardError, TurnError) as e:
@@ -211,7 +326,7 @@ class SeriesViewSet(viewsets.ModelViewSet):
             if not all([team_raw, map_id]):
                 return Response({"detail": "team and map/map_id are required"},
                                 status=status.HTTP_400_BAD_REQUEST)
-            team = _as_team_code(s, team_raw)
+            team = team_code(s, team_raw)
             TSDMachine(pk).ban_slayer_map(team, int(map_id))
             return Response({"detail": "Slayer map banned"}, status=status.HTTP_200_OK)
         except (GuardError, TurnError) as e:
@@ -229,7 +344,7 @@ class SeriesViewSet(viewsets.ModelViewSet):
             if not all([team_raw, map_id, mode_id]):
                 return Response({"detail": "team, map/map_id, and mode/mode_id are required"},
                                 status=status.HTTP_400_BAD_REQUEST)
-            team = _as_team_code(s, team_raw)
+            team = team_code(s, team_raw)
             TSDMachine(pk).pick_objective_combo(team, int(mode_id), int(map_id))
             return Response({"detail": "Objective combo picked"}, status=status.HTTP_200_OK)
         except (GuardError, TurnError) as e:
@@ -245,20 +360,26 @@ class SeriesViewSet(viewsets.ModelViewSet):
             if not all([team_raw, map_id]):
                 return Response({"detail": "team and map/map_id are required"},
                                 status=status.HTTP_400_BAD_REQUEST)
-            team = _as_team_code(s, team_raw)
+            team = team_code(s, team_raw)
             TSDMachine(pk).pick_slayer_map(team, int(map_id))
             return Response({"detail": "Slayer map picked"}, status=status.HTTP_200_OK)
         except (GuardError, TurnError) as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     # ...existing code...
 
-class ActionViewSet(viewsets.ModelViewSet):
+class ActionViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     CRUD for actions. On create/update, ensure the chosen mode is valid for the chosen map.
     """
-    queryset = Action.objects.select_related('series', 'map', 'mode')
+    queryset = Action.objects.all()
     serializer_class = ActionSerializer
 
+    def get_queryset(self):
+        # Unexpanded relations render as ids straight from the row; select_related() with no
+        # names would join every foreign key
+        expand = self.sparse()[1] if self.action in self.SPARSE_ACTIONS else ()
+        return self.queryset.select_related(*expand) if expand else self.queryset
+
     def _validate_map_mode(self, serializer):
         map_obj = serializer.validated_data.get('map')
         mode_obj = serializer.validated_data.get('mode')
@@ -274,6 +395,34 @@ class ActionViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
+@csrf_exempt
+@require_POST
+async def series_command(request, pk):
+    """
+    POST /api/series/<id>/command/  {"command": "ban_slayer_map", "team": "A", "map_id": 3, "version": 12}
+
+    One entry point for every veto mutation, queued per series when SERIES_ACTORS is on (veto/actors.py).
+    `version` is optional; when sent, the command only applies to that version of the series (409 otherwise).
+    Returns the series' new version, state and turn.
+    """
+    respond = renderers.respond
+    try:
+        cmd = actors.Command.from_payload(renderers.parse_body(request))
+    except ValueError as e:
+        return respond(request, {"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        snapshot = await actors.execute(pk, cmd)
+    except Series.DoesNotExist:
+        return respond(request, {"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    except actors.StaleCommand as e:
+        return respond(request, {"detail": str(e), "version": e.version}, status=status.HTTP_409_CONFLICT)
+    except actors.QueueFull as e:
+        return respond(request, {"detail": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    except (GuardError, TurnError, ValueError) as e:
+        return respond(request, {"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return respond(request, snapshot.as_dict(), status=status.HTTP_200_OK)
+
+
 class MapModeComboView(APIView):
     """
     Flat list of allowed Map × Mode combos.
@@ -285,7 +434,11 @@ class MapModeComboView(APIView):
     def get(self, request):
         q_mode = request.GET.get("mode")
         q_type = request.GET.get("type")  # objective | slayer
+        combos = cache.catalog_payload("combos", f"{q_mode}|{q_type}", lambda: self.build(q_mode, q_type))
+        return Response(combos, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def build(q_mode, q_type):
         combos = []
         maps = Map.objects.all().prefetch_related("modes")
 
@@ -315,7 +468,7 @@ class MapModeComboView(APIView):
                 })
 
         combos.sort(key=lambda x: (x["mode"], x["map"]))
-        return Response(combos, status=status.HTTP_200_OK)
+        return combos
 
 class MapModeGroupedView(APIView):
     """
@@ -338,7 +491,11 @@ class MapModeGroupedView(APIView):
     def get(self, request):
         q_type = (request.GET.get("type") or "").lower()  # objective|slayer|""(all)
         q_mode = request.GET.get("mode")
+        grouped = cache.catalog_payload("combos-grouped", f"{q_mode}|{q_type}", lambda: self.build(q_mode, q_type))
+        return Response(grouped, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def build(q_mode, q_type):
         maps = Map.objects.all().prefetch_related("modes")
 
         # mode_id -> {"mode_id", "mode", "is_objective", "combos":[{map_id,map,slug}]}
@@ -383,9 +540,140 @@ class MapModeGroupedView(APIView):
         objective.sort(key=lambda x: x["mode"])
         slayer.sort(key=lambda x: x["mode"])
 
-        return Response({"objective": objective, "slayer": slayer}, status=status.HTTP_200_OK)
+        return {"objective": objective, "slayer": slayer}
+
+
+class MapPoolViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    GET /api/pools/               -> published pools, newest (current) first
+    GET /api/pools/:id/combos/    -> the pool's frozen Map × Mode combos (cacheable forever)
+    """
+    queryset = MapPool.objects.only('id', 'label', 'created_at')
+    serializer_class = MapPoolSerializer
+
+    @action(detail=True, methods=["get"], url_path="combos", url_name="combos")
+    def combos(self, request, pk=None):
+        try:
+            catalog = pools.pool_catalog(int(pk))
+        except (ValueError, MapPool.DoesNotExist):
+            raise Http404
+        response = Response(catalog.combos(), status=status.HTTP_200_OK)
+        # Pools are immutable, so the payload for this URL can never change
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    GET /api/jobs/:id/   -> status, progress (done / total, message) and result of a background job
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
 
 
 class GameModeViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = GameMode.objects.all().order_by('name')
-    serializer_class = GameModeSerializer
\ No newline at end of file
+    serializer_class = GameModeSerializer
+
+
+def _date_range(query):
+    """?from= / ?to= as dates (None when absent); returns (dates, errors) with one message per bad value."""
+    dates, errors = {}, {}
+    for param in ("from", "to"):
+        raw = query.get(param)
+        try:
+            dates[param] = parse_date(raw) if raw else None
+        except ValueError:  # well formed but not a day, e.g. 2025-02-30
+            dates[param] = None
+        if raw and dates[param] is None:
+            errors[param] = "Expected YYYY-MM-DD"
+    return dates, errors
+
+
+class MapStatsView(APIView):
+    """
+    Ban/pick counts and rates from the daily MapStat rollup.
+
+    GET /api/stats/maps/
+      ?by=combo|map|mode|team   # grouping (default: combo)
+      ?from=YYYY-MM-DD&to=YYYY-MM-DD
+      ?team=<team name>&map=<id>&mode=<id>
+    """
+    def get(self, request):
+        by = request.GET.get("by", "combo")
+        if by not in stats.GROUPINGS:
+            raise ValidationError({"by": f"Must be one of: {', '.join(stats.GROUPINGS)}"})
+        dates, errors = _date_range(request.GET)
+        for param in ("map", "mode"):
+            if not (request.GET.get(param) or "0").isdigit():
+                errors[param] = "Must be an id"
+        if errors:
+            raise ValidationError(errors)
+
+        data = stats.summarize(
+            by=by,
+            date_from=dates["from"],
+            date_to=dates["to"],
+            team=request.GET.get("team"),
+            map_id=request.GET.get("map"),
+            mode_id=request.GET.get("mode"),
+        )
+        data.update({"from": dates["from"], "to": dates["to"]})
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SeriesExportView(View):
+    """
+    Streams series history joined with bans and picks (archived series included).
+
+    GET /api/export/series.ndjson   -> one JSON document per line
+    GET /api/export/series.csv      -> one row per ban/pick
+      ?from=YYYY-MM-DD&to=YYYY-MM-DD  # series creation day, inclusive
+      ?state=SERIES_COMPLETE,ABORTED
+    Plain Django view: the body is streamed, so DRF rendering/negotiation does not apply.
+    """
+    FORMATS = {
+        "ndjson": ("application/x-ndjson", export.ndjson_lines),
+        "csv": ("text/csv", export.csv_lines),
+    }
+
+    def get(self, request, fmt):
+        if fmt not in self.FORMATS:
+            return JsonResponse({"detail": "Unsupported export format", "status": 404}, status=404)
+        dates, errors = _date_range(request.GET)
+        if errors:
+            return JsonResponse({"detail": errors, "status": 400}, status=400)
+        states = [v for v in (request.GET.get("state") or "").split(",") if v]
+
+        content_type, writer = self.FORMATS[fmt]
+        docs = export.iter_documents(dates["from"], dates["to"], states)
+        response = StreamingHttpResponse(writer(docs), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="series.{fmt}"'
+        return response
+
+
+class SeriesImportView(APIView):
+    """
+    POST /api/import/series/   (body: NDJSON, one series document per line)
+      ?batch_size=1000
+      ?background=true   # queue it as a job instead: 202 {"job": id, "url": "/api/jobs/<id>/"}
+    Validates every document against the TSD rules and bulk-inserts the valid ones.
+    Returns {"imported": n, "rejected_count": n, "rejected": [{"line": n, "errors": [...]}]}.
+    """
+    def post(self, request):
+        try:
+            batch_size = int(request.GET.get("batch_size", 1000))
+        except ValueError:
+            batch_size = 0
+        if batch_size < 1:
+            raise ValidationError({"batch_size": "Must be a positive integer"})
+        if request.GET.get("background", "").lower() in ("1", "true", "yes"):
+            path = jobs.job_path(f"upload-{uuid.uuid4().hex}.ndjson")
+            path.write_bytes(request.body)
+            job = jobs.enqueue("import_series", path=str(path), batch_size=batch_size, cleanup=True)
+            return Response(
+                {"job": job.pk, "url": reverse("jobs-detail", args=[job.pk])}, status=status.HTTP_202_ACCEPTED,
+            )
+        # Read the raw body; request.data would run the JSON parser on NDJSON
+        result = import_documents(request.body.splitlines(), batch_size=batch_size)
+        return Response(result.as_dict(), status=status.HTTP_200_OK)